@@ -11,11 +11,24 @@ force_load_env()
 
 from dotenv import load_dotenv
 from .repository_analyzer import analyze_repository
-from .learning_path_generator import generate_learning_path, generate_day_content
-from .api_client import save_learning_content
+from .learning_path_generator import (
+    generate_learning_path, generate_day_content, generate_day_content_streaming, generate_day_content_parallel
+)
+from .api_client import (
+    save_learning_content, clear_partial_day_content, partial_day_concepts, save_day_concept,
+    mark_day_content_generated, count_generated_day_concepts
+)
+from agent.single_flight import day_generation_flights
+from agent.llm_scheduler import llm_priority
+from agent.llm_cache import refreshing
 
 load_dotenv()
 
+# Persist each concept of a new day as soon as it streams in, instead of after the whole response
+DAY_CONTENT_STREAMING = os.getenv('DAY_CONTENT_STREAMING', 'true').lower() == 'true'
+# Outline the day first, then generate every concept's details in parallel (takes precedence over streaming)
+DAY_CONTENT_FANOUT = os.getenv('DAY_CONTENT_FANOUT', 'true').lower() == 'true'
+
 class GitGuideAgent:
     """Main agent orchestrator for GitGuide project analysis and learning path generation"""
     
@@ -31,17 +44,18 @@ class GitGuideAgent:
         self.backend_url = "http://localhost:8000"
         print(f"🚀 GitGuideAgent initialized: Azure OpenAI configured: {bool(self.azure_openai_config['api_key'])}")
         
-    async def process_new_project(self, project_id, repo_url, skill_level, domain, user_id):
+    async def process_new_project(self, project_id, repo_url, skill_level, domain, user_id, path_filter=None):
         """
         Main function to process a new project
         Creates brief project overview and Day 0 content, then starts background generation for Day 1
+        (path_filter is the project's stored PathFilter config, if any)
         """
         print(f"🎯 Starting processing for project {project_id}: {repo_url}")
         print(f"   Skill Level: {skill_level}, Domain: {domain}")
         try:
             # Step 1: Analyze repository
             print("🔍 Step 1: Analyzing repository...")
-            repo_analysis = await analyze_repository(repo_url, self.github_token)
+            repo_analysis = await analyze_repository(repo_url, self.github_token, path_filter=path_filter)
             print(f"   Analysis complete: success={repo_analysis['success']}")
             if not repo_analysis['success']:
                 error_msg = f"Repository analysis failed: {repo_analysis['error']}"
@@ -67,7 +81,11 @@ class GitGuideAgent:
                 {
                     'project_overview': project_overview_text
                 },
-                repo_analysis['repo_info']
+                {
+                    **repo_analysis['repo_info'],
+                    'tech_stack': repo_analysis['tech_stack'],
+                    'commit_sha': repo_analysis.get('commit_sha')
+                }
             )
             if not save_result['success']:
                 return {
@@ -77,9 +95,11 @@ class GitGuideAgent:
 
             # Step 3: Start background generation for Day 1 (don't wait for completion)
             print("🔄 Step 3: Starting background generation for Day 1...")
-            asyncio.create_task(self.generate_next_day_background(
-                project_id, 1, repo_analysis, skill_level, domain, ''
-            ))
+            # Prefetch priority: interactive chat and on-demand days go first
+            with llm_priority('prefetch'):
+                asyncio.create_task(self.generate_next_day_background(
+                    project_id, 1, repo_analysis, skill_level, domain, ''
+                ))
             print(f"✅ GitGuide Agent completed initial setup for project {project_id}")
             return {
                 'success': True,
@@ -95,6 +115,93 @@ class GitGuideAgent:
                 'error': error_msg
             }
 
+    async def generate_and_save_day(self, project_id, day_number, repo_analysis, skill_level, domain, project_overview):
+        """
+        Generate one day's content and persist it, at most once at a time per project day
+        
+        Concurrent callers (task completion, forced regeneration, project setup)
+        share the generation already in flight, and a worker that waited on
+        another worker's lock reuses the day that worker saved.
+        
+        Returns:
+            dict: {'success', 'day_number', 'concepts_generated'} or {'success': False, 'error'}
+        """
+        async def generated_elsewhere():
+            concepts = await count_generated_day_concepts(project_id, day_number)
+            if concepts is None:
+                return None
+            return {'success': True, 'day_number': day_number, 'concepts_generated': concepts, 'coalesced': True}
+        
+        return await day_generation_flights.run(
+            project_id,
+            day_number,
+            lambda: self._generate_and_save_day(project_id, day_number, repo_analysis, skill_level, domain, project_overview),
+            generated_elsewhere
+        )
+
+    async def _generate_and_save_day(self, project_id, day_number, repo_analysis, skill_level, domain, project_overview):
+        """
+        Generate one day's content and persist it
+        
+        In fan-out mode a short outline call is followed by parallel per-concept
+        calls; in streaming mode one response is streamed. Either way every
+        concept is saved the moment it is complete and the day is marked
+        generated only at the end. Otherwise the whole response is parsed and
+        saved at once.
+        
+        Returns:
+            dict: {'success', 'day_number', 'concepts_generated'} or {'success': False, 'error'}
+        """
+        if not (DAY_CONTENT_FANOUT or DAY_CONTENT_STREAMING):
+            day_content = await generate_day_content(
+                repo_analysis, day_number, skill_level, domain, project_overview, self.azure_openai_config
+            )
+            if not day_content['success']:
+                return {'success': False, 'error': f"Day {day_number} generation failed: {day_content['error']}"}
+            
+            print(f"🎯 Day {day_number} content generated with {len(day_content['concepts'])} concepts")
+            save_result = await save_learning_content(
+                project_id,
+                {
+                    f'day_{day_number}_concepts': day_content['concepts']
+                },
+                {}  # No repo info needed for day content
+            )
+            if not save_result['success']:
+                return {'success': False, 'error': f"Failed to save Day {day_number} content: {save_result['error']}"}
+            return {'success': True, 'day_number': day_number, 'concepts_generated': len(day_content['concepts'])}
+        
+        async def persist(concept, index):
+            save_result = await save_day_concept(project_id, day_number, concept, index)
+            if not save_result['success']:
+                raise Exception(save_result['error'])
+        
+        if DAY_CONTENT_FANOUT:
+            async def resume(skeleton):
+                # Concepts an earlier, failed run saved are kept if the outline still has them
+                saved = {} if refreshing() else await partial_day_concepts(project_id, day_number)
+                kept = [i for i, concept in enumerate(skeleton) if saved.get(concept['id']) == concept['name']]
+                await clear_partial_day_content(project_id, day_number, keep=[skeleton[i]['id'] for i in kept])
+                return kept
+            
+            day_content = await generate_day_content_parallel(
+                repo_analysis, day_number, skill_level, domain, project_overview, self.azure_openai_config,
+                persist, resume
+            )
+        else:
+            # Concepts saved by an earlier, interrupted run would otherwise be duplicated
+            await clear_partial_day_content(project_id, day_number)
+            day_content = await generate_day_content_streaming(
+                repo_analysis, day_number, skill_level, domain, project_overview, self.azure_openai_config, persist
+            )
+        if not day_content['success']:
+            return {'success': False, 'error': f"Day {day_number} generation failed: {day_content['error']}"}
+        
+        await mark_day_content_generated(project_id, day_number)
+        concepts_generated = len(day_content['concepts']) + day_content.get('resumed', 0)
+        print(f"🎯 Day {day_number} generated and saved with {concepts_generated} concepts")
+        return {'success': True, 'day_number': day_number, 'concepts_generated': concepts_generated}
+
     async def generate_next_day_background(self, project_id, day_number, repo_analysis, skill_level, domain, project_overview):
         """
         Generate content for a specific day in the background
@@ -111,33 +218,12 @@ class GitGuideAgent:
         try:
             print(f"🔄 Background: Starting Day {day_number} content generation for project {project_id}")
             
-            # Generate day-specific content
-            day_content = await generate_day_content(
-                repo_analysis,
-                day_number,
-                skill_level,
-                domain,
-                project_overview,
-                self.azure_openai_config
-            )
-            
-            if not day_content['success']:
-                print(f"❌ Background: Day {day_number} generation failed: {day_content['error']}")
-                return
-            
-            print(f"🎯 Background: Day {day_number} content generated with {len(day_content['concepts'])} concepts")
-            
-            # Save day content to database
-            save_result = await save_learning_content(
-                project_id,
-                {
-                    f'day_{day_number}_concepts': day_content['concepts']
-                },
-                {}  # No repo info needed for day content
+            result = await self.generate_and_save_day(
+                project_id, day_number, repo_analysis, skill_level, domain, project_overview
             )
             
-            if not save_result['success']:
-                print(f"❌ Background: Failed to save Day {day_number} content: {save_result['error']}")
+            if not result['success']:
+                print(f"❌ Background: {result['error']}")
                 return
             
             print(f"✅ Background: Day {day_number} content saved successfully")
@@ -166,45 +252,16 @@ class GitGuideAgent:
         try:
             print(f"⚡ On-demand: Generating Day {day_number} content for project {project_id}")
             
-            # Generate day-specific content
-            day_content = await generate_day_content(
-                repo_analysis,
-                day_number,
-                skill_level,
-                domain,
-                project_overview,
-                self.azure_openai_config
-            )
-            
-            if not day_content['success']:
-                return {
-                    'success': False,
-                    'error': f"Day {day_number} generation failed: {day_content['error']}"
-                }
-            
-            print(f"🎯 On-demand: Day {day_number} content generated with {len(day_content['concepts'])} concepts")
-            
-            # Save day content to database
-            save_result = await save_learning_content(
-                project_id,
-                {
-                    f'day_{day_number}_concepts': day_content['concepts']
-                },
-                {}  # No repo info needed for day content
-            )
+            with llm_priority('on_demand'):
+                result = await self.generate_and_save_day(
+                    project_id, day_number, repo_analysis, skill_level, domain, project_overview
+                )
             
-            if not save_result['success']:
-                return {
-                    'success': False,
-                    'error': f"Failed to save Day {day_number} content: {save_result['error']}"
-                }
+            if not result['success']:
+                return result
             
             print(f"✅ On-demand: Day {day_number} content generated and saved")
-            return {
-                'success': True,
-                'day_number': day_number,
-                'concepts_generated': len(day_content['concepts'])
-            }
+            return result
             
         except Exception as e:
             error_msg = f"On-demand Day {day_number} generation failed: {str(e)}"
@@ -216,10 +273,10 @@ class GitGuideAgent:
 
 
 # Main processing function (for backward compatibility)
-async def process_project(project_id, repo_url, skill_level, domain, user_id):
+async def process_project(project_id, repo_url, skill_level, domain, user_id, path_filter=None):
     """Process a project using GitGuide Agent"""
     agent = GitGuideAgent()
-    return await agent.process_new_project(project_id, repo_url, skill_level, domain, user_id)
+    return await agent.process_new_project(project_id, repo_url, skill_level, domain, user_id, path_filter)
 
 
 # Test function for development
@@ -0,0 +1,219 @@
+"""
+Repository analysis snapshot cache
+Keeps one analyze_repository result per (owner, repo, commit SHA) so chat,
+regeneration and background day generation share a single crawl per commit
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from agent.content_store import ContentStore
+
+# Set this to a persistent path shared with prewarm_analysis_cache.py; the temp-dir default
+# is lost on restart and differs between processes with a different TMPDIR
+ANALYSIS_CACHE_DIR = os.getenv('ANALYSIS_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'gitguide_analysis_cache'))
+# How long a resolved HEAD commit is trusted without asking GitHub again
+ANALYSIS_CACHE_TTL = float(os.getenv('ANALYSIS_CACHE_TTL', '600'))
+# How long past the TTL a snapshot may still be served while it is revalidated in the background
+ANALYSIS_CACHE_STALE_TTL = float(os.getenv('ANALYSIS_CACHE_STALE_TTL', '86400'))
+ANALYSIS_CACHE_MAX_SNAPSHOTS = int(os.getenv('ANALYSIS_CACHE_MAX_SNAPSHOTS', '200'))
+ANALYSIS_CACHE_MEMORY_SNAPSHOTS = int(os.getenv('ANALYSIS_CACHE_MEMORY_SNAPSHOTS', '16'))
+
+FRESH = 'fresh'
+STALE = 'stale'
+EXPIRED = 'expired'
+
+
+def _jsonable(value):
+    """json.dump fallback: snapshots hold their file contents in a ContentStore"""
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _slug(value):
+    return ''.join(c if c.isalnum() or c in '-_.' else '_' for c in value.lower())
+
+
+class AnalysisCache:
+    """Two-level snapshot cache: a small in-memory LRU in front of JSON files on disk"""
+
+    def __init__(self, directory, ttl, stale_ttl, max_snapshots, memory_snapshots):
+        self.directory = directory
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_snapshots = max_snapshots
+        self.memory_snapshots = memory_snapshots
+        self._memory = OrderedDict()  # (owner, repo, sha) -> snapshot
+        self._lock = threading.Lock()
+        self._revalidations = {}  # (owner, repo) -> asyncio.Task
+        self.hits = 0
+        self.misses = 0
+
+    # ---------- paths ----------
+
+    def _repo_dir(self, owner, repo):
+        return os.path.join(self.directory, f"{_slug(owner)}__{_slug(repo)}")
+
+    def _head_path(self, owner, repo):
+        return os.path.join(self._repo_dir(owner, repo), 'HEAD.json')
+
+    def _snapshot_path(self, owner, repo, sha):
+        return os.path.join(self._repo_dir(owner, repo), f"{_slug(sha)}.json")
+
+    @staticmethod
+    def _write_json(path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, default=_jsonable)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _read_json(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    # ---------- synchronous API ----------
+
+    def get_snapshot(self, owner, repo, sha):
+        """Return the stored analysis for an exact commit, or None"""
+        key = (owner.lower(), repo.lower(), sha)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+        snapshot = self._read_json(self._snapshot_path(owner, repo, sha))
+        if snapshot is not None and 'files' in snapshot:
+            # Loaded snapshots stay in the memory tier; keep their contents under the shared budget
+            snapshot['files'] = ContentStore(snapshot['files'])
+        with self._lock:
+            if snapshot is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, snapshot)
+        return snapshot
+
+    def lookup(self, owner, repo):
+        """
+        Find the snapshot for the last known HEAD of a repository
+
+        Returns:
+            tuple: (snapshot or None, FRESH | STALE | EXPIRED | None)
+        """
+        head = self._read_json(self._head_path(owner, repo))
+        if not head or not head.get('sha'):
+            return None, None
+        snapshot = self.get_snapshot(owner, repo, head['sha'])
+        if snapshot is None:
+            return None, None
+        age = time.time() - head.get('checked_at', 0)
+        if age <= self.ttl:
+            return snapshot, FRESH
+        if age <= self.ttl + self.stale_ttl:
+            return snapshot, STALE
+        return snapshot, EXPIRED
+
+    def head_sha(self, owner, repo):
+        """Return the last HEAD commit recorded for a repository, or None"""
+        head = self._read_json(self._head_path(owner, repo))
+        return head.get('sha') if head else None
+
+    def mark_checked(self, owner, repo, sha):
+        """Record that HEAD of a repository was just confirmed to be sha"""
+        self._write_json(self._head_path(owner, repo), {'sha': sha, 'checked_at': time.time()})
+
+    def store(self, owner, repo, sha, snapshot):
+        """Persist an analysis for a commit and make it the repository's HEAD"""
+        key = (owner.lower(), repo.lower(), sha)
+        self._write_json(self._snapshot_path(owner, repo, sha), snapshot)
+        self.mark_checked(owner, repo, sha)
+        with self._lock:
+            self._remember(key, snapshot)
+        self._prune_disk()
+
+    def _remember(self, key, snapshot):
+        self._memory[key] = snapshot
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_snapshots:
+            self._memory.popitem(last=False)
+
+    def _prune_disk(self):
+        """Drop the least recently written snapshots beyond the configured count"""
+        snapshots = []
+        if not os.path.isdir(self.directory):
+            return
+        for repo_dir in os.listdir(self.directory):
+            full_dir = os.path.join(self.directory, repo_dir)
+            if not os.path.isdir(full_dir):
+                continue
+            for name in os.listdir(full_dir):
+                if name.endswith('.json') and name != 'HEAD.json':
+                    path = os.path.join(full_dir, name)
+                    try:
+                        snapshots.append((os.path.getmtime(path), path))
+                    except OSError:
+                        continue
+        snapshots.sort()
+        for _, path in snapshots[:max(0, len(snapshots) - self.max_snapshots)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    # ---------- async helpers ----------
+
+    async def alookup(self, owner, repo):
+        return await asyncio.to_thread(self.lookup, owner, repo)
+
+    async def aget_snapshot(self, owner, repo, sha):
+        return await asyncio.to_thread(self.get_snapshot, owner, repo, sha)
+
+    async def astore(self, owner, repo, sha, snapshot):
+        await asyncio.to_thread(self.store, owner, repo, sha, snapshot)
+
+    async def ahead_sha(self, owner, repo):
+        return await asyncio.to_thread(self.head_sha, owner, repo)
+
+    async def amark_checked(self, owner, repo, sha):
+        await asyncio.to_thread(self.mark_checked, owner, repo, sha)
+
+    def revalidate_in_background(self, owner, repo, coroutine_factory):
+        """Start at most one background revalidation per repository"""
+        key = (owner.lower(), repo.lower())
+        running = self._revalidations.get(key)
+        if running and not running.done():
+            return
+        task = asyncio.create_task(coroutine_factory())
+        self._revalidations[key] = task
+        task.add_done_callback(lambda _: self._revalidations.pop(key, None))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'memory_snapshots': len(self._memory),
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidations_running': len(self._revalidations)
+            }
+
+
+# Process-wide cache shared by every caller of analyze_repository
+analysis_cache = AnalysisCache(
+    ANALYSIS_CACHE_DIR,
+    ANALYSIS_CACHE_TTL,
+    ANALYSIS_CACHE_STALE_TTL,
+    ANALYSIS_CACHE_MAX_SNAPSHOTS,
+    ANALYSIS_CACHE_MEMORY_SNAPSHOTS
+)
@@ -43,6 +43,8 @@ async def save_learning_content(project_id: int, learning_path: Dict[str, Any],
                 project.project_overview = learning_path.get('project_overview', '')
             if repo_info:
                 project.tech_stack = json.dumps(repo_info.get('tech_stack', []))
+                if repo_info.get('commit_sha'):
+                    project.analyzed_commit_sha = repo_info['commit_sha']
             # Mark as processed when first content saved
             project.is_processed = True
             
@@ -82,103 +84,7 @@ async def save_learning_content(project_id: int, learning_path: Dict[str, Any],
                 day_row = res.fetchone()
             
             for i, concept_data in enumerate(concepts_data):
-                print(f"📖 Concept {i+1}: {concept_data.get('name', 'Unnamed')}")
-                print(f"   ID: {concept_data.get('id', 'No ID')}")
-                print(f"   Subtopics: {len(concept_data.get('subTopics', []))}")
-                
-                concept = Concept(
-                    project_id=project_id,
-                    day_id=day_row[0] if day_row else None,
-                    concept_external_id=concept_data['id'],
-                    title=concept_data.get('name', concept_data.get('title', '')),
-                    description=concept_data.get('description', ''),
-                    order=(concept_data.get('order') if isinstance(concept_data.get('order'), int) else (int(concept_data['id'].split('-')[-1]) if '-' in concept_data['id'] else i + 1)),
-                    is_unlocked=(bool(day_row[1]) if day_row is not None else concept_data.get('isUnlocked', False))
-                )
-                session.add(concept)
-                await session.flush()
-                print(f"✅ Concept saved with ID: {concept.concept_id}")
-                
-                # Save subtopics (support 'subtopics', 'subTopics', or 'subconcepts')
-                subtopics_data = (
-                    concept_data.get('subtopics')
-                    or concept_data.get('subTopics')
-                    or concept_data.get('subconcepts', [])
-                )
-                print(f"📝 Processing {len(subtopics_data)} subtopics for concept {concept.concept_id}")
-                
-                for j, subtopic_data in enumerate(subtopics_data):
-                    try:
-                        print(f"   📄 Subtopic {j+1}: {subtopic_data.get('name', 'Unnamed')}")
-                        print(f"      ID: {subtopic_data.get('id', 'No ID')}")
-                        
-                        # Check all supported task shapes: single 'task', array 'tasks', or 'subTasks'
-                        if 'task' in subtopic_data and subtopic_data.get('task'):
-                            candidate_tasks = [subtopic_data['task']]
-                        else:
-                            candidate_tasks = subtopic_data.get('tasks', subtopic_data.get('subTasks', []))
-                        tasks_count = len(candidate_tasks)
-                        print(f"      Tasks: {tasks_count}")
-                        
-                        # Safe order calculation - fallback to enumeration index
-                        try:
-                            subtopic_order = int(subtopic_data['id'].split('-')[2])
-                        except (IndexError, ValueError):
-                            subtopic_order = j + 1
-                            print(f"      ⚠️ Using fallback order: {subtopic_order}")
-                        
-                        subtopic = Subtopic(
-                            concept_id=concept.concept_id,
-                            subtopic_external_id=subtopic_data.get('id', f"subtopic-{i}-{j}"),
-                            name=subtopic_data.get('name', ''),
-                            description=subtopic_data.get('description', ''),
-                            order=subtopic_order,
-                            is_unlocked=subtopic_data.get('isUnlocked', bool(day_row[1]) if day_row is not None else False),
-                        )
-                        session.add(subtopic)
-                        await session.flush()
-                        print(f"   ✅ Subtopic saved with ID: {subtopic.subtopic_id}")
-                        
-                        # Save tasks (normalize to list)
-                        tasks_data = candidate_tasks
-                        print(f"   📋 Processing {len(tasks_data)} tasks for subtopic {subtopic.subtopic_id}")
-                        
-                        for k, task_data in enumerate(tasks_data):
-                            try:
-                                print(f"      ⚡ Task {k+1}: {task_data.get('name', 'Unnamed')}")
-                                
-                                # Safe order calculation - fallback to enumeration index
-                                try:
-                                    task_order = int(task_data['id'].split('-')[3])
-                                except (IndexError, ValueError):
-                                    task_order = k + 1
-                                    print(f"         ⚠️ Using fallback task order: {task_order}")
-                                
-                                task = Task(
-                                    project_id=project_id,
-                                    subtopic_id=subtopic.subtopic_id,
-                                    task_external_id=task_data.get('id', f"task-{i}-{j}-{k}"),
-                                    title=task_data.get('name', task_data.get('title', '')),
-                                    description=task_data.get('description', ''),
-                                    order=task_order,
-                                    difficulty=task_data.get('difficulty', 'medium'),
-                                    files_to_study=json.dumps(task_data.get('files_to_study', [])),
-                                    is_unlocked=task_data.get('isUnlocked', bool(day_row[1]) if day_row is not None else False),
-                                )
-                                session.add(task)
-                                print(f"      ✅ Task saved: {task.title}")
-                                
-                            except Exception as task_error:
-                                print(f"      ❌ Failed to save task {k+1}: {str(task_error)}")
-                                import traceback
-                                traceback.print_exc()
-                                continue
-                                
-                    except Exception as subtopic_error:
-                        print(f"   ❌ Failed to save subtopic {j+1}: {str(subtopic_error)}")
-                        import traceback
-                        traceback.print_exc()
-                        continue
+                await _add_concept(session, project_id, concept_data, i, day_row)
             
             # If day-specific, mark day content as generated
             if target_day_number is not None:
@@ -204,6 +110,200 @@ async def save_learning_content(project_id: int, learning_path: Dict[str, Any],
                 'error': f"Failed to save learning content: {str(e)}"
             }
 
+async def _add_concept(session, project_id: int, concept_data: Dict[str, Any], i: int, day_row) -> None:
+    """Add one concept with its subtopics and tasks to the session (flushed, not committed)"""
+    print(f"📖 Concept {i+1}: {concept_data.get('name', 'Unnamed')}")
+    print(f"   ID: {concept_data.get('id', 'No ID')}")
+    print(f"   Subtopics: {len(concept_data.get('subTopics', []))}")
+    
+    concept = Concept(
+        project_id=project_id,
+        day_id=day_row[0] if day_row else None,
+        concept_external_id=concept_data['id'],
+        title=concept_data.get('name', concept_data.get('title', '')),
+        description=concept_data.get('description', ''),
+        order=(concept_data.get('order') if isinstance(concept_data.get('order'), int) else (int(concept_data['id'].split('-')[-1]) if '-' in concept_data['id'] else i + 1)),
+        is_unlocked=(bool(day_row[1]) if day_row is not None else concept_data.get('isUnlocked', False))
+    )
+    session.add(concept)
+    await session.flush()
+    print(f"✅ Concept saved with ID: {concept.concept_id}")
+    
+    # Save subtopics (support 'subtopics', 'subTopics', or 'subconcepts')
+    subtopics_data = (
+        concept_data.get('subtopics')
+        or concept_data.get('subTopics')
+        or concept_data.get('subconcepts', [])
+    )
+    print(f"📝 Processing {len(subtopics_data)} subtopics for concept {concept.concept_id}")
+    
+    for j, subtopic_data in enumerate(subtopics_data):
+        try:
+            print(f"   📄 Subtopic {j+1}: {subtopic_data.get('name', 'Unnamed')}")
+            print(f"      ID: {subtopic_data.get('id', 'No ID')}")
+    
+            # Check all supported task shapes: single 'task', array 'tasks', or 'subTasks'
+            if 'task' in subtopic_data and subtopic_data.get('task'):
+                candidate_tasks = [subtopic_data['task']]
+            else:
+                candidate_tasks = subtopic_data.get('tasks', subtopic_data.get('subTasks', []))
+            tasks_count = len(candidate_tasks)
+            print(f"      Tasks: {tasks_count}")
+    
+            # Safe order calculation - fallback to enumeration index
+            try:
+                subtopic_order = int(subtopic_data['id'].split('-')[2])
+            except (IndexError, ValueError):
+                subtopic_order = j + 1
+                print(f"      ⚠️ Using fallback order: {subtopic_order}")
+    
+            subtopic = Subtopic(
+                concept_id=concept.concept_id,
+                subtopic_external_id=subtopic_data.get('id', f"subtopic-{i}-{j}"),
+                name=subtopic_data.get('name', ''),
+                description=subtopic_data.get('description', ''),
+                order=subtopic_order,
+                is_unlocked=subtopic_data.get('isUnlocked', bool(day_row[1]) if day_row is not None else False),
+            )
+            session.add(subtopic)
+            await session.flush()
+            print(f"   ✅ Subtopic saved with ID: {subtopic.subtopic_id}")
+    
+            # Save tasks (normalize to list)
+            tasks_data = candidate_tasks
+            print(f"   📋 Processing {len(tasks_data)} tasks for subtopic {subtopic.subtopic_id}")
+    
+            for k, task_data in enumerate(tasks_data):
+                try:
+                    print(f"      ⚡ Task {k+1}: {task_data.get('name', 'Unnamed')}")
+    
+                    # Safe order calculation - fallback to enumeration index
+                    try:
+                        task_order = int(task_data['id'].split('-')[3])
+                    except (IndexError, ValueError):
+                        task_order = k + 1
+                        print(f"         ⚠️ Using fallback task order: {task_order}")
+    
+                    task = Task(
+                        project_id=project_id,
+                        subtopic_id=subtopic.subtopic_id,
+                        task_external_id=task_data.get('id', f"task-{i}-{j}-{k}"),
+                        title=task_data.get('name', task_data.get('title', '')),
+                        description=task_data.get('description', ''),
+                        order=task_order,
+                        difficulty=task_data.get('difficulty', 'medium'),
+                        files_to_study=json.dumps(task_data.get('files_to_study', [])),
+                        is_unlocked=task_data.get('isUnlocked', bool(day_row[1]) if day_row is not None else False),
+                    )
+                    session.add(task)
+                    print(f"      ✅ Task saved: {task.title}")
+    
+                except Exception as task_error:
+                    print(f"      ❌ Failed to save task {k+1}: {str(task_error)}")
+                    import traceback
+                    traceback.print_exc()
+                    continue
+    
+        except Exception as subtopic_error:
+            print(f"   ❌ Failed to save subtopic {j+1}: {str(subtopic_error)}")
+            import traceback
+            traceback.print_exc()
+            continue
+
+async def partial_day_concepts(project_id: int, day_number: int) -> Dict[str, str]:
+    """Concepts already saved for a day that is not marked generated, as {external id: title}"""
+    async with SessionLocal() as session:
+        res = await session.execute(
+            text("""
+                SELECT c.concept_external_id, c.title FROM concepts c JOIN days d ON c.day_id = d.day_id
+                WHERE d.project_id = :project_id AND d.day_number = :day_number AND NOT d.is_content_generated
+            """),
+            {"project_id": project_id, "day_number": day_number},
+        )
+        return {row[0]: row[1] for row in res.fetchall()}
+
+async def clear_partial_day_content(project_id: int, day_number: int, keep=()) -> None:
+    """Remove concepts left by an interrupted generation of a day that is not marked generated, except those in keep"""
+    async with SessionLocal() as session:
+        day_concepts = """
+            SELECT c.concept_id FROM concepts c JOIN days d ON c.day_id = d.day_id
+            WHERE d.project_id = :project_id AND d.day_number = :day_number AND NOT d.is_content_generated
+              AND NOT (c.concept_external_id = ANY(:keep))
+        """
+        params = {"project_id": project_id, "day_number": day_number, "keep": list(keep)}
+        try:
+            await session.execute(
+                text(f"DELETE FROM tasks WHERE subtopic_id IN (SELECT subtopic_id FROM subtopics WHERE concept_id IN ({day_concepts}))"),
+                params,
+            )
+            await session.execute(text(f"DELETE FROM subtopics WHERE concept_id IN ({day_concepts})"), params)
+            await session.execute(text(f"DELETE FROM concepts WHERE concept_id IN ({day_concepts})"), params)
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            print(f"⚠️ Failed to clear partial Day {day_number} content for project {project_id}: {str(e)}")
+            raise
+
+async def save_day_concept(project_id: int, day_number: int, concept_data: Dict[str, Any], index: int) -> Dict[str, Any]:
+    """Persist one concept of a day on its own, as soon as it has been generated"""
+    async with SessionLocal() as session:
+        try:
+            res = await session.execute(
+                text("SELECT day_id, is_unlocked FROM days WHERE project_id = :project_id AND day_number = :day_number"),
+                {"project_id": project_id, "day_number": day_number},
+            )
+            await _add_concept(session, project_id, concept_data, index, res.fetchone())
+            await session.commit()
+            return {"success": True}
+        except Exception as e:
+            await session.rollback()
+            print(f"❌ Failed to save Day {day_number} concept {index + 1}: {str(e)}")
+            return {'success': False, 'error': f"Failed to save concept: {str(e)}"}
+
+async def mark_day_content_generated(project_id: int, day_number: int) -> None:
+    """Flag a day's content as complete once every concept has been saved"""
+    async with SessionLocal() as session:
+        await session.execute(
+            text("UPDATE days SET is_content_generated = TRUE WHERE project_id = :project_id AND day_number = :day_number"),
+            {"project_id": project_id, "day_number": day_number},
+        )
+        await session.commit()
+
+async def count_generated_day_concepts(project_id: int, day_number: int) -> Optional[int]:
+    """Number of concepts of a day whose content is marked generated, or None if it is not generated yet"""
+    async with SessionLocal() as session:
+        res = await session.execute(
+            text("""
+                SELECT d.is_content_generated, COUNT(c.concept_id) FROM days d
+                LEFT JOIN concepts c ON c.day_id = d.day_id
+                WHERE d.project_id = :project_id AND d.day_number = :day_number
+                GROUP BY d.day_id, d.is_content_generated
+            """),
+            {"project_id": project_id, "day_number": day_number},
+        )
+        row = res.fetchone()
+        if not row or not row[0]:
+            return None
+        return row[1]
+
+async def record_analyzed_commit(project_id: int, commit_sha: Optional[str]) -> None:
+    """Remember which repository commit a project's analysis reflects, for incremental refreshes"""
+    if not commit_sha:
+        return
+    async with SessionLocal() as session:
+        try:
+            await session.execute(
+                text("""
+                    UPDATE projects SET analyzed_commit_sha = :commit_sha
+                    WHERE project_id = :project_id AND analyzed_commit_sha IS DISTINCT FROM :commit_sha
+                """),
+                {"project_id": project_id, "commit_sha": commit_sha},
+            )
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            print(f"⚠️ Failed to record analyzed commit for project {project_id}: {str(e)}")
+
 def create_task_description(concept, subtopic, task, project_overview):
     """Create a comprehensive task description"""
     description = f"""
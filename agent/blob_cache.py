@@ -0,0 +1,142 @@
+"""
+Content-addressed blob cache for repository analysis
+Stores decoded file contents on disk keyed by git blob SHA, so a file that has
+not changed is never downloaded twice - whichever project, chat message or
+background generation asks for it
+"""
+
+import asyncio
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+
+BLOB_CACHE_DIR = os.getenv('BLOB_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'gitguide_blob_cache'))
+BLOB_CACHE_MAX_BYTES = int(os.getenv('BLOB_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))  # 256MB default
+
+_SHA_PATTERN = re.compile(r'^[0-9a-f]{40}([0-9a-f]{24})?$')  # SHA-1 or SHA-256 object ids
+
+
+class BlobCache:
+    """Disk-backed blob store with a total size limit and LRU eviction"""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # sha -> size in bytes, least recently used first
+        self._total_bytes = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, sha):
+        return os.path.join(self.directory, sha[:2], sha)
+
+    def _load_index(self):
+        """Rebuild the LRU index from disk, oldest access first"""
+        if self._loaded:
+            return
+        entries = []
+        if os.path.isdir(self.directory):
+            for prefix in os.listdir(self.directory):
+                prefix_dir = os.path.join(self.directory, prefix)
+                if not os.path.isdir(prefix_dir):
+                    continue
+                for name in os.listdir(prefix_dir):
+                    if not _SHA_PATTERN.match(name):
+                        continue
+                    try:
+                        stat = os.stat(os.path.join(prefix_dir, name))
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, name, stat.st_size))
+        for _, sha, size in sorted(entries):
+            self._entries[sha] = size
+            self._total_bytes += size
+        self._loaded = True
+
+    def get(self, sha):
+        """Return cached content for a blob SHA, or None on a miss"""
+        if not sha or not _SHA_PATTERN.match(sha):
+            return None
+        with self._lock:
+            self._load_index()
+            path = self._path(sha)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+                os.utime(path)  # Record the access for LRU ordering across restarts
+            except OSError:
+                # Evicted by another worker sharing the directory
+                if sha in self._entries:
+                    self._total_bytes -= self._entries.pop(sha)
+                self.misses += 1
+                return None
+            if sha not in self._entries:
+                self._entries[sha] = os.path.getsize(path)
+                self._total_bytes += self._entries[sha]
+            self._entries.move_to_end(sha)
+            self.hits += 1
+            return content
+
+    def put(self, sha, content):
+        """Store blob content and evict least recently used blobs over the size limit"""
+        if not sha or not _SHA_PATTERN.match(sha) or content is None:
+            return
+        data = content.encode('utf-8')
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            self._load_index()
+            path = self._path(sha)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Write then rename so concurrent readers never see a partial blob
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"⚠️ Blob cache write failed for {sha}: {e}")
+                return
+            if sha in self._entries:
+                self._total_bytes -= self._entries[sha]
+            self._entries[sha] = len(data)
+            self._entries.move_to_end(sha)
+            self._total_bytes += len(data)
+            self._evict()
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and self._entries:
+            sha, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self._path(sha))
+            except OSError:
+                pass
+
+    async def aget(self, sha):
+        """Async wrapper around get() that keeps disk I/O off the event loop"""
+        return await asyncio.to_thread(self.get, sha)
+
+    async def aput(self, sha, content):
+        """Async wrapper around put() that keeps disk I/O off the event loop"""
+        await asyncio.to_thread(self.put, sha, content)
+
+    def stats(self):
+        """Return cache size and hit/miss counters"""
+        with self._lock:
+            self._load_index()
+            return {
+                'entries': len(self._entries),
+                'total_bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+# Process-wide cache shared by every analysis
+blob_cache = BlobCache(BLOB_CACHE_DIR, BLOB_CACHE_MAX_BYTES)
@@ -0,0 +1,170 @@
+"""
+Bounded-memory storage for analysed file contents
+Every analysis keeps its decoded files in a ContentStore. Entries stay in
+memory while the process-wide budget allows and spill to an anonymous temp
+file once it is spent, so concurrent analyses (and the snapshots held through
+LLM calls) share one memory ceiling instead of each holding its own copy
+"""
+
+import os
+import sys
+import threading
+import tempfile
+import weakref
+from collections.abc import Mapping, MutableMapping
+
+# Bytes of file text all live analyses may keep in memory together (as CPython holds the strings)
+ANALYSIS_MEMORY_LIMIT = int(os.getenv('ANALYSIS_MEMORY_LIMIT', str(16 * 1024 * 1024)))  # 16MB default
+# Where spilled contents go (anonymous files, removed when closed); defaults to the system temp dir
+ANALYSIS_SPILL_DIR = os.getenv('ANALYSIS_SPILL_DIR') or None
+
+
+class MemoryBudget:
+    """Thread-safe byte counter shared by every ContentStore in the process"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self.spills = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, size):
+        """Claim size bytes; False when that would exceed the limit"""
+        with self._lock:
+            if self.used + size > self.limit:
+                self.spills += 1
+                return False
+            self.used += size
+            return True
+
+    def release(self, size):
+        with self._lock:
+            self.used = max(0, self.used - size)
+
+    def stats(self):
+        with self._lock:
+            return {'limit_bytes': self.limit, 'used_bytes': self.used, 'spilled_entries': self.spills}
+
+
+memory_budget = MemoryBudget(ANALYSIS_MEMORY_LIMIT)
+
+
+def _memory_size(value):
+    """Bytes a string takes in memory; non-Latin-1 text uses 2 or 4 bytes per character"""
+    return sys.getsizeof(value)
+
+
+def _close_store(budget, state):
+    """Finalizer: hand the reservation back and drop the spill file"""
+    budget.release(state['reserved'])
+    state['reserved'] = 0
+    if state['file'] is not None:
+        state['file'].close()
+        state['file'] = None
+
+
+class ContentStore(MutableMapping):
+    """
+    Ordered key -> text mapping with a memory ceiling
+
+    Values are kept as str while the shared budget has room; the rest are
+    written UTF-8 encoded to a temp file and read back on access. Insertion
+    order is kept, so ranked contents stay best-first. The budget and the
+    spill file are released by close() or when the store is collected.
+    """
+
+    def __init__(self, items=None, budget=None):
+        self._budget = budget or memory_budget
+        self._index = {}  # key -> str, or (offset, length) in the spill file
+        self._state = {'reserved': 0, 'file': None}
+        self._lock = threading.Lock()
+        self._finalizer = weakref.finalize(self, _close_store, self._budget, self._state)
+        if items:
+            self.update(items)
+
+    def __setitem__(self, key, value):
+        if key in self._index:
+            del self[key]
+        size = _memory_size(value)
+        if self._budget.reserve(size):
+            with self._lock:
+                self._state['reserved'] += size
+                self._index[key] = value
+            return
+        data = value.encode('utf-8')
+        with self._lock:
+            if self._state['file'] is None:
+                self._state['file'] = tempfile.TemporaryFile(dir=ANALYSIS_SPILL_DIR)
+            spill = self._state['file']
+            offset = spill.seek(0, os.SEEK_END)
+            spill.write(data)
+            self._index[key] = (offset, len(data))
+
+    def __getitem__(self, key):
+        entry = self._index[key]
+        if isinstance(entry, str):
+            return entry
+        offset, length = entry
+        with self._lock:
+            spill = self._state['file']
+            spill.seek(offset)
+            data = spill.read(length)
+        return data.decode('utf-8')
+
+    def __delitem__(self, key):
+        with self._lock:
+            entry = self._index.pop(key)
+            if isinstance(entry, str):
+                size = _memory_size(entry)
+                self._state['reserved'] -= size
+                self._budget.release(size)
+
+    def __iter__(self):
+        return iter(list(self._index))
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __repr__(self):
+        return f"ContentStore({len(self._index)} entries, {self.spilled_count} spilled)"
+
+    @property
+    def spilled_count(self):
+        return sum(1 for entry in self._index.values() if not isinstance(entry, str))
+
+    def reorder(self, keys):
+        """Put the given keys first, in that order; unlisted keys follow in their current order"""
+        with self._lock:
+            ordered = {key: self._index[key] for key in keys if key in self._index}
+            for key, entry in self._index.items():
+                ordered.setdefault(key, entry)
+            self._index = ordered
+
+    def close(self):
+        self._finalizer()
+
+
+class BlobView(Mapping):
+    """Read-only blob SHA -> content view over a snapshot's files, loading nothing up front"""
+
+    def __init__(self, contents, file_structure):
+        self._contents = contents
+        self._paths = {
+            file['sha']: file['path'] for file in file_structure
+            if file.get('sha') and file['path'] in contents
+        }
+
+    def __getitem__(self, sha):
+        return self._contents[self._paths[sha]]
+
+    def __iter__(self):
+        return iter(self._paths)
+
+    def __len__(self):
+        return len(self._paths)
+
+    def __contains__(self, sha):
+        return sha in self._paths
@@ -0,0 +1,220 @@
+"""
+File selection ranking for LLM context
+Scores every candidate file from tree metadata before anything is downloaded,
+then chooses the download set as a 0/1 knapsack against a byte budget
+"""
+
+import math
+import posixpath
+import re
+
+from agent.blob_cache import blob_cache
+
+# Files that describe the project as a whole; always selected first
+MANIFEST_FILES = {
+    'README.md', 'package.json', 'requirements.txt', 'setup.py', 'pyproject.toml',
+    'Cargo.toml', 'go.mod', 'pom.xml', 'build.gradle', 'composer.json', 'Gemfile',
+    'Dockerfile', 'docker-compose.yml'
+}
+
+ENTRY_POINT_STEMS = {
+    'main', 'app', 'index', 'server', 'manage', 'cli', '__main__', 'wsgi', 'asgi',
+    'api', 'routes', 'router', 'urls', 'models', 'schema', 'lib', 'mod', 'App'
+}
+
+CODE_EXTENSIONS = {
+    '.js', '.jsx', '.ts', '.tsx', '.py', '.java', '.cpp', '.c', '.cs', '.go', '.rs',
+    '.php', '.rb', '.swift', '.kt', '.dart', '.vue'
+}
+CONFIG_EXTENSIONS = {'.json', '.yml', '.yaml', '.toml', '.ini', '.cfg', '.xml'}
+DOC_EXTENSIONS = {'.md', '.txt'}
+
+# Lock files and generated output carry almost no signal for a learner
+LOW_VALUE_FILES = {'package-lock.json', 'yarn.lock', 'pnpm-lock.yaml', 'poetry.lock', 'Pipfile.lock', 'composer.lock'}
+LOW_VALUE_MARKERS = ('.min.js', '.min.css', '.bundle.js', '.map', 'generated', 'vendor/', 'fixtures/')
+TEST_MARKERS = ('test/', 'tests/', '__tests__/', 'spec/', '.test.', '.spec.', '_test.', 'test_')
+PERIPHERAL_DIRS = ('docs/', 'doc/', 'examples/', 'example/', 'samples/', 'scripts/', 'migrations/')
+
+# Only this many of the best candidates are considered by the knapsack
+MAX_KNAPSACK_CANDIDATES = 600
+KNAPSACK_UNIT_BYTES = 1024
+
+_PY_IMPORT = re.compile(r'^\s*(?:from\s+([\w.]+)\s+import|import\s+([\w.]+))', re.MULTILINE)
+_JS_IMPORT = re.compile(r'''(?:from\s+|require\(\s*|import\(\s*)['"]([^'"]+)['"]''')
+_GO_IMPORT = re.compile(r'"([\w./-]+)"')
+
+
+def _extension(path):
+    return posixpath.splitext(path)[1].lower()
+
+
+def base_score(file):
+    """Score a file from its path and size alone"""
+    path = file['path']
+    name = posixpath.basename(path)
+    stem, ext = posixpath.splitext(name)
+    ext = ext.lower()
+    lowered = path.lower()
+    depth = path.count('/')
+
+    if name in MANIFEST_FILES:
+        score = 10.0
+    elif ext in CODE_EXTENSIONS:
+        score = 8.0 if stem in ENTRY_POINT_STEMS else 3.0
+    elif ext in CONFIG_EXTENSIONS:
+        score = 1.5
+    elif ext in DOC_EXTENSIONS:
+        score = 1.2
+    else:
+        score = 1.0
+
+    # Shallow files tend to be the ones that explain the layout
+    score /= 1 + 0.35 * depth
+
+    if name in LOW_VALUE_FILES or any(marker in lowered for marker in LOW_VALUE_MARKERS):
+        score *= 0.05
+    elif any(marker in lowered for marker in TEST_MARKERS):
+        score *= 0.4
+    elif lowered.startswith(PERIPHERAL_DIRS):
+        score *= 0.6
+
+    # Tiny files say little; the knapsack already charges large ones for their size
+    size = file.get('size', 0)
+    if size < 200:
+        score *= 0.5
+
+    return score
+
+
+def _module_keys(path):
+    """Names under which other files could import this path"""
+    stem, _ = posixpath.splitext(path)
+    keys = {stem, stem.replace('/', '.')}
+    if posixpath.basename(stem) in ('__init__', 'index', 'mod'):
+        package = posixpath.dirname(stem)
+        if package:
+            keys.update({package, package.replace('/', '.')})
+    return keys
+
+
+def compute_import_fan_in(files, contents):
+    """
+    Count how many distinct files import each path
+
+    Args:
+        files: Tree entries that are candidates for selection
+        contents: path -> source for the files whose contents are available
+
+    Returns:
+        dict: path -> number of importing files
+    """
+    # Index every candidate by the suffixes an import statement might use
+    by_suffix = {}
+    for file in files:
+        for key in _module_keys(file['path']):
+            parts = re.split(r'[./]', key)
+            for i in range(len(parts)):
+                by_suffix.setdefault('.'.join(parts[i:]), set()).add(file['path'])
+
+    fan_in = {}
+    for importer, source in contents.items():
+        ext = _extension(importer)
+        if ext == '.py':
+            modules = [a or b for a, b in _PY_IMPORT.findall(source)]
+        elif ext in ('.js', '.jsx', '.ts', '.tsx', '.vue'):
+            modules = [posixpath.normpath(posixpath.join(posixpath.dirname(importer), m)) if m.startswith('.') else m
+                       for m in _JS_IMPORT.findall(source)]
+        elif ext == '.go':
+            modules = _GO_IMPORT.findall(source)
+        else:
+            continue
+
+        targets = set()
+        for module in modules:
+            key = '.'.join(p for p in re.split(r'[./]', module.lstrip('.')) if p)
+            targets.update(by_suffix.get(key, ()))
+        targets.discard(importer)
+        for target in targets:
+            fan_in[target] = fan_in.get(target, 0) + 1
+    return fan_in
+
+
+def rank_files(files, fan_in=None):
+    """Return files sorted by descending score, with the score stored on each entry"""
+    fan_in = fan_in or {}
+    ranked = []
+    for file in files:
+        score = base_score(file) * (1 + math.log1p(fan_in.get(file['path'], 0)))
+        ranked.append({**file, 'score': round(score, 4)})
+    ranked.sort(key=lambda f: f['score'], reverse=True)
+    return ranked
+
+
+def knapsack_select(files, budget_bytes):
+    """
+    Choose the subset of files with the highest total score that fits the budget
+
+    Sizes are rounded up to KNAPSACK_UNIT_BYTES so the table stays small.
+    """
+    capacity = budget_bytes // KNAPSACK_UNIT_BYTES
+    weights = [max(1, math.ceil(f.get('size', 0) / KNAPSACK_UNIT_BYTES)) for f in files]
+    best = [0.0] * (capacity + 1)
+    taken = []
+    for weight, file in zip(weights, files):
+        row = bytearray(capacity + 1)
+        value = file['score']
+        for c in range(capacity, weight - 1, -1):
+            candidate = best[c - weight] + value
+            if candidate > best[c]:
+                best[c] = candidate
+                row[c] = 1
+        taken.append(row)
+
+    chosen = []
+    c = capacity
+    for i in range(len(files) - 1, -1, -1):
+        if taken[i][c]:
+            chosen.append(files[i])
+            c -= weights[i]
+    chosen.sort(key=lambda f: f['score'], reverse=True)
+    return chosen
+
+
+def select_files_for_context(files, budget_bytes, max_file_size):
+    """
+    Rank candidates and pick the download set for the LLM context
+
+    Import fan-in is computed from whatever the blob cache already holds, so
+    ranking never triggers a download; repositories seen before rank better.
+
+    Returns:
+        tuple: (selected files, remaining candidates), both best-first
+    """
+    candidates = [f for f in files if f.get('size', 0) < max_file_size]
+
+    # Cheap pre-ranking bounds how many cached blobs are read for fan-in
+    preliminary = rank_files(candidates)[:MAX_KNAPSACK_CANDIDATES]
+    cached_sources = {}
+    for file in preliminary:
+        if _extension(file['path']) in CODE_EXTENSIONS and file.get('sha'):
+            source = blob_cache.get(file['sha'])
+            if source is not None:
+                cached_sources[file['path']] = source
+    fan_in = compute_import_fan_in(preliminary, cached_sources) if cached_sources else {}
+    ranked = rank_files(preliminary, fan_in)
+
+    # Manifests are taken first, best-first while they fit (a monorepo can have hundreds);
+    # the knapsack fills the rest of the budget
+    manifests = []
+    remaining_budget = budget_bytes
+    for file in ranked:
+        if posixpath.basename(file['path']) in MANIFEST_FILES and file.get('size', 0) <= remaining_budget:
+            manifests.append(file)
+            remaining_budget -= file.get('size', 0)
+    manifest_paths = {f['path'] for f in manifests}
+    others = [f for f in ranked if f['path'] not in manifest_paths]
+    selected = manifests + knapsack_select(others, remaining_budget)
+
+    selected_paths = {f['path'] for f in selected}
+    remainder = [f for f in ranked if f['path'] not in selected_paths]
+    return selected, remainder
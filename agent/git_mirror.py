@@ -0,0 +1,211 @@
+"""
+Local git mirror backend for repository analysis
+Keeps a bare mirror of each repository on disk, cloned once and refreshed with
+incremental `git fetch`, so tree listings and blob reads are local disk I/O
+instead of REST calls. Local paths and file:// URLs are read in place, which
+lets the whole pipeline run against fixture repositories
+"""
+
+import asyncio
+import base64
+import hashlib
+import os
+import shutil
+import tempfile
+from urllib.parse import unquote, urlparse
+
+GIT_MIRROR_DIR = os.getenv('GIT_MIRROR_DIR', os.path.join(tempfile.gettempdir(), 'gitguide_git_mirrors'))
+# Clones and fetches of large repositories can take a while; tree and blob reads are fast
+GIT_MIRROR_TIMEOUT = float(os.getenv('GIT_MIRROR_TIMEOUT', '300'))
+# Local paths and file:// URLs read the server's own filesystem, so they are an operator opt-in
+ALLOW_LOCAL_REPO_SOURCES = os.getenv('ALLOW_LOCAL_REPO_SOURCES', 'false').lower() == 'true'
+
+
+class GitMirrorError(Exception):
+    """A git command failed or a mirror could not be prepared"""
+
+
+def is_local_source(repo_url):
+    """True for file:// URLs and paths to repositories on this machine"""
+    if repo_url.startswith('file://'):
+        return True
+    return '://' not in repo_url and not repo_url.startswith('git@') and os.path.isdir(os.path.expanduser(repo_url))
+
+
+def local_source_path(repo_url):
+    """Filesystem path of a local source"""
+    if repo_url.startswith('file://'):
+        return unquote(urlparse(repo_url).path)
+    return os.path.abspath(os.path.expanduser(repo_url))
+
+
+def local_source_name(path):
+    """Cache-safe repository name for a local path (its directory name plus a short path hash)"""
+    name = os.path.basename(path.rstrip('/')) or 'repository'
+    if name.endswith('.git'):
+        name = name[:-4]
+    return f"{name}-{hashlib.sha1(path.encode()).hexdigest()[:8]}"
+
+
+def _git_env(github_token=None):
+    """Environment for git subprocesses: never prompt, authenticate through config not argv"""
+    env = {**os.environ, 'GIT_TERMINAL_PROMPT': '0'}
+    if github_token:
+        credentials = base64.b64encode(f"x-access-token:{github_token}".encode()).decode()
+        # Passed as environment config so the token is neither stored in the mirror nor visible in ps
+        env.update({
+            'GIT_CONFIG_COUNT': '1',
+            'GIT_CONFIG_KEY_0': 'http.https://github.com/.extraheader',
+            'GIT_CONFIG_VALUE_0': f"Authorization: Basic {credentials}"
+        })
+    return env
+
+
+async def run_git(*args, git_dir=None, input_data=None, github_token=None, timeout=GIT_MIRROR_TIMEOUT):
+    """
+    Run a git command and return its stdout as bytes
+
+    Raises:
+        GitMirrorError: if git exits non-zero or the command times out
+    """
+    command = ['git'] + (['--git-dir', git_dir] if git_dir else []) + list(args)
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdin=asyncio.subprocess.PIPE if input_data is not None else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        env=_git_env(github_token)
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(input_data), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise GitMirrorError(f"git {args[0]} timed out after {timeout:.0f}s")
+    if process.returncode != 0:
+        raise GitMirrorError(f"git {args[0]} failed: {stderr.decode('utf-8', 'replace').strip()}")
+    return stdout
+
+
+class GitMirrorStore:
+    """Bare mirrors under one directory, with one clone/fetch at a time per repository"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._locks = {}
+
+    def mirror_path(self, owner, repo):
+        return os.path.join(self.directory, f"{owner.lower()}__{repo.lower()}.git")
+
+    def remote_url(self, owner, repo):
+        return f"https://github.com/{owner}/{repo}.git"
+
+    async def sync(self, owner, repo, github_token=None):
+        """
+        Clone the repository on first use, otherwise fetch only new objects
+
+        Only branches and tags are mirrored; GitHub's pull request refs would
+        multiply the download for nothing the analysis reads.
+
+        Returns:
+            str: Path of the bare mirror
+        """
+        path = self.mirror_path(owner, repo)
+        lock = self._locks.setdefault(path, asyncio.Lock())
+        async with lock:
+            if os.path.isdir(path):
+                await run_git('fetch', '--prune', '--quiet', 'origin', git_dir=path, github_token=github_token)
+                return path
+
+            os.makedirs(self.directory, exist_ok=True)
+            # Build the mirror beside its final path so a failed clone never leaves a half-populated mirror
+            staging = tempfile.mkdtemp(dir=self.directory, prefix='.clone-')
+            try:
+                await run_git('init', '--bare', '--quiet', staging)
+                await run_git('remote', 'add', 'origin', self.remote_url(owner, repo), git_dir=staging)
+                await run_git('config', 'remote.origin.fetch', '+refs/heads/*:refs/heads/*', git_dir=staging)
+                await run_git('config', '--add', 'remote.origin.fetch', '+refs/tags/*:refs/tags/*', git_dir=staging)
+                print(f"🪞 Cloning mirror of {owner}/{repo}")
+                await run_git('fetch', '--quiet', 'origin', git_dir=staging, github_token=github_token)
+                # Point HEAD at the remote default branch
+                head = await run_git('ls-remote', '--symref', 'origin', 'HEAD', git_dir=staging, github_token=github_token)
+                for line in head.decode().splitlines():
+                    if line.startswith('ref: '):
+                        await run_git('symbolic-ref', 'HEAD', line[5:].split('\t')[0], git_dir=staging)
+                        break
+                os.replace(staging, path)
+            finally:
+                shutil.rmtree(staging, ignore_errors=True)
+            return path
+
+
+# Process-wide mirror store
+mirror_store = GitMirrorStore(GIT_MIRROR_DIR)
+
+
+async def resolve_commit(git_dir, ref='HEAD'):
+    """Return the commit SHA a ref points at"""
+    output = await run_git('rev-parse', '--verify', f"{ref}^{{commit}}", git_dir=git_dir)
+    return output.decode().strip()
+
+
+async def default_branch(git_dir):
+    """Short name of the branch HEAD points at, or None when HEAD is detached"""
+    try:
+        output = await run_git('symbolic-ref', '--short', 'HEAD', git_dir=git_dir)
+        return output.decode().strip()
+    except GitMirrorError:
+        return None
+
+
+async def list_tree(git_dir, commit_sha):
+    """
+    List every blob in a commit
+
+    Returns:
+        list: [{'path', 'size', 'sha', 'url'}] shaped like get_repository_tree entries
+    """
+    output = await run_git('ls-tree', '-r', '-l', '-z', commit_sha, git_dir=git_dir)
+    files = []
+    for record in output.split(b'\0'):
+        if not record:
+            continue
+        meta, _, path = record.partition(b'\t')
+        _, object_type, sha, size = meta.split()
+        if object_type != b'blob':
+            continue  # Submodules are commits in another repository
+        files.append({
+            'path': path.decode('utf-8', 'replace'),
+            'size': int(size),
+            'sha': sha.decode(),
+            'url': None
+        })
+    return files
+
+
+async def read_blobs(git_dir, shas):
+    """
+    Read many blobs with a single `git cat-file --batch`
+
+    Returns:
+        dict: sha -> decoded text; missing and binary blobs are left out
+    """
+    if not shas:
+        return {}
+    output = await run_git('cat-file', '--batch', git_dir=git_dir, input_data=''.join(f"{sha}\n" for sha in shas).encode())
+    blobs = {}
+    position = 0
+    while position < len(output):
+        header_end = output.index(b'\n', position)
+        header = output[position:header_end].split()
+        position = header_end + 1
+        if len(header) != 3:
+            continue  # '<sha> missing'
+        sha, _, size = header
+        data = output[position:position + int(size)]
+        position += int(size) + 1  # Content is followed by a newline
+        try:
+            blobs[sha.decode()] = data.decode('utf-8')
+        except UnicodeDecodeError:
+            continue  # Skip binary files
+    return blobs
@@ -0,0 +1,318 @@
+"""
+Shared GitHub HTTP layer
+One pooled keep-alive client for every GitHub call in the process. It paces
+requests from the X-RateLimit-* headers, backs off on secondary rate limits,
+and sends conditional requests (ETag / Last-Modified) so repeated polling of
+unchanged resources gets a 304 Not Modified that GitHub does not count
+against the rate limit
+"""
+
+import asyncio
+import hashlib
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+import aiohttp
+
+GITHUB_REQUEST_TIMEOUT = float(os.getenv('GITHUB_REQUEST_TIMEOUT', '30'))
+GITHUB_ETAG_CACHE_SIZE = int(os.getenv('GITHUB_ETAG_CACHE_SIZE', '2048'))
+GITHUB_ETAG_CACHE_BYTES = int(os.getenv('GITHUB_ETAG_CACHE_BYTES', str(32 * 1024 * 1024)))  # 32MB default
+GITHUB_MAX_CONNECTIONS = int(os.getenv('GITHUB_MAX_CONNECTIONS', '32'))
+# Below this many remaining calls, requests are spread evenly until the window resets
+GITHUB_RATE_LIMIT_RESERVE = int(os.getenv('GITHUB_RATE_LIMIT_RESERVE', '200'))
+# Longest a single request will wait for rate-limit headroom before giving up
+GITHUB_RATE_LIMIT_MAX_WAIT = float(os.getenv('GITHUB_RATE_LIMIT_MAX_WAIT', '60'))
+GITHUB_MAX_RETRIES = int(os.getenv('GITHUB_MAX_RETRIES', '3'))
+
+# Network-level failures callers should report as "could not reach GitHub"
+GitHubRequestError = (aiohttp.ClientError, asyncio.TimeoutError)
+
+
+class GitHubResponse:
+    """Minimal response object with the parts of requests.Response callers use"""
+
+    def __init__(self, status_code, data, headers=None, from_cache=False):
+        self.status_code = status_code
+        self.data = data
+        self.headers = headers or {}
+        self.from_cache = from_cache
+
+    def json(self):
+        return self.data
+
+    @property
+    def text(self):
+        return self.data if isinstance(self.data, str) else ''
+
+
+class ConditionalRequestStore:
+    """LRU store of validators and bodies for successful GitHub GETs, bounded by entries and body bytes"""
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> {'etag', 'last_modified', 'data', 'size'}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.revalidated = 0  # 304 responses served from the store
+        self.refreshed = 0  # 200 responses stored
+
+    @staticmethod
+    def make_key(url, params, accept, github_token):
+        # Responses can differ per token (private repositories), so the token is part of the key
+        query = tuple(sorted((params or {}).items()))
+        return (_token_id(github_token), url, query, accept)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, etag, last_modified, data, size):
+        """Store a body; size is its length on the wire, used as the estimate of what it holds in memory"""
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous['size']
+            if size > self.max_bytes:
+                return
+            self._entries[key] = {'etag': etag, 'last_modified': last_modified, 'data': data, 'size': size}
+            self._bytes += size
+            self.refreshed += 1
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted['size']
+
+    def record_revalidation(self):
+        with self._lock:
+            self.revalidated += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'not_modified_hits': self.revalidated,
+                'stored_responses': self.refreshed
+            }
+
+
+conditional_store = ConditionalRequestStore(GITHUB_ETAG_CACHE_SIZE, GITHUB_ETAG_CACHE_BYTES)
+
+
+def _token_id(github_token):
+    return hashlib.sha256(github_token.encode()).hexdigest()[:16] if github_token else ''
+
+
+class RateLimitBucket:
+    """
+    Token bucket for one GitHub token, refilled from the rate-limit headers
+
+    GitHub reports how many calls remain and when the window resets. Calls are
+    spent freely while more than the reserve remains; below it, the rest of the
+    budget is spread evenly over the time left so a burst cannot run it dry.
+    """
+
+    def __init__(self, reserve):
+        self.reserve = reserve
+        self.remaining = None  # Unknown until the first response
+        self.reset_at = 0.0
+        self._next_slot = 0.0
+        self._lock = None
+        self._loop = None
+
+    def lock(self):
+        """The bucket's lock for the running loop (an asyncio.Lock can't be shared between loops)"""
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        return self._lock
+
+    def update(self, headers):
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset = headers.get('X-RateLimit-Reset')
+        if remaining is None or reset is None:
+            return
+        try:
+            self.remaining = int(remaining)
+            self.reset_at = float(reset)
+        except ValueError:
+            pass
+
+    async def acquire(self):
+        """Wait for permission to send one request (bounded by GITHUB_RATE_LIMIT_MAX_WAIT)"""
+        waited = 0.0
+        while True:
+            async with self.lock():
+                now = time.time()
+                if self.remaining is None or now >= self.reset_at:
+                    return
+                if self.remaining > self.reserve:
+                    self.remaining -= 1
+                    return
+                if self.remaining > 0:
+                    interval = (self.reset_at - now) / self.remaining
+                    if now >= self._next_slot:
+                        self._next_slot = now + interval
+                        self.remaining -= 1
+                        return
+                    delay = self._next_slot - now
+                else:
+                    delay = self.reset_at - now
+            if waited + delay > GITHUB_RATE_LIMIT_MAX_WAIT:
+                # Let the request through; GitHub will answer 403 and the caller reports it
+                return
+            await asyncio.sleep(delay)
+            waited += delay
+
+
+class GitHubClient:
+    """Process-wide keep-alive session plus per-token rate-limit buckets"""
+
+    def __init__(self):
+        self._session = None
+        self._loop = None
+        self._buckets = {}
+
+    def session(self):
+        """Return the shared session, creating it on first use in the running loop"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=GITHUB_MAX_CONNECTIONS, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=GITHUB_REQUEST_TIMEOUT)
+            )
+            self._loop = loop
+        return self._session
+
+    def bucket(self, github_token):
+        token_id = _token_id(github_token)
+        if token_id not in self._buckets:
+            self._buckets[token_id] = RateLimitBucket(GITHUB_RATE_LIMIT_RESERVE)
+        return self._buckets[token_id]
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    @asynccontextmanager
+    async def get(self, url, github_token=None, session=None, **request_options):
+        """
+        Send a rate-limited GET, retrying after rate-limit responses
+
+        Yields the aiohttp response; it is released when the block exits.
+        """
+        session = session or self.session()
+        bucket = self.bucket(github_token)
+        for attempt in range(GITHUB_MAX_RETRIES + 1):
+            await bucket.acquire()
+            response = await session.get(url, **request_options)
+            bucket.update(response.headers)
+            delay = await _rate_limit_delay(response, attempt)
+            if delay is None or attempt == GITHUB_MAX_RETRIES or delay > GITHUB_RATE_LIMIT_MAX_WAIT:
+                break
+            response.release()
+            print(f"⏳ GitHub rate limited ({response.status}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+        try:
+            yield response
+        finally:
+            response.release()
+
+
+async def _rate_limit_delay(response, attempt):
+    """Seconds to wait before retrying a rate-limited response, or None if it is not one"""
+    if response.status not in (403, 429):
+        return None
+    retry_after = response.headers.get('Retry-After')
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    if response.headers.get('X-RateLimit-Remaining') == '0':
+        # Primary limit exhausted: wait for the window to reset
+        reset = response.headers.get('X-RateLimit-Reset')
+        return max(0.0, float(reset) - time.time()) + 1 if reset else None
+    if response.status == 403:
+        body = await response.text()
+        if 'secondary rate limit' not in body.lower():
+            return None  # A real permission error
+    # Secondary limit without a hint: exponential backoff with jitter
+    return min(GITHUB_RATE_LIMIT_MAX_WAIT, 2 ** attempt * 5) + random.uniform(0, 1)
+
+
+github_client = GitHubClient()
+
+
+async def close_github_client():
+    """Close the shared GitHub session (called on application shutdown)"""
+    await github_client.close()
+
+
+def github_headers(github_token=None, accept='application/vnd.github+json'):
+    """Build request headers, authenticating only when a token is configured"""
+    headers = {'Accept': accept}
+    if github_token:
+        headers['Authorization'] = f'token {github_token}'
+    return headers
+
+
+async def github_get(url, github_token=None, params=None, accept='application/vnd.github+json',
+                     response_type='json', session=None, conditional=True, timeout=None):
+    """
+    GET a GitHub API URL, revalidating any stored copy with a conditional request
+
+    Args:
+        url: Absolute API URL
+        github_token: Token for the Authorization header (omitted when empty)
+        params: Query string parameters
+        accept: Accept header / media type
+        response_type: 'json' or 'text'
+        session: Optional aiohttp session (defaults to the shared pooled session)
+        conditional: Set False for immutable or large bodies not worth keeping
+        timeout: Total seconds for this request (defaults to the session timeout)
+
+    Returns:
+        GitHubResponse: 304 answers are returned as the stored 200 with from_cache=True
+    """
+    headers = github_headers(github_token, accept)
+    key = conditional_store.make_key(url, params, accept, github_token) if conditional else None
+    cached = conditional_store.get(key) if conditional else None
+    if cached:
+        if cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        if cached['last_modified']:
+            headers['If-Modified-Since'] = cached['last_modified']
+
+    request_options = {'params': params, 'headers': headers}
+    if timeout:
+        request_options['timeout'] = aiohttp.ClientTimeout(total=timeout)
+    async with github_client.get(url, github_token, session=session, **request_options) as response:
+        if response.status == 304 and cached:
+            conditional_store.record_revalidation()
+            return GitHubResponse(200, cached['data'], dict(response.headers), from_cache=True)
+
+        if response.status != 200:
+            return GitHubResponse(response.status, None, dict(response.headers))
+
+        body = await response.read()
+        if response_type == 'text':
+            data = await response.text()
+        else:
+            data = await response.json(content_type=None)
+
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if conditional and (etag or last_modified):
+            conditional_store.put(key, etag, last_modified, data, len(body))
+
+        return GitHubResponse(200, data, dict(response.headers))
@@ -0,0 +1,186 @@
+"""
+Incremental JSON parsing for streamed LLM responses
+Tracks the structure of a JSON document as it arrives chunk by chunk and
+hands back each element of one top-level array (e.g. "concepts") the moment
+its object closes, so callers can validate and persist it without waiting for
+the rest of the response
+"""
+
+import json
+
+
+class IncrementalJSONParser:
+    """
+    Streaming scanner for responses shaped {"...": ..., "<array_key>": [{...}, {...}]}
+
+    Anything before the first '{' (a markdown fence, a stray sentence) is
+    ignored. Only string state and bracket depth are tracked while scanning;
+    each finished element is decoded with json.loads.
+    """
+
+    def __init__(self, array_key='concepts'):
+        self.array_key = array_key
+        self.completed = []  # Decoded elements, in order
+        self.errors = []  # Element texts that were not valid JSON
+        self._chunks = []
+        self._started = False
+        self._finished = False
+        self._depth = 0
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._root_string = []  # Characters of the string being read at the root level
+        self._last_root_string = None
+        self._container_key = None  # Key of the root-level value being read
+        self._capture = None  # Chunks of the element being read, or None
+
+    @property
+    def text(self):
+        """Everything fed so far"""
+        return ''.join(self._chunks)
+
+    @property
+    def started(self):
+        """True once the root object has opened"""
+        return self._started
+
+    @property
+    def finished(self):
+        """True once the root object has closed"""
+        return self._finished
+
+    def feed(self, chunk):
+        """
+        Scan the next piece of the response
+
+        Returns:
+            list: Elements of the array that closed within this chunk
+        """
+        self._chunks.append(chunk)
+        closed = []
+        capture_from = 0 if self._capture is not None else None
+
+        for i, ch in enumerate(chunk):
+            if self._finished:
+                break
+            if not self._started:
+                if ch == '{':
+                    self._started = True
+                    self._depth = 1
+                    self._stack.append('{')
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_root_string = ''.join(self._root_string)
+                        continue
+                if self._depth == 1:
+                    self._root_string.append(ch)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    self._root_string = []
+            elif ch in '{[':
+                self._depth += 1
+                self._stack.append(ch)
+                if self._depth == 2:
+                    self._container_key = self._last_root_string
+                elif (self._depth == 3 and ch == '{' and self._stack[1] == '['
+                      and self._container_key == self.array_key):
+                    self._capture = []
+                    capture_from = i
+            elif ch in '}]':
+                if self._depth == 3 and self._capture is not None:
+                    element_text = ''.join(self._capture) + chunk[capture_from:i + 1]
+                    self._capture = None
+                    capture_from = None
+                    element = self._decode(element_text)
+                    if element is not None:
+                        closed.append(element)
+                self._depth -= 1
+                self._stack.pop()
+                if self._depth == 0:
+                    self._finished = True
+
+        if self._capture is not None and capture_from is not None:
+            self._capture.append(chunk[capture_from:])
+
+        self.completed.extend(closed)
+        return closed
+
+    def _decode(self, element_text):
+        try:
+            return json.loads(element_text)
+        except json.JSONDecodeError:
+            self.errors.append(element_text)
+            return None
+
+
+def salvage_truncated_json(text):
+    """
+    Recover the complete part of a JSON document that was cut off (e.g. at max_tokens)
+
+    The text is cut right after the last object or array that closed as an
+    element of an array, and the containers still open at that point are
+    closed. Everything complete up to the cut-off survives; the element that
+    was being written is dropped.
+
+    Returns:
+        dict: {'data': decoded object, 'truncated': bool, 'open_containers': int}
+            where open_containers counts the containers that had to be closed
+            (for {"concepts": [{... "subconcepts": [...]}]} more than 2 means
+            the last concept itself is incomplete), or None if nothing complete
+            was found
+    """
+    start = text.find('{')
+    if start == -1:
+        return None
+    try:
+        return {'data': json.loads(text[start:]), 'truncated': False, 'open_containers': 0}
+    except json.JSONDecodeError:
+        pass
+
+    stack = []
+    in_string = False
+    escape = False
+    cut = None  # (end index, containers still open after it)
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in '{[':
+            stack.append(ch)
+        elif ch in '}]':
+            if not stack:
+                break
+            stack.pop()
+            if stack and stack[-1] == '[':
+                cut = (i + 1, list(stack))
+            elif not stack:
+                break
+
+    if cut is None:
+        return None
+    end, open_stack = cut
+    closers = ''.join(']' if opener == '[' else '}' for opener in reversed(open_stack))
+    try:
+        data = json.loads(text[start:end] + closers)
+    except json.JSONDecodeError:
+        return None
+    return {'data': data, 'truncated': True, 'open_containers': len(open_stack)}
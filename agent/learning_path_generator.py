@@ -1,11 +1,47 @@
+import asyncio
 import json
 import sys
 import os
-from openai import AzureOpenAI
+
+from agent.llm_client import create_chat_completion, forget_chat_completion, stream_chat_completion
+from agent.incremental_json import IncrementalJSONParser, salvage_truncated_json
 
 # Add prompts directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from prompts import create_analysis_prompt, prepare_repository_context, create_day_content_generation_prompt
+from prompts import (
+    create_analysis_prompt, prepare_repository_context, create_day_content_generation_prompt,
+    create_day_skeleton_prompt, create_concept_details_prompt, create_day_continuation_prompt
+)
+from prompts.token_budget import completion_budget, count_message_tokens
+from agent.learning_schema import (
+    JSON_RESPONSE_OPTIONS, concept_details_schema, day_continuation_schema, day_outline_schema,
+    learning_content_schema, parse_structured, validate_concepts, validate_structured
+)
+
+# Parallel detail calls per day, and attempts per concept before it is dropped
+DAY_CONCEPT_CONCURRENCY = int(os.getenv('DAY_CONCEPT_CONCURRENCY', '4'))
+DAY_CONCEPT_ATTEMPTS = int(os.getenv('DAY_CONCEPT_ATTEMPTS', '2'))
+# Follow-up calls that continue a day response cut off at max_tokens
+DAY_CONTINUATION_ATTEMPTS = int(os.getenv('DAY_CONTINUATION_ATTEMPTS', '2'))
+
+# Completion sizes the response formats need: up to 8 concepts of ~150 tokens, each
+# with up to 6 subconcepts whose detailed task runs ~350 tokens
+OUTLINE_RESPONSE_TOKENS = 8 * 150 + 400
+CONCEPT_RESPONSE_TOKENS = 6 * 350 + 600
+DAY_RESPONSE_TOKENS = 8 * (150 + 6 * 350)
+
+def json_messages(prompt):
+    """Chat messages for a prompt whose answer must be a single JSON object"""
+    return [
+        {
+            "role": "system", 
+            "content": "You are a technical learning expert. You MUST respond with ONLY valid JSON. No explanations, no markdown, no additional text. Your response must start with { and end with }."
+        },
+        {
+            "role": "user",
+            "content": prompt
+        }
+    ]
 
 async def generate_learning_path(repo_analysis, skill_level, domain, azure_openai_config):
     """
@@ -21,15 +57,6 @@ async def generate_learning_path(repo_analysis, skill_level, domain, azure_opena
         dict: Structured learning path with project overview and Day 1 concepts
     """
     try:
-        print(f"🔑 Initializing Azure OpenAI client...")
-        client = AzureOpenAI(
-            api_key=azure_openai_config['api_key'],
-            api_version=azure_openai_config['api_version'],
-            azure_endpoint=azure_openai_config['endpoint'],
-            timeout=azure_openai_config.get('timeout', 120.0),  # Configurable timeout
-            max_retries=3   # Increased to 3 retries
-        )
-        
         # Prepare repository context for LLM
         repo_context = prepare_repository_context(repo_analysis)
         context_size = sum(len(str(v)) for v in repo_context.values() if isinstance(v, (str, list, dict)))
@@ -37,45 +64,28 @@ async def generate_learning_path(repo_analysis, skill_level, domain, azure_opena
         
         # Generate project overview and Day 1 learning structure
         prompt = create_analysis_prompt(repo_context, skill_level, domain)
-        print(f"📄 Prompt created: {len(prompt)} chars")
+        print(f"📄 Prompt created: {len(prompt)} chars, ~{count_message_tokens(json_messages(prompt))} tokens")
         
         print("🤖 Calling Azure OpenAI for Day 1 content...")
+        options = {'max_tokens': completion_budget(json_messages(prompt), 12000), **JSON_RESPONSE_OPTIONS}
         try:
-            response = client.chat.completions.create(
-                model=azure_openai_config['deployment_name'],
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "You are a technical learning expert. You MUST respond with ONLY valid JSON. No explanations, no markdown, no additional text. Your response must start with { and end with }."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                max_tokens=12000,  # Increased for more content
-                stream=False
+            response = await create_chat_completion(
+                json_messages(prompt),
+                azure_openai_config,
+                stream=False,
+                **options
             )
         except Exception as api_error:
             print(f"❌ Azure OpenAI API call failed: {type(api_error).__name__}: {str(api_error)}")
             # Try with reduced max_tokens as fallback
             if "timeout" in str(api_error).lower():
                 print("🔄 Retrying with reduced complexity...")
-                response = client.chat.completions.create(
-                    model=azure_openai_config['deployment_name'],
-                    messages=[
-                        {
-                            "role": "system", 
-                            "content": "You are a technical learning expert. You MUST respond with ONLY valid JSON. No explanations, no markdown, no additional text. Your response must start with { and end with }."
-                        },
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    temperature=0.7,
-                    max_tokens=8000,  # Reduced tokens for faster response
-                    stream=False
+                options = {'temperature': 0.7, 'max_tokens': completion_budget(json_messages(prompt), 8000), **JSON_RESPONSE_OPTIONS}
+                response = await create_chat_completion(
+                    json_messages(prompt),
+                    azure_openai_config,
+                    stream=False,
+                    **options
                 )
             else:
                 raise api_error
@@ -87,6 +97,8 @@ async def generate_learning_path(repo_analysis, skill_level, domain, azure_opena
         
         if not learning_structure['success']:
             print(f"❌ Learning structure parsing failed: {learning_structure.get('error', 'Unknown error')}")
+            # Don't let the response cache replay an answer that can't be used
+            await forget_chat_completion(json_messages(prompt), azure_openai_config, **options)
             return learning_structure
         
         # Apply unlocking logic for Day 1
@@ -121,15 +133,6 @@ async def generate_day_content(repo_analysis, day_number, skill_level, domain, p
         dict: Day content with 10 concepts, each with 10 subconcepts and tasks
     """
     try:
-        print(f"🔑 Initializing Azure OpenAI client for Day {day_number}...")
-        client = AzureOpenAI(
-            api_key=azure_openai_config['api_key'],
-            api_version=azure_openai_config['api_version'],
-            azure_endpoint=azure_openai_config['endpoint'],
-            timeout=azure_openai_config.get('timeout', 120.0),  # Configurable timeout
-            max_retries=3   # Increased to 3 retries
-        )
-        
         # Prepare repository context
         repo_context = prepare_repository_context(repo_analysis)
         print(f"📝 Repository context prepared for Day {day_number}")
@@ -139,20 +142,16 @@ async def generate_day_content(repo_analysis, day_number, skill_level, domain, p
         print(f"📄 Day {day_number} prompt created: {len(prompt)} chars")
         
         print(f"🤖 Calling Azure OpenAI for Day {day_number} content...")
-        response = client.chat.completions.create(
-            model=azure_openai_config['deployment_name'],
-            messages=[
-                {
-                    "role": "system", 
-                    "content": "You are a technical learning expert. You MUST respond with ONLY valid JSON. No explanations, no markdown, no additional text. Your response must start with { and end with }."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.7,
-            max_tokens=8000  # Large token count for extensive content
+        # 6-8 concepts with several detailed tasks each need a large completion
+        options = {
+            'temperature': 0.7,
+            'max_tokens': completion_budget(json_messages(prompt), DAY_RESPONSE_TOKENS),
+            **JSON_RESPONSE_OPTIONS
+        }
+        response = await create_chat_completion(
+            json_messages(prompt),
+            azure_openai_config,
+            **options
         )
         print(f"✅ Day {day_number} LLM response received")
         
@@ -162,7 +161,12 @@ async def generate_day_content(repo_analysis, day_number, skill_level, domain, p
         
         if not day_structure['success']:
             print(f"❌ Day {day_number} structure parsing failed: {day_structure.get('error', 'Unknown error')}")
-            return day_structure
+            await forget_chat_completion(json_messages(prompt), azure_openai_config, **options)
+            # A response cut off at max_tokens still holds complete concepts; keep them and ask only for the rest
+            concepts = await recover_day_response(prompt, response.choices[0].message.content, day_number, azure_openai_config)
+            if not concepts:
+                return day_structure
+            day_structure = {'success': True, 'data': {'concepts': concepts}}
         
         # Apply unlocking logic (all locked initially)
         apply_day_unlocking_logic(day_structure['data']['concepts'], day_number=day_number, all_locked=True)
@@ -180,157 +184,333 @@ async def generate_day_content(repo_analysis, day_number, skill_level, domain, p
             'error': f"Day {day_number} content generation failed: {str(e)}"
         }
 
-def parse_llm_response(response_text):
-    """Parse the LLM response and extract structured learning path"""
+async def generate_day_content_streaming(repo_analysis, day_number, skill_level, domain, project_overview,
+                                         azure_openai_config, on_concept):
+    """
+    Generate a day's content from a streamed response, handing over each concept as soon as it is complete
+    
+    Args:
+        on_concept: Async callback(concept, index) run for every validated
+            concept while the rest of the response is still streaming
+    
+    Returns:
+        dict: Same shape as generate_day_content
+    """
     try:
-        # Log the raw response for debugging
-        print(f"\n📤 Raw LLM Response ({len(response_text)} chars):")
-        print(f"First 500 chars: {response_text[:500]}")
-        print(f"Last 500 chars: {response_text[-500:]}")
-        
-        # Try to extract JSON from the response
-        response_text = response_text.strip()
-        
-        # Try different methods to find JSON
-        json_text = None
-        
-        # Method 1: Look for JSON in markdown code blocks
-        if '```json' in response_text.lower():
-            start_marker = '```json'
-            end_marker = '```'
-            start_idx = response_text.lower().find(start_marker)
-            if start_idx != -1:
-                start_idx += len(start_marker)
-                end_idx = response_text.find(end_marker, start_idx)
-                if end_idx != -1:
-                    json_text = response_text[start_idx:end_idx].strip()
-                    print(f"📋 Found JSON in markdown block")
-        
-        # Method 2: Look for JSON in regular code blocks
-        if not json_text and '```' in response_text:
-            lines = response_text.split('\n')
-            in_code_block = False
-            json_lines = []
-            
-            for line in lines:
-                if line.strip().startswith('```'):
-                    if in_code_block:
-                        break
-                    in_code_block = True
-                    continue
-                if in_code_block:
-                    json_lines.append(line)
-            
-            if json_lines:
-                potential_json = '\n'.join(json_lines).strip()
-                if potential_json.startswith('{') and potential_json.endswith('}'):
-                    json_text = potential_json
-                    print(f"📋 Found JSON in code block")
-        
-        # Method 3: Find JSON by braces (original method)
-        if not json_text:
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-            
-            if json_start != -1 and json_end > json_start:
-                json_text = response_text[json_start:json_end]
-                print(f"📋 Found JSON by braces")
+        repo_context = prepare_repository_context(repo_analysis)
+        prompt = create_day_content_generation_prompt(repo_context, day_number, skill_level, domain, project_overview)
+        print(f"📄 Day {day_number} prompt created: {len(prompt)} chars (streaming)")
+        
+        parser = IncrementalJSONParser('concepts')
+        concepts = []
+        
+        async def accept(concept):
+            if not validate_learning_structure({'concepts': [concept]}):
+                print(f"⚠️ Day {day_number}: skipping malformed concept {concept.get('id', '?')}")
+                return
+            apply_day_unlocking_logic([concept], day_number=day_number, all_locked=True)
+            await on_concept(concept, len(concepts))
+            concepts.append(concept)
+            print(f"📥 Day {day_number}: concept {len(concepts)} ready ({concept.get('name', 'Unnamed')})")
+        
+        print(f"🤖 Streaming Azure OpenAI response for Day {day_number}...")
+        options = {
+            'temperature': 0.7,
+            'max_tokens': completion_budget(json_messages(prompt), DAY_RESPONSE_TOKENS),
+            **JSON_RESPONSE_OPTIONS
+        }
+        async for delta in stream_chat_completion(
+            json_messages(prompt),
+            azure_openai_config,
+            **options
+        ):
+            for concept in parser.feed(delta):
+                await accept(concept)
+        print(f"✅ Day {day_number} stream finished: {len(concepts)} concepts")
+        
+        if parser.started and not parser.finished:
+            # Cut off at max_tokens: the concepts already saved stay, the rest comes from a continuation call
+            await forget_chat_completion(json_messages(prompt), azure_openai_config, **options)
+            saved_ids = {concept['id'] for concept in concepts}
+            for concept in await recover_day_response(prompt, parser.text, day_number, azure_openai_config):
+                if concept['id'] not in saved_ids:
+                    await accept(concept)
+        
+        if not concepts:
+            # Shapes the scanner doesn't follow (e.g. concepts nested elsewhere) still parse as a whole
+            day_structure = parse_day_response(parser.text)
+            if not day_structure['success']:
+                await forget_chat_completion(json_messages(prompt), azure_openai_config, **options)
+                return day_structure
+            for concept in day_structure['data']['concepts']:
+                await accept(concept)
+        
+        if not concepts:
+            return {'success': False, 'error': f"Day {day_number} response contained no valid concepts"}
         
-        # Method 4: Try to clean and extract if response looks like JSON
-        if not json_text and response_text.strip().startswith('{'):
-            json_text = response_text.strip()
-            print(f"📋 Using entire response as JSON")
+        return {
+            'success': True,
+            'day_number': day_number,
+            'concepts': concepts
+        }
         
-        if not json_text:
-            print(f"❌ No JSON found using any method")
-            return {
-                'success': False,
-                'error': 'No JSON found in LLM response'
+    except Exception as e:
+        print(f"❌ Day {day_number} streaming generation error: {type(e).__name__}: {str(e)}")
+        return {
+            'success': False,
+            'error': f"Day {day_number} content generation failed: {str(e)}"
+        }
+
+def _salvage_day_text(response_text):
+    """
+    Split a (possibly cut-off) day or continuation response into usable parts
+    
+    Returns:
+        tuple: (complete concepts, interrupted concept with its complete
+            subconcepts or None, continued subconcepts, whether the text was cut off)
+    """
+    salvaged = salvage_truncated_json(response_text or '')
+    if not salvaged or not isinstance(salvaged['data'], dict):
+        return [], None, [], False
+    data = salvaged['data']
+    raw_concepts = data.get('concepts') if isinstance(data.get('concepts'), list) else []
+    
+    partial = None
+    # More than the root object and the concepts list open means the last concept was being written
+    if salvaged['truncated'] and salvaged['open_containers'] > 2 and raw_concepts:
+        candidate = raw_concepts.pop()
+        if isinstance(candidate, dict) and candidate.get('subconcepts') and validate_learning_structure({'concepts': [candidate]}):
+            partial = candidate
+    complete = [c for c in raw_concepts if isinstance(c, dict) and validate_learning_structure({'concepts': [c]})]
+    
+    continued = []
+    continued_concept = data.get('continued_concept')
+    if isinstance(continued_concept, dict) and continued_concept.get('subconcepts'):
+        holder = {'id': 'continued', 'name': 'continued', 'subconcepts': continued_concept['subconcepts']}
+        if validate_learning_structure({'concepts': [holder]}):
+            continued = holder['subconcepts']
+    
+    return complete, partial, continued, salvaged['truncated']
+
+async def recover_day_response(prompt, response_text, day_number, azure_openai_config):
+    """
+    Keep the complete part of a day response that failed to parse, continuing it if it was cut off
+    
+    Every complete concept survives, as do the complete subconcepts of the
+    concept that was being written when max_tokens hit. Short continuation
+    calls (at most DAY_CONTINUATION_ATTEMPTS) then ask for that concept's
+    remaining subconcepts and the remaining concepts, instead of regenerating
+    the whole day.
+    
+    Returns:
+        list: Validated concepts in order (empty if nothing could be recovered)
+    """
+    concepts, partial, _, truncated = _salvage_day_text(response_text)
+    if not concepts and partial is None:
+        return []
+    print(f"🩹 Day {day_number}: kept {len(concepts)} complete concepts"
+          + (f" and {len(partial['subconcepts'])} subconcepts of {partial['id']}" if partial else "")
+          + (" from the cut-off response" if truncated else " that passed validation"))
+    
+    attempt = 0
+    while truncated and attempt < DAY_CONTINUATION_ATTEMPTS:
+        attempt += 1
+        messages = json_messages(prompt) + [{
+            "role": "user",
+            "content": create_day_continuation_prompt(day_number, concepts + ([partial] if partial else []), partial)
+        }]
+        try:
+            options = {
+                'temperature': 0.7,
+                'max_tokens': completion_budget(messages, DAY_RESPONSE_TOKENS),
+                **JSON_RESPONSE_OPTIONS
             }
+            print(f"🤖 Day {day_number}: continuation call {attempt}/{DAY_CONTINUATION_ATTEMPTS}...")
+            response = await create_chat_completion(messages, azure_openai_config, **options)
+        except Exception as e:
+            print(f"⚠️ Day {day_number}: continuation call failed: {type(e).__name__}: {str(e)}")
+            break
+        
+        new_concepts, next_partial, continued, truncated = _salvage_day_text(response.choices[0].message.content)
+        if truncated or response.choices[0].finish_reason == 'length':
+            await forget_chat_completion(messages, azure_openai_config, **options)
+        if partial is not None:
+            partial['subconcepts'].extend(continued)
+            concepts.append(partial)
+        concepts.extend(new_concepts)
+        partial = next_partial
+        print(f"📥 Day {day_number}: continuation added {len(continued)} subconcepts and {len(new_concepts)} concepts")
+    
+    if partial is not None:
+        concepts.append(partial)
+    return concepts
+
+async def generate_day_content_parallel(repo_analysis, day_number, skill_level, domain, project_overview,
+                                        azure_openai_config, on_concept=None, on_outline=None):
+    """
+    Generate a day in two phases: a short outline call, then one call per concept run in parallel
+    
+    The outline (concept ids, names, descriptions) comes back in seconds; the
+    subconcepts and tasks of each concept are then generated concurrently, at
+    most DAY_CONCEPT_CONCURRENCY at a time. A concept whose details can't be
+    parsed is retried on its own; after DAY_CONCEPT_ATTEMPTS the day fails
+    without the missing concepts, so a later run only has to generate those.
+    The first error raised by on_concept cancels the calls still running.
+    
+    Args:
+        on_concept: Optional async callback(concept, index) run for every
+            validated concept as soon as its details are ready
+        on_outline: Optional async callback(skeleton) returning the indexes of
+            concepts an earlier run already saved, which are not generated again
+    
+    Returns:
+        dict: Same shape as generate_day_content, with the newly generated
+            concepts in outline order and 'resumed', the number skipped
+    """
+    try:
+        repo_context = prepare_repository_context(repo_analysis)
+        prompt = create_day_skeleton_prompt(repo_context, day_number, skill_level, domain, project_overview)
+        print(f"📄 Day {day_number} outline prompt created: {len(prompt)} chars")
+        
+        print(f"🤖 Calling Azure OpenAI for the Day {day_number} outline...")
+        options = {
+            'temperature': 0.7,
+            'max_tokens': completion_budget(json_messages(prompt), OUTLINE_RESPONSE_TOKENS),
+            **JSON_RESPONSE_OPTIONS
+        }
+        response = await create_chat_completion(json_messages(prompt), azure_openai_config, **options)
+        outline = parse_llm_response(response.choices[0].message.content, schema=day_outline_schema)
+        if not outline['success']:
+            await forget_chat_completion(json_messages(prompt), azure_openai_config, **options)
+            return outline
+        
+        skeleton = outline['data']['concepts']
+        for i, concept in enumerate(skeleton):
+            concept['id'] = f"day{day_number}-concept-{i}"
+        print(f"🧩 Day {day_number} outline: {len(skeleton)} concepts; generating details "
+              f"({DAY_CONCEPT_CONCURRENCY} at a time)")
+        
+        done = set(await on_outline(skeleton)) if on_outline is not None else set()
+        if done:
+            print(f"♻️ Day {day_number}: {len(done)} concepts already saved by an earlier run")
+        
+        semaphore = asyncio.Semaphore(DAY_CONCEPT_CONCURRENCY)
+        
+        async def detail(index, concept):
+            async with semaphore:
+                full_concept = await generate_concept_details(
+                    repo_context, day_number, concept, index, skeleton,
+                    skill_level, domain, project_overview, azure_openai_config
+                )
+            if full_concept is not None and on_concept is not None:
+                await on_concept(full_concept, index)
+            return full_concept
         
-        print(f"📋 Extracted JSON ({len(json_text)} chars): {json_text[:200]}...")
-        
-        # Parse JSON
-        parsed_data = json.loads(json_text)
-        print(f"✅ JSON parsed successfully")
-        
-        # Validate structure
-        if not validate_learning_structure(parsed_data):
-            print(f"❌ Invalid learning structure format")
+        tasks = [
+            asyncio.create_task(detail(i, concept)) for i, concept in enumerate(skeleton) if i not in done
+        ]
+        try:
+            results = await asyncio.gather(*tasks)
+        finally:
+            # A failed save must not leave the other concepts generating and saving behind a failed day
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        concepts = [concept for concept in results if concept is not None]
+        missing = len(tasks) - len(concepts)
+        print(f"✅ Day {day_number} details finished: {len(concepts) + len(done)}/{len(skeleton)} concepts")
+        
+        if missing:
             return {
                 'success': False,
-                'error': 'Invalid learning structure format'
+                'error': f"Day {day_number}: {missing} of {len(skeleton)} concepts could not be generated; "
+                         f"the other {len(skeleton) - missing} are kept for the next attempt"
             }
         
-        print(f"✅ Learning structure validated")
         return {
             'success': True,
-            'data': parsed_data
+            'day_number': day_number,
+            'concepts': concepts,
+            'resumed': len(done)
         }
         
-    except json.JSONDecodeError as e:
-        print(f"❌ JSON parsing failed: {str(e)}")
-        print(f"   JSON text was: {json_text[:500] if json_text else 'None'}...")
-        return {
-            'success': False,
-            'error': f'JSON parsing failed: {str(e)}'
-        }
     except Exception as e:
-        print(f"❌ Response parsing failed: {str(e)}")
+        print(f"❌ Day {day_number} parallel generation error: {type(e).__name__}: {str(e)}")
         return {
             'success': False,
-            'error': f'Response parsing failed: {str(e)}'
+            'error': f"Day {day_number} content generation failed: {str(e)}"
         }
 
+async def generate_concept_details(repo_context, day_number, concept, concept_index, day_outline,
+                                   skill_level, domain, project_overview, azure_openai_config):
+    """
+    Generate the subconcepts and tasks of one outlined concept, retrying unusable responses
+    
+    Returns:
+        dict: The complete, validated concept, or None if every attempt failed
+    """
+    prompt = create_concept_details_prompt(
+        repo_context, day_number, concept, concept_index, day_outline, skill_level, domain, project_overview
+    )
+    options = {
+        'temperature': 0.7,
+        'max_tokens': completion_budget(json_messages(prompt), CONCEPT_RESPONSE_TOKENS),
+        **JSON_RESPONSE_OPTIONS
+    }
+    
+    for attempt in range(1, DAY_CONCEPT_ATTEMPTS + 1):
+        try:
+            response = await create_chat_completion(json_messages(prompt), azure_openai_config, **options)
+            details = parse_llm_response(response.choices[0].message.content, schema=concept_details_schema)
+            if not details['success'] and response.choices[0].finish_reason == 'length':
+                # Cut off at max_tokens: the subconcepts that were completed are still worth keeping
+                salvaged = salvage_truncated_json(response.choices[0].message.content or '')
+                if salvaged:
+                    details = validate_structured(salvaged['data'], concept_details_schema)
+            if details['success']:
+                full_concept = {
+                    'id': concept['id'],
+                    'name': concept['name'],
+                    'description': concept.get('description', ''),
+                    'subconcepts': details['data']['subconcepts']
+                }
+                if validate_learning_structure({'concepts': [full_concept]}):
+                    apply_day_unlocking_logic([full_concept], day_number=day_number, all_locked=True)
+                    print(f"📥 Day {day_number}: concept {concept_index + 1} ready ({full_concept['name']})")
+                    return full_concept
+            # Don't let the response cache hand the same unusable answer to the retry
+            await forget_chat_completion(json_messages(prompt), azure_openai_config, **options)
+            print(f"⚠️ Day {day_number}: concept {concept_index + 1} details invalid (attempt {attempt}/{DAY_CONCEPT_ATTEMPTS})")
+        except Exception as e:
+            print(f"⚠️ Day {day_number}: concept {concept_index + 1} details failed "
+                  f"(attempt {attempt}/{DAY_CONCEPT_ATTEMPTS}): {type(e).__name__}: {str(e)}")
+    
+    print(f"❌ Day {day_number}: dropping concept {concept_index + 1} ({concept.get('name', 'Unnamed')})")
+    return None
+
+def parse_llm_response(response_text, schema=learning_content_schema):
+    """Parse and validate the LLM response in one pass against a compiled schema (a learning path by default)"""
+    result = parse_structured(response_text, schema)
+    if result['success']:
+        print(f"✅ Response parsed and validated ({len(response_text)} chars)")
+    else:
+        print(f"❌ Response rejected ({len(response_text or '')} chars): {result['error']}")
+    return result
+
 def parse_day_response(response_text):
     """Parse the day-specific LLM response"""
     # Use the same parsing logic as the main response
     return parse_llm_response(response_text)
 
 def validate_learning_structure(data):
-    """Validate that the learning structure has the required format"""
-    try:
-        # Check required top-level keys
-        if 'project_overview' not in data and 'concepts' not in data:
-            return False
-        
-        # For day-specific responses, only concepts are required
-        if 'concepts' not in data:
-            return False
-        
-        # Check concepts structure
-        for concept in data['concepts']:
-            if not all(key in concept for key in ['id', 'name', 'subconcepts']):
-                # Also check for old format for backward compatibility
-                if not all(key in concept for key in ['id', 'name', 'subtopics']):
-                    return False
-                else:
-                    # Convert old format to new format
-                    concept['subconcepts'] = concept.pop('subtopics', [])
-            
-            # Check subconcepts structure
-            subconcepts_key = 'subconcepts' if 'subconcepts' in concept else 'subtopics'
-            for subconcept in concept[subconcepts_key]:
-                if not all(key in subconcept for key in ['id', 'name', 'task']):
-                    # Check old format
-                    if not all(key in subconcept for key in ['id', 'name', 'tasks']):
-                        return False
-                    else:
-                        # Convert old format: take first task
-                        if subconcept['tasks']:
-                            subconcept['task'] = subconcept['tasks'][0]
-                        else:
-                            return False
-                
-                # Check task structure
-                task = subconcept.get('task')
-                if not task or not all(key in task for key in ['id', 'name', 'description']):
-                    return False
-        
-        return True
-        
-    except:
+    """Validate that the learning structure has the required format, normalising old key names in place"""
+    if not isinstance(data, dict):
+        return False
+    error = validate_concepts(data)
+    if error:
+        print(f"⚠️ Invalid learning structure: {error}")
         return False
+    return True
 
 def apply_day_unlocking_logic(concepts, day_number=1, all_locked=False):
     """Apply progressive unlocking logic to day concepts"""
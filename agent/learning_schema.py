@@ -0,0 +1,171 @@
+"""
+Learning content schema
+Pydantic models for the concept -> subconcept -> task shape the LLM returns.
+Compiled once into TypeAdapters that parse and validate a response in one
+pass (validate_json) and report failures with exact paths such as
+concepts.2.subconcepts.0.task.description
+"""
+
+import os
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationError, model_validator
+
+# Ask the deployment for JSON-mode output (response_format json_object) on structured calls
+LLM_JSON_MODE = os.getenv('LLM_JSON_MODE', 'true').lower() == 'true'
+
+# Extra request options for calls whose answer must be one JSON object
+JSON_RESPONSE_OPTIONS = {'response_format': {'type': 'json_object'}} if LLM_JSON_MODE else {}
+
+
+def _rename_subtopics(data):
+    # Older responses call a concept's subconcepts 'subtopics'
+    if isinstance(data, dict) and 'subconcepts' not in data and 'subtopics' in data:
+        data = dict(data)
+        data['subconcepts'] = data.pop('subtopics')
+    return data
+
+
+class _Content(BaseModel):
+    # Unknown keys (files_to_study, verification_criteria, isUnlocked, ...) pass through untouched
+    model_config = ConfigDict(extra='allow', coerce_numbers_to_str=True)
+
+
+class LearningTask(_Content):
+    id: str
+    name: str
+    description: str
+
+
+class LearningSubconcept(_Content):
+    id: str
+    name: str
+    task: LearningTask
+
+    @model_validator(mode='before')
+    @classmethod
+    def _first_of_tasks(cls, data):
+        # Older responses give a list of tasks; the first one is the subconcept's task
+        if isinstance(data, dict) and 'task' not in data and data.get('tasks'):
+            data = {**data, 'task': data['tasks'][0]}
+        return data
+
+
+class LearningConcept(_Content):
+    id: str
+    name: str
+    subconcepts: List[LearningSubconcept]
+
+    @model_validator(mode='before')
+    @classmethod
+    def _subtopics_to_subconcepts(cls, data):
+        return _rename_subtopics(data)
+
+
+class LearningContent(_Content):
+    """A learning path (with project_overview) or one day's content (with day_number)"""
+    project_overview: Optional[str] = None
+    day_number: Optional[int] = None
+    concepts: List[LearningConcept]
+
+
+class OutlineConcept(_Content):
+    id: Optional[str] = None
+    name: str = Field(min_length=1)
+    description: str = ''
+    key_files: List[str] = []
+
+
+class DayOutline(_Content):
+    day_number: Optional[int] = None
+    concepts: List[OutlineConcept] = Field(min_length=1)
+
+
+class ConceptDetails(_Content):
+    subconcepts: List[LearningSubconcept] = Field(min_length=1)
+
+    @model_validator(mode='before')
+    @classmethod
+    def _subtopics_to_subconcepts(cls, data):
+        return _rename_subtopics(data)
+
+
+class ContinuedConcept(_Content):
+    id: Optional[str] = None
+    subconcepts: List[LearningSubconcept] = []
+
+
+class DayContinuation(_Content):
+    """The rest of a cut-off day: the remaining subconcepts of the interrupted concept, then further concepts"""
+    continued_concept: Optional[ContinuedConcept] = None
+    concepts: List[LearningConcept] = []
+
+
+learning_content_schema = TypeAdapter(LearningContent)
+day_outline_schema = TypeAdapter(DayOutline)
+concept_details_schema = TypeAdapter(ConceptDetails)
+day_continuation_schema = TypeAdapter(DayContinuation)
+
+
+def describe_validation_error(error, limit=5):
+    """One line per problem, e.g. 'concepts.2.subconcepts.0.task: Field required'"""
+    problems = []
+    for item in error.errors()[:limit]:
+        path = '.'.join(str(part) for part in item['loc']) or '<root>'
+        problems.append(f"{path}: {item['msg']}")
+    if error.error_count() > limit:
+        problems.append(f"... {error.error_count() - limit} more")
+    return '; '.join(problems)
+
+
+def parse_structured(response_text, schema=learning_content_schema):
+    """
+    Parse and validate an LLM response against a schema in one pass
+
+    JSON-mode responses are validated as they are; otherwise anything around
+    the outermost braces (a markdown fence, a stray sentence) is dropped first.
+
+    Returns:
+        dict: {'success': True, 'data': normalised dict} or {'success': False, 'error': ...}
+    """
+    text = (response_text or '').strip()
+    if not text.startswith('{'):
+        start, end = text.find('{'), text.rfind('}')
+        if start == -1 or end <= start:
+            return {'success': False, 'error': 'No JSON found in LLM response'}
+        text = text[start:end + 1]
+    try:
+        model = schema.validate_json(text)
+    except ValidationError as e:
+        return {'success': False, 'error': f"Invalid response: {describe_validation_error(e)}"}
+    return {'success': True, 'data': schema.dump_python(model, exclude_unset=True)}
+
+
+def validate_structured(data, schema):
+    """Same as parse_structured for an already decoded object (e.g. one salvaged from a cut-off response)"""
+    try:
+        model = schema.validate_python(data)
+    except ValidationError as e:
+        return {'success': False, 'error': f"Invalid response: {describe_validation_error(e)}"}
+    return {'success': True, 'data': schema.dump_python(model, exclude_unset=True)}
+
+
+def validate_concepts(data, schema=learning_content_schema):
+    """
+    Validate an already decoded structure, normalising old key names in place
+
+    Returns:
+        str or None: Error description, or None when the structure is valid
+    """
+    try:
+        model = schema.validate_python(data)
+    except ValidationError as e:
+        return describe_validation_error(e)
+    normalised = schema.dump_python(model, exclude_unset=True)
+    concepts = normalised.pop('concepts', None)
+    data.update(normalised)
+    # Callers keep references to the concept dicts, so those are rewritten rather than replaced
+    for original, clean in zip(data.get('concepts') or [], concepts or []):
+        original.clear()
+        original.update(clean)
+    return None
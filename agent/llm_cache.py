@@ -0,0 +1,219 @@
+"""
+LLM response cache
+Stores completed chat responses on disk keyed by a fingerprint of the
+deployment, messages and sampling parameters. The same repository, skill
+level and domain across users, and retried regenerations, then reuse one
+answer instead of paying for another minute-long call
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+LLM_CACHE_DIR = os.getenv('LLM_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'gitguide_llm_cache'))
+LLM_CACHE_TTL = float(os.getenv('LLM_CACHE_TTL', str(7 * 24 * 3600)))  # One week default
+LLM_CACHE_MAX_BYTES = int(os.getenv('LLM_CACHE_MAX_BYTES', str(128 * 1024 * 1024)))  # 128MB default
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+
+_refreshing = contextvars.ContextVar('llm_cache_refresh', default=False)
+
+_KEY_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+# Request options that change the answer; transport options like timeout do not
+_SAMPLING_OPTIONS = (
+    'temperature', 'top_p', 'max_tokens', 'presence_penalty', 'frequency_penalty',
+    'stop', 'seed', 'response_format', 'n', 'logit_bias'
+)
+
+
+@contextmanager
+def refresh_llm_responses():
+    """
+    Ask the model again for the LLM calls made inside the block (and tasks started from it)
+
+    The new answers replace the cached ones. Used wherever a user explicitly
+    asks for new content, so a regeneration never replays the previous answer.
+    """
+    token = _refreshing.set(True)
+    try:
+        yield
+    finally:
+        _refreshing.reset(token)
+
+
+def refreshing():
+    return _refreshing.get()
+
+
+def fingerprint(config, messages, options):
+    """Cache key for one chat completion request"""
+    material = {
+        'endpoint': (config.get('endpoint') or '').rstrip('/'),
+        'api_version': config.get('api_version'),
+        'deployment': config.get('deployment_name'),
+        'messages': messages,
+        'options': {name: options[name] for name in _SAMPLING_OPTIONS if name in options}
+    }
+    encoded = json.dumps(material, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class LLMResponseCache:
+    """Disk-backed response store with a TTL, a total size limit and LRU eviction"""
+
+    def __init__(self, directory, ttl, max_bytes):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> size in bytes, least recently used first
+        self._total_bytes = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _load_index(self):
+        """Rebuild the LRU index from disk, oldest access first"""
+        if self._loaded:
+            return
+        entries = []
+        if os.path.isdir(self.directory):
+            for prefix in os.listdir(self.directory):
+                prefix_dir = os.path.join(self.directory, prefix)
+                if not os.path.isdir(prefix_dir):
+                    continue
+                for name in os.listdir(prefix_dir):
+                    key = name[:-5]
+                    if not name.endswith('.json') or not _KEY_PATTERN.match(key):
+                        continue
+                    try:
+                        stat = os.stat(os.path.join(prefix_dir, name))
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, key, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._total_bytes += size
+        self._loaded = True
+
+    def _forget(self, key):
+        if key in self._entries:
+            self._total_bytes -= self._entries.pop(key)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def get(self, key):
+        """Return the cached response text for a fingerprint, or None on a miss"""
+        with self._lock:
+            self._load_index()
+            path = self._path(key)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+                os.utime(path)  # Record the access for LRU ordering across restarts
+            except (OSError, ValueError):
+                # Never stored, or evicted by another worker sharing the directory
+                if key in self._entries:
+                    self._total_bytes -= self._entries.pop(key)
+                self.misses += 1
+                return None
+            if time.time() - entry.get('created_at', 0) > self.ttl:
+                self._forget(key)
+                self.expired += 1
+                self.misses += 1
+                return None
+            if key not in self._entries:
+                self._entries[key] = os.path.getsize(path)
+                self._total_bytes += self._entries[key]
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry['content']
+
+    def discard(self, key):
+        """Drop one entry, e.g. a response that turned out to be unusable"""
+        with self._lock:
+            self._load_index()
+            self._forget(key)
+
+    def put(self, key, content, model=None):
+        """Store a response and evict least recently used entries over the size limit"""
+        if content is None:
+            return
+        data = json.dumps({'created_at': time.time(), 'model': model, 'content': content}).encode('utf-8')
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            self._load_index()
+            path = self._path(key)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Write then rename so concurrent readers never see a partial entry
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"⚠️ LLM cache write failed for {key[:12]}: {e}")
+                return
+            if key in self._entries:
+                self._total_bytes -= self._entries[key]
+            self._entries[key] = len(data)
+            self._entries.move_to_end(key)
+            self._total_bytes += len(data)
+            self._evict()
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    async def aget(self, key):
+        """Async wrapper around get() that keeps disk I/O off the event loop"""
+        return await asyncio.to_thread(self.get, key)
+
+    async def adiscard(self, key):
+        """Async wrapper around discard()"""
+        await asyncio.to_thread(self.discard, key)
+
+    async def aput(self, key, content, model=None):
+        """Async wrapper around put() that keeps disk I/O off the event loop"""
+        await asyncio.to_thread(self.put, key, content, model)
+
+    def stats(self):
+        """Return cache size and hit/miss counters"""
+        with self._lock:
+            self._load_index()
+            lookups = self.hits + self.misses
+            return {
+                'enabled': LLM_CACHE_ENABLED,
+                'entries': len(self._entries),
+                'total_bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'expired': self.expired,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+# Process-wide cache shared by every LLM call
+llm_response_cache = LLMResponseCache(LLM_CACHE_DIR, LLM_CACHE_TTL, LLM_CACHE_MAX_BYTES)
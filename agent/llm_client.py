@@ -0,0 +1,226 @@
+"""
+Shared Azure OpenAI client
+One AsyncAzureOpenAI client per endpoint for the process, each on a pooled
+keep-alive httpx transport, with calls routed across the deployment pool. LLM calls are awaited instead of blocking the event loop for the
+whole round trip, and they reuse warm connections to the Azure endpoint
+"""
+
+import asyncio
+import os
+
+import httpx
+from openai import AsyncAzureOpenAI
+
+from agent.llm_cache import LLM_CACHE_ENABLED, fingerprint, llm_response_cache, refreshing
+from agent.llm_deployments import deployment_pool
+from agent.llm_scheduler import llm_scheduler
+
+AZURE_OPENAI_TIMEOUT = float(os.getenv('AZURE_OPENAI_TIMEOUT', '120'))
+AZURE_OPENAI_MAX_RETRIES = int(os.getenv('AZURE_OPENAI_MAX_RETRIES', '3'))
+AZURE_OPENAI_MAX_CONNECTIONS = int(os.getenv('AZURE_OPENAI_MAX_CONNECTIONS', '20'))
+
+
+def azure_openai_settings():
+    """Azure OpenAI configuration from the environment (the shape GitGuideAgent.azure_openai_config uses)"""
+    return {
+        'api_key': os.getenv('AZURE_OPENAI_KEY'),
+        'endpoint': os.getenv('AZURE_OPENAI_ENDPOINT'),
+        'api_version': os.getenv('AZURE_OPENAI_API_VERSION'),
+        'deployment_name': os.getenv('AZURE_OPENAI_DEPLOYMENT_GPT_4_1'),
+        'timeout': AZURE_OPENAI_TIMEOUT
+    }
+
+
+class CachedMessage:
+    def __init__(self, content):
+        self.role = 'assistant'
+        self.content = content
+
+
+class CachedChoice:
+    def __init__(self, content):
+        self.index = 0
+        self.finish_reason = 'stop'
+        self.message = CachedMessage(content)
+
+
+class CachedCompletion:
+    """Stand-in for a ChatCompletion served from the response cache (callers read choices[0].message.content)"""
+
+    def __init__(self, content, model=None):
+        self.model = model
+        self.choices = [CachedChoice(content)]
+        self.from_cache = True
+
+
+def estimate_request_tokens(messages, options):
+    """Tokens a call counts against the TPM quota up front: the prompt plus max_tokens"""
+    from prompts.token_budget import count_message_tokens
+    return count_message_tokens(messages) + (options.get('max_tokens') or 1000)
+
+
+class LLMClient:
+    """Process-wide AsyncAzureOpenAI clients, one per endpoint, recreated only if the loop or credentials change"""
+
+    def __init__(self):
+        self._clients = {}  # (endpoint, api_version, max_retries) -> (api_key, client)
+        self._loop = None
+
+    def client(self, config=None):
+        """Return the shared client for the config's endpoint, creating it on first use in the running loop"""
+        config = config or azure_openai_settings()
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._clients = {}
+            self._loop = loop
+        max_retries = config.get('max_retries', AZURE_OPENAI_MAX_RETRIES)
+        key = (config['endpoint'], config['api_version'], max_retries)
+        api_key, client = self._clients.get(key, (None, None))
+        if client is None or api_key != config['api_key']:
+            if client is not None:
+                # Credentials changed: let in-flight calls finish on the old pool, then close it
+                loop.create_task(client.close())
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=AZURE_OPENAI_MAX_CONNECTIONS,
+                    max_keepalive_connections=AZURE_OPENAI_MAX_CONNECTIONS,
+                    keepalive_expiry=60
+                ),
+                timeout=httpx.Timeout(config.get('timeout') or AZURE_OPENAI_TIMEOUT, connect=10.0)
+            )
+            client = AsyncAzureOpenAI(
+                api_key=config['api_key'],
+                azure_endpoint=config['endpoint'],
+                api_version=config['api_version'],
+                timeout=config.get('timeout') or AZURE_OPENAI_TIMEOUT,
+                max_retries=max_retries,
+                http_client=http_client
+            )
+            self._clients[key] = (config['api_key'], client)
+        return client
+
+    async def chat_completion(self, messages, config=None, use_cache=True, priority=None, **options):
+        """Run one chat completion on the configured deployment, answering repeats from the cache"""
+        config = config or azure_openai_settings()
+        cache_key = fingerprint(config, messages, options) if use_cache and LLM_CACHE_ENABLED else None
+        # Inside refresh_llm_responses() the answer is only written, never read
+        if cache_key and not refreshing():
+            cached = await llm_response_cache.aget(cache_key)
+            if cached is not None:
+                print(f"♻️ LLM response served from cache ({cache_key[:12]})")
+                return CachedCompletion(cached, config['deployment_name'])
+        
+        async def call(deployment):
+            return await self.client(deployment).chat.completions.create(
+                model=deployment['deployment_name'],
+                messages=messages,
+                **options
+            )
+
+        # Wait for a slot in the shared scheduler (priority order, RPM/TPM limits),
+        # then run on the least-loaded healthy deployment of the pool
+        estimated_tokens = estimate_request_tokens(messages, options)
+        async with llm_scheduler.slot(estimated_tokens, config['deployment_name'], priority) as grant:
+            response = await deployment_pool.run(call, config, priority, estimated_tokens)
+            grant.used_tokens = response.usage.total_tokens if getattr(response, 'usage', None) else None
+        # Only complete answers are reused; truncated or filtered ones are worth retrying
+        if cache_key and response.choices and response.choices[0].finish_reason == 'stop':
+            await llm_response_cache.aput(cache_key, response.choices[0].message.content, response.model)
+        return response
+
+    async def stream_chat_completion(self, messages, config=None, use_cache=True, priority=None, **options):
+        """Run a streamed chat completion, yielding content deltas as they arrive (a cached answer arrives whole)"""
+        config = config or azure_openai_settings()
+        cache_key = fingerprint(config, messages, options) if use_cache and LLM_CACHE_ENABLED else None
+        # Inside refresh_llm_responses() the answer is only written, never read
+        if cache_key and not refreshing():
+            cached = await llm_response_cache.aget(cache_key)
+            if cached is not None:
+                print(f"♻️ LLM response served from cache ({cache_key[:12]})")
+                yield cached
+                return
+        
+        parts = []
+        finish_reason = None
+        model = None
+        estimated_tokens = estimate_request_tokens(messages, options)
+
+        async def call(deployment):
+            return await self.client(deployment).chat.completions.create(
+                model=deployment['deployment_name'],
+                messages=messages,
+                stream=True,
+                **options
+            )
+
+        async with llm_scheduler.slot(estimated_tokens, config['deployment_name'], priority) as grant:
+            async for chunk in deployment_pool.stream(call, config):
+                # Azure sends a first chunk with only content-filter results and no choices
+                if not chunk.choices:
+                    continue
+                model = chunk.model or model
+                finish_reason = chunk.choices[0].finish_reason or finish_reason
+                if chunk.choices[0].delta and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+            # Streams carry no usage; the reply length stands in for completion tokens
+            from prompts.token_budget import count_tokens
+            grant.used_tokens = estimated_tokens - (options.get('max_tokens') or 1000) + count_tokens(''.join(parts))
+        if cache_key and finish_reason == 'stop':
+            await llm_response_cache.aput(cache_key, ''.join(parts), model)
+
+    async def close(self):
+        for _, client in self._clients.values():
+            await client.close()
+        self._clients = {}
+
+
+llm_client = LLMClient()
+
+
+def is_llm_configured(config=None):
+    config = config or azure_openai_settings()
+    return bool(config.get('api_key') and config.get('endpoint'))
+
+
+async def start_llm_client():
+    """Create the shared client at application startup so the first request doesn't pay for it"""
+    if is_llm_configured():
+        for deployment in deployment_pool.load():
+            llm_client.client(deployment.config())
+        print(f"🤖 Shared Azure OpenAI clients ready (pool of {AZURE_OPENAI_MAX_CONNECTIONS} connections)")
+        print(f"🤖 LLM deployments: {deployment_pool.describe()}")
+    else:
+        print("⚠️ Azure OpenAI not configured; the shared LLM client was not started")
+
+
+async def close_llm_client():
+    """Close the shared clients (called on application shutdown)"""
+    await llm_client.close()
+
+
+async def create_chat_completion(messages, azure_openai_config=None, use_cache=True, priority=None, **options):
+    """
+    Await a chat completion on the shared client
+
+    Args:
+        messages: Chat messages
+        azure_openai_config: Optional config dict (defaults to the environment)
+        use_cache: Serve and store identical requests through the response cache
+            (inside refresh_llm_responses() answers are stored but not served)
+        priority: Scheduler class ('interactive', 'on_demand', 'regeneration', 'prefetch');
+            defaults to the llm_priority block in effect
+        **options: Passed to chat.completions.create (max_tokens, temperature, ...)
+    """
+    return await llm_client.chat_completion(messages, azure_openai_config, use_cache, priority, **options)
+
+
+async def stream_chat_completion(messages, azure_openai_config=None, use_cache=True, priority=None, **options):
+    """Stream a chat completion on the shared client, yielding text deltas"""
+    async for delta in llm_client.stream_chat_completion(messages, azure_openai_config, use_cache, priority, **options):
+        yield delta
+
+
+async def forget_chat_completion(messages, azure_openai_config=None, **options):
+    """Remove a cached response that could not be used, so the next identical request asks the model again"""
+    await llm_response_cache.adiscard(fingerprint(azure_openai_config or azure_openai_settings(), messages, options))
@@ -0,0 +1,381 @@
+"""
+Azure OpenAI deployment pool
+The primary deployment (AZURE_OPENAI_DEPLOYMENT_GPT_4_1) can share the load
+with further deployments or regions listed in AZURE_OPENAI_DEPLOYMENTS. Each
+call goes to the least-loaded healthy deployment for its weight. A deployment
+that keeps answering 429/5xx (or timing out) is tripped out for a cooldown,
+then let back in with a single probe call. Failed calls fail over to another
+deployment, and a call still running after LLM_HEDGE_AFTER seconds is raced
+against a second deployment
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+
+import openai
+
+from agent.llm_scheduler import current_priority, llm_scheduler
+
+LLM_BREAKER_FAILURES = int(os.getenv('LLM_BREAKER_FAILURES', '3'))  # Consecutive failures that trip a deployment
+LLM_BREAKER_COOLDOWN = float(os.getenv('LLM_BREAKER_COOLDOWN', '30'))  # Seconds a tripped deployment is skipped
+LLM_HEDGE_AFTER = float(os.getenv('LLM_HEDGE_AFTER', '0'))  # 0 = no hedging
+
+# Hedging doubles the token spend of a slow call, so background work never hedges
+HEDGE_PRIORITIES = ('interactive', 'on_demand')
+
+# Calls a pool of deployments makes for one request beyond the first, in place of the SDK's retries
+_FAILOVER_RETRIES = int(os.getenv('AZURE_OPENAI_MAX_RETRIES', '3'))
+
+_LATENCY_SMOOTHING = 0.2
+
+
+def is_deployment_failure(error):
+    """True for errors that say the deployment is unhealthy (429, 5xx, timeouts) rather than the request is bad"""
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def _retry_after(error):
+    """Seconds from a 429's Retry-After header, if it carries one"""
+    response = getattr(error, 'response', None)
+    try:
+        return float(response.headers.get('retry-after'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class Deployment:
+    """One deployment on one endpoint, with its load, circuit breaker state and latency"""
+
+    def __init__(self, deployment_name, endpoint, api_key, api_version, weight=1.0, name=None):
+        self.deployment_name = deployment_name
+        self.endpoint = endpoint
+        self.api_key = api_key
+        self.api_version = api_version
+        self.weight = max(float(weight), 0.01)
+        self.name = name or f"{deployment_name}@{(endpoint or '').rstrip('/').split('//')[-1]}"
+        self.max_retries = None  # None = the client default; pooled deployments fail over instead
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.trips = 0
+        self.state = 'closed'  # closed | open | half_open
+        self.open_until = 0.0
+        self.latency = None
+
+    @property
+    def key(self):
+        return ((self.endpoint or '').rstrip('/'), self.deployment_name)
+
+    def config(self, timeout=None):
+        """Config dict in the shape LLMClient.client expects"""
+        config = {
+            'api_key': self.api_key,
+            'endpoint': self.endpoint,
+            'api_version': self.api_version,
+            'deployment_name': self.deployment_name,
+            'timeout': timeout
+        }
+        if self.max_retries is not None:
+            config['max_retries'] = self.max_retries
+        return config
+
+    def available(self, now):
+        """Closed, or tripped long enough ago that one probe call may go through"""
+        if self.state == 'closed':
+            return True
+        return self.state == 'open' and now >= self.open_until
+
+    def load(self):
+        return (self.in_flight + 1) / self.weight
+
+    def record_success(self, seconds):
+        self.consecutive_failures = 0
+        if self.state != 'closed':
+            print(f"✅ LLM deployment {self.name} recovered")
+        self.state = 'closed'
+        self.latency = seconds if self.latency is None else (
+            (1 - _LATENCY_SMOOTHING) * self.latency + _LATENCY_SMOOTHING * seconds
+        )
+
+    def record_failure(self, error):
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.state == 'half_open' or self.consecutive_failures >= LLM_BREAKER_FAILURES:
+            cooldown = max(LLM_BREAKER_COOLDOWN, _retry_after(error) or 0)
+            if self.state != 'open':
+                self.trips += 1
+                print(f"🔌 LLM deployment {self.name} tripped for {cooldown:g}s: {type(error).__name__}")
+            self.state = 'open'
+            self.open_until = time.monotonic() + cooldown
+
+    def stats(self):
+        return {
+            'name': self.name,
+            'weight': self.weight,
+            'state': self.state,
+            'in_flight': self.in_flight,
+            'requests': self.requests,
+            'failures': self.failures,
+            'trips': self.trips,
+            'avg_latency_ms': round(1000 * self.latency) if self.latency is not None else None,
+            'reopens_in_seconds': round(max(0.0, self.open_until - time.monotonic()), 1) if self.state == 'open' else None
+        }
+
+
+def _load_deployments(primary):
+    """
+    The primary deployment plus the ones in AZURE_OPENAI_DEPLOYMENTS, a JSON list such as
+
+        [{"deployment": "gpt-4.1", "endpoint": "https://eastus.openai.azure.com/", "weight": 2},
+         {"deployment": "gpt-4.1", "endpoint": "https://swedencentral.openai.azure.com/",
+          "api_key_env": "AZURE_OPENAI_KEY_SWEDEN"}]
+
+    Missing fields fall back to the primary deployment's settings. Listing the
+    primary deployment itself only changes its weight.
+    """
+    deployments = {}
+    if primary.get('deployment_name') or primary.get('endpoint'):
+        deployment = Deployment(
+            primary.get('deployment_name'), primary.get('endpoint'), primary.get('api_key'), primary.get('api_version')
+        )
+        deployments[deployment.key] = deployment
+
+    spec = os.getenv('AZURE_OPENAI_DEPLOYMENTS', '').strip()
+    if not spec:
+        return list(deployments.values())
+    try:
+        entries = json.loads(spec)
+        for entry in entries:
+            api_key = os.getenv(entry['api_key_env']) if entry.get('api_key_env') else entry.get('api_key')
+            deployment = Deployment(
+                entry.get('deployment') or primary.get('deployment_name'),
+                entry.get('endpoint') or primary.get('endpoint'),
+                api_key or primary.get('api_key'),
+                entry.get('api_version') or primary.get('api_version'),
+                entry.get('weight', 1),
+                entry.get('name')
+            )
+            deployments[deployment.key] = deployment
+    except (ValueError, TypeError, KeyError, AttributeError) as e:
+        print(f"⚠️ Ignoring invalid AZURE_OPENAI_DEPLOYMENTS ({str(e)}); using the primary deployment only")
+    return list(deployments.values())
+
+
+class DeploymentPool:
+    """Routes calls across the deployments that serve the configured model"""
+
+    def __init__(self, hedge_after=0.0):
+        self.hedge_after = hedge_after
+        self.deployments = None  # Loaded on first use, once the environment is set up
+        self._standalone = {}  # Deployments called with a config outside the pool
+        self.failovers = 0
+        self.hedges = 0
+        self.hedges_won = 0
+
+    def load(self):
+        """The pooled deployments, read from the environment on first use"""
+        if self.deployments is None:
+            from agent.llm_client import azure_openai_settings
+            self.deployments = _load_deployments(azure_openai_settings())
+            if len(self.deployments) > 1:
+                # Retrying a throttled deployment in the SDK would only delay the switch to a healthy one
+                for deployment in self.deployments:
+                    deployment.max_retries = 0
+        return self.deployments
+
+    def _members(self, config):
+        """The deployments a call with this config may use"""
+        self.load()
+        key = ((config.get('endpoint') or '').rstrip('/'), config.get('deployment_name'))
+        if any(deployment.key == key for deployment in self.deployments):
+            return self.deployments
+        if key not in self._standalone:
+            self._standalone[key] = Deployment(
+                config.get('deployment_name'), config.get('endpoint'), config.get('api_key'), config.get('api_version')
+            )
+        return [self._standalone[key]]
+
+    def pick(self, members, exclude=()):
+        """
+        Least-loaded available deployment for its weight
+
+        Returns None only when exclude rules out every deployment. When all of
+        them are tripped the one that reopens first is used rather than
+        failing the call outright.
+        """
+        now = time.monotonic()
+        candidates = [deployment for deployment in members if deployment not in exclude]
+        if not candidates:
+            return None
+        available = [deployment for deployment in candidates if deployment.available(now)]
+        if not available:
+            return min(candidates, key=lambda deployment: deployment.open_until)
+        lowest = min(deployment.load() for deployment in available)
+        deployment = random.choice([d for d in available if d.load() == lowest])
+        if deployment.state == 'open':
+            deployment.state = 'half_open'  # This call is the probe
+        return deployment
+
+    async def _invoke(self, deployment, call, config):
+        deployment.in_flight += 1
+        deployment.requests += 1
+        started = time.monotonic()
+        try:
+            result = await call(deployment.config(config.get('timeout')))
+            deployment.record_success(time.monotonic() - started)
+            return result
+        except Exception as e:
+            if is_deployment_failure(e):
+                deployment.record_failure(e)
+            raise
+        finally:
+            deployment.in_flight -= 1
+            if deployment.state == 'half_open':
+                deployment.state = 'open'  # The probe was cancelled or its request was bad; let the next call probe
+
+    async def _hedge(self, first, deployment, call, config, tokens, priority):
+        """
+        A hedged request is a second real request, so it pays RPM/TPM under its
+        own scheduler slot, keyed by the deployment it goes to. The slot skips
+        the concurrency cap (a saturated cap is when hedging matters most), and
+        the hedge only counts once it has been granted.
+        """
+        async with llm_scheduler.slot(tokens, deployment.name, priority, hedge=True) as grant:
+            self.hedges += 1
+            print(f"🏁 LLM call on {first.name} still running after {self.hedge_after:g}s; hedging on {deployment.name}")
+            result = await self._invoke(deployment, call, config)
+            usage = getattr(result, 'usage', None)
+            grant.used_tokens = usage.total_tokens if usage else None
+            return result
+
+    async def _attempt(self, members, call, config, tried, hedge, tokens=0, priority=None):
+        """One call, raced against a second deployment if it outlasts hedge_after"""
+        first = self.pick(members, tried)
+        tried.add(first)
+        tasks = {asyncio.ensure_future(self._invoke(first, call, config)): first}
+        timeout = self.hedge_after if hedge and self.hedge_after and len(members) > 1 else None
+        error = None
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    timeout = None
+                    second = self.pick(members, tried)
+                    if second is not None:
+                        tried.add(second)
+                        tasks[asyncio.ensure_future(self._hedge(first, second, call, config, tokens, priority))] = second
+                    continue
+                for task in done:
+                    deployment = tasks.pop(task)
+                    if task.exception() is None:
+                        if deployment is not first:
+                            self.hedges_won += 1
+                        return task.result()
+                    error = task.exception()
+                    if not is_deployment_failure(error):
+                        raise error  # A bad request fails the same way everywhere
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _fail_over(self, error, members, tried, attempts):
+        """Whether a failed call should be retried on another deployment (a new round starts once all were tried)"""
+        if len(members) < 2 or not is_deployment_failure(error):
+            return False  # A lone deployment already retried inside the SDK
+        if attempts > max(_FAILOVER_RETRIES, len(members) - 1):
+            return False
+        if len(tried) >= len(members):
+            tried.clear()
+        self.failovers += 1
+        return True
+
+    async def _between_rounds(self, tried, attempts):
+        # Every deployment failed this round: back off before going around again
+        if not tried:
+            await asyncio.sleep(min(2 ** attempts, 8))
+
+    async def run(self, call, config, priority=None, tokens=0):
+        """
+        Run call(deployment_config) on the pool, failing over on 429/5xx/timeouts
+
+        Args:
+            call: Async callable taking a deployment config dict
+            config: The caller's Azure OpenAI config (selects the pool)
+            priority: Scheduler class of the call; only latency-sensitive classes hedge
+            tokens: Estimated tokens of one request, reserved again for a hedge
+        """
+        members = self._members(config)
+        hedge = (priority or current_priority()) in HEDGE_PRIORITIES
+        tried = set()
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                return await self._attempt(members, call, config, tried, hedge, tokens, priority)
+            except Exception as e:
+                if not self._fail_over(e, members, tried, attempts):
+                    raise
+                print(f"🔀 LLM call failed with {type(e).__name__}; retrying on another deployment")
+                await self._between_rounds(tried, attempts)
+
+    async def stream(self, call, config):
+        """
+        Run a streaming call(deployment_config) on the pool, yielding its chunks
+
+        A stream that fails before its first chunk fails over to another
+        deployment; once chunks have been passed on the error is raised.
+        """
+        members = self._members(config)
+        tried = set()
+        attempts = 0
+        while True:
+            attempts += 1
+            deployment = self.pick(members, tried)
+            tried.add(deployment)
+            deployment.in_flight += 1
+            deployment.requests += 1
+            started = time.monotonic()
+            received = False
+            try:
+                stream = await call(deployment.config(config.get('timeout')))
+                async for chunk in stream:
+                    received = True
+                    yield chunk
+                deployment.record_success(time.monotonic() - started)
+                return
+            except Exception as e:
+                if is_deployment_failure(e):
+                    deployment.record_failure(e)
+                if received or not self._fail_over(e, members, tried, attempts):
+                    raise
+                print(f"🔀 LLM stream failed on {deployment.name} with {type(e).__name__}; retrying on another deployment")
+                await self._between_rounds(tried, attempts)
+            finally:
+                deployment.in_flight -= 1
+                if deployment.state == 'half_open':
+                    deployment.state = 'open'
+
+    def describe(self):
+        if self.deployments is None:
+            return 'not loaded'
+        return ', '.join(f"{deployment.name} (weight {deployment.weight:g})" for deployment in self.deployments)
+
+    def stats(self):
+        return {
+            'deployments': [deployment.stats() for deployment in (self.deployments or [])],
+            'failovers': self.failovers,
+            'hedge_after_seconds': self.hedge_after,
+            'hedges': self.hedges,
+            'hedges_won': self.hedges_won
+        }
+
+
+# Process-wide pool shared by every LLM call
+deployment_pool = DeploymentPool(LLM_HEDGE_AFTER)
@@ -0,0 +1,389 @@
+"""
+LLM request scheduler
+Every Azure OpenAI call waits here for a slot. Waiting calls are served in
+priority order (interactive chat, then on-demand days, then regeneration, then
+background prefetch), and token buckets keep the process within the
+deployment's requests- and tokens-per-minute quota, with a share of it held
+back for interactive calls. With LLM_SCHEDULER_BACKEND=postgres, workers also
+account their usage in a shared per-minute window table
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+from sqlalchemy import text
+
+LLM_RPM_LIMIT = int(os.getenv('LLM_RPM_LIMIT', '0'))  # 0 = no limit
+LLM_TPM_LIMIT = int(os.getenv('LLM_TPM_LIMIT', '0'))  # 0 = no limit
+LLM_MAX_CONCURRENT = int(os.getenv('LLM_MAX_CONCURRENT', os.getenv('AZURE_OPENAI_MAX_CONNECTIONS', '20')))
+# Fraction of the RPM/TPM buckets only interactive calls may use
+LLM_INTERACTIVE_RESERVE = float(os.getenv('LLM_INTERACTIVE_RESERVE', '0.2'))
+LLM_SCHEDULER_BACKEND = os.getenv('LLM_SCHEDULER_BACKEND', 'memory').lower()  # memory | postgres
+
+# Lower value = served first
+PRIORITIES = {
+    'interactive': 0,
+    'on_demand': 1,
+    'regeneration': 2,
+    'prefetch': 3
+}
+
+_current_priority = contextvars.ContextVar('llm_priority', default='on_demand')
+
+
+class SharedPriority:
+    """
+    A priority several callers share, such as one day generation they all wait on
+
+    It only ever rises: when a more urgent caller attaches, calls already
+    queued under it move up in the scheduler.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def raise_to(self, name):
+        if name in PRIORITIES and PRIORITIES[name] < PRIORITIES[self.name]:
+            self.name = name
+            llm_scheduler.reprioritize()
+
+
+def _priority_name(priority):
+    return priority.name if isinstance(priority, SharedPriority) else priority
+
+
+@contextmanager
+def llm_priority(priority):
+    """
+    Run the LLM calls made inside the block (and tasks started from it) at the given priority
+
+        with llm_priority('prefetch'):
+            await agent.generate_next_day_background(...)
+
+    A SharedPriority can be given instead of a name; calls then follow it as it rises.
+    """
+    if _priority_name(priority) not in PRIORITIES:
+        raise ValueError(f"Unknown LLM priority '{priority}'; expected one of {', '.join(PRIORITIES)}")
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority():
+    return _priority_name(_current_priority.get())
+
+
+class TokenBucket:
+    """Per-minute allowance refilled continuously"""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount, reserve=0.0):
+        """Seconds until amount can be taken while leaving reserve (a fraction of capacity) untouched"""
+        self._refill()
+        # A request larger than the whole bucket goes through once the bucket is full
+        amount = min(amount, self.capacity * (1 - reserve))
+        missing = amount + self.capacity * reserve - self.level
+        return max(0.0, missing / self.rate) if self.rate else 0.0
+
+    def take(self, amount):
+        self._refill()
+        self.level -= amount
+
+    def give_back(self, amount):
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class LLMGrant:
+    """A granted slot; release it with LLMScheduler.release"""
+
+    def __init__(self, priority, tokens, deployment, queued_at, hedge=False):
+        self.source = priority  # Name or SharedPriority
+        self.tokens = tokens
+        self.deployment = deployment
+        self.hedge = hedge  # Hedged requests may run past the concurrency cap
+        self.queued_at = queued_at
+        self.granted_at = None
+        self.window = None  # Shared window the tokens were recorded in (postgres backend)
+
+    @property
+    def priority(self):
+        name = _priority_name(self.source)
+        return name if name in PRIORITIES else 'on_demand'
+
+
+class _Waiter:
+    def __init__(self, grant, future):
+        self.grant = grant
+        self.future = future
+        self.throttled = False
+
+
+class PostgresRateWindow:
+    """
+    Fixed one-minute windows in the llm_rate_windows table, shared by every worker
+
+    A reservation is an atomic upsert that only succeeds while the window is
+    under its limits; otherwise the worker waits for the next minute.
+    """
+
+    def __init__(self):
+        self.failures = 0
+        self._reservations = 0
+
+    async def reserve(self, deployment, tokens, rpm, tpm):
+        """Wait until the current window has room; returns the window start used"""
+        from app.database_config import engine
+        while True:
+            async with engine.begin() as conn:
+                result = await conn.execute(
+                    text("""
+                        INSERT INTO llm_rate_windows (deployment, window_start, requests, tokens)
+                        VALUES (:deployment, date_trunc('minute', now()), 1, :tokens)
+                        ON CONFLICT (deployment, window_start) DO UPDATE
+                        SET requests = llm_rate_windows.requests + 1,
+                            tokens = llm_rate_windows.tokens + EXCLUDED.tokens
+                        WHERE (:rpm = 0 OR llm_rate_windows.requests + 1 <= :rpm)
+                          AND (:tpm = 0 OR llm_rate_windows.tokens + EXCLUDED.tokens <= :tpm)
+                        RETURNING window_start
+                    """),
+                    {"deployment": deployment, "tokens": tokens, "rpm": rpm, "tpm": tpm}
+                )
+                row = result.fetchone()
+                if row is None:
+                    wait = (await conn.execute(text("SELECT 60 - EXTRACT(SECOND FROM now())"))).scalar()
+                self._reservations += 1
+                if self._reservations % 100 == 0:
+                    await conn.execute(text("DELETE FROM llm_rate_windows WHERE window_start < now() - interval '1 hour'"))
+            if row is not None:
+                return row[0]
+            await asyncio.sleep(float(wait) + 0.05)
+
+    async def refund(self, deployment, window, tokens):
+        from app.database_config import engine
+        async with engine.begin() as conn:
+            await conn.execute(
+                text("""
+                    UPDATE llm_rate_windows SET tokens = GREATEST(tokens - :tokens, 0)
+                    WHERE deployment = :deployment AND window_start = :window
+                """),
+                {"deployment": deployment, "window": window, "tokens": tokens}
+            )
+
+
+class LLMScheduler:
+    """Priority queue in front of the LLM with RPM/TPM token buckets and a concurrency cap"""
+
+    def __init__(self, rpm=0, tpm=0, max_concurrent=0, interactive_reserve=0.0, backend='memory'):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_concurrent = max_concurrent
+        self.interactive_reserve = interactive_reserve
+        self._requests = TokenBucket(rpm) if rpm else None
+        self._tokens = TokenBucket(tpm) if tpm else None
+        self._shared = PostgresRateWindow() if backend == 'postgres' else None
+        self._waiting = []  # Heap of (priority, sequence, waiter)
+        self._sequence = itertools.count()
+        self._running = 0
+        self._timer = None
+        self.granted = {name: 0 for name in PRIORITIES}
+        self.wait_seconds = {name: 0.0 for name in PRIORITIES}
+        self.max_wait_seconds = {name: 0.0 for name in PRIORITIES}
+        self.throttled = 0
+        self.tokens_used = 0
+
+    def _wait_time(self, grant):
+        reserve = 0.0 if grant.priority == 'interactive' else self.interactive_reserve
+        wait = 0.0
+        if self._requests:
+            wait = max(wait, self._requests.wait_time(1, reserve))
+        if self._tokens:
+            wait = max(wait, self._tokens.wait_time(grant.tokens, reserve))
+        return wait
+
+    def _dispatch(self):
+        """Grant slots to waiting calls in priority order; the first that must wait holds back the rest"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._waiting:
+            waiter = self._waiting[0][2]
+            if waiter.future.done():  # Cancelled while queued
+                heapq.heappop(self._waiting)
+                continue
+            if self.max_concurrent and self._running >= self.max_concurrent:
+                self._dispatch_hedges()
+                return  # release() dispatches again
+            wait = self._wait_time(waiter.grant)
+            if wait > 0:
+                if not waiter.throttled:
+                    waiter.throttled = True
+                    self.throttled += 1
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            heapq.heappop(self._waiting)
+            self._grant(waiter)
+
+    def _dispatch_hedges(self):
+        """Grant queued hedges while the concurrency cap is reached; they still wait for RPM/TPM"""
+        for entry in sorted(self._waiting):
+            waiter = entry[2]
+            if not waiter.grant.hedge or waiter.future.done():
+                continue
+            wait = self._wait_time(waiter.grant)
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            self._waiting.remove(entry)
+            heapq.heapify(self._waiting)
+            self._grant(waiter)
+
+    def _grant(self, waiter):
+        grant = waiter.grant
+        if self._requests:
+            self._requests.take(1)
+        if self._tokens:
+            self._tokens.take(grant.tokens)
+        self._running += 1
+        grant.granted_at = time.monotonic()
+        waited = grant.granted_at - grant.queued_at
+        self.granted[grant.priority] += 1
+        self.wait_seconds[grant.priority] += waited
+        self.max_wait_seconds[grant.priority] = max(self.max_wait_seconds[grant.priority], waited)
+        waiter.future.set_result(grant)
+
+    async def acquire(self, tokens, deployment=None, priority=None, hedge=False):
+        """
+        Wait for a slot for one call
+
+        Args:
+            tokens: Estimated tokens the call uses (prompt + max_tokens, as Azure counts it)
+            deployment: Deployment name, used for the shared window
+            priority: One of PRIORITIES or a SharedPriority (defaults to the llm_priority in effect)
+            hedge: The call races one already holding a slot, so it is not held back by LLM_MAX_CONCURRENT
+        """
+        grant = LLMGrant(priority or _current_priority.get(), tokens, deployment, time.monotonic(), hedge)
+        priority = grant.priority
+        waiter = _Waiter(grant, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._waiting, (PRIORITIES[priority], next(self._sequence), waiter))
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(grant)  # Granted just as the caller gave up
+            raise
+
+        if self._shared is not None:
+            try:
+                reserve = 0.0 if grant.priority == 'interactive' else self.interactive_reserve
+                grant.window = await self._shared.reserve(
+                    deployment or '', tokens,
+                    int(self.rpm * (1 - reserve)), int(self.tpm * (1 - reserve))
+                )
+            except asyncio.CancelledError:
+                self.release(grant)
+                raise
+            except Exception as e:
+                # Never block LLM calls on the coordination table
+                self._shared.failures += 1
+                print(f"⚠️ Shared LLM rate window unavailable, using local limits only: {str(e)}")
+        return grant
+
+    def reprioritize(self):
+        """Re-sort the queue after a SharedPriority rose"""
+        self._waiting = [
+            (PRIORITIES[waiter.grant.priority], sequence, waiter)
+            for _, sequence, waiter in self._waiting if not waiter.future.done()
+        ]
+        heapq.heapify(self._waiting)
+        try:
+            self._dispatch()
+        except RuntimeError:
+            pass  # No running loop; the next acquire or release dispatches
+
+    def release(self, grant, used_tokens=None):
+        """Free the slot and return reserved tokens the call did not use to the bucket"""
+        self._running = max(0, self._running - 1)
+        if used_tokens is not None:
+            self.tokens_used += used_tokens
+            unused = grant.tokens - used_tokens
+            if unused > 0:
+                if self._tokens:
+                    self._tokens.give_back(unused)
+                if self._shared is not None and grant.window is not None:
+                    asyncio.ensure_future(self._refund_shared(grant, unused))
+        self._dispatch()
+
+    async def _refund_shared(self, grant, unused):
+        try:
+            await self._shared.refund(grant.deployment or '', grant.window, unused)
+        except Exception:
+            self._shared.failures += 1
+
+    @asynccontextmanager
+    async def slot(self, tokens, deployment=None, priority=None, hedge=False):
+        """
+        async with llm_scheduler.slot(estimated_tokens) as grant:
+            response = ...
+            grant.used_tokens = response.usage.total_tokens
+        """
+        grant = await self.acquire(tokens, deployment, priority, hedge)
+        grant.used_tokens = None
+        try:
+            yield grant
+        finally:
+            self.release(grant, grant.used_tokens)
+
+    def stats(self):
+        """Queue depth per priority class, waits, throttling and bucket levels"""
+        queued = {name: 0 for name in PRIORITIES}
+        for _, _, waiter in self._waiting:
+            if not waiter.future.done():
+                queued[waiter.grant.priority] += 1
+        return {
+            'backend': 'postgres' if self._shared is not None else 'memory',
+            'rpm_limit': self.rpm,
+            'tpm_limit': self.tpm,
+            'max_concurrent': self.max_concurrent,
+            'running': self._running,
+            'queued': queued,
+            'granted': dict(self.granted),
+            'avg_wait_ms': {
+                name: round(1000 * self.wait_seconds[name] / self.granted[name]) if self.granted[name] else 0
+                for name in PRIORITIES
+            },
+            'max_wait_ms': {name: round(1000 * seconds) for name, seconds in self.max_wait_seconds.items()},
+            'throttled': self.throttled,
+            'tokens_used': self.tokens_used,
+            'requests_available': round(self._requests.level, 1) if self._requests else None,
+            'tokens_available': round(self._tokens.level) if self._tokens else None,
+            'shared_window_failures': self._shared.failures if self._shared is not None else 0
+        }
+
+
+# Process-wide scheduler shared by every LLM call
+llm_scheduler = LLMScheduler(
+    LLM_RPM_LIMIT,
+    LLM_TPM_LIMIT,
+    LLM_MAX_CONCURRENT,
+    LLM_INTERACTIVE_RESERVE,
+    LLM_SCHEDULER_BACKEND
+)
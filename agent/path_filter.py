@@ -0,0 +1,157 @@
+"""
+Compiled path filter for repository trees
+Decides which tree entries are worth analysing with one precompiled regular
+expression for skipped directories, evaluated once per directory, and a
+suffix tuple plus a name set for file names (both tested in C), instead of a
+Python loop over pattern lists for every path of a 100k+ entry tree
+"""
+
+import hashlib
+import json
+import re
+
+# Directories whose files are never analysed (matched as substrings of the path)
+SKIP_DIRS = [
+    'node_modules/', '.git/', 'dist/', 'build/', '.next/',
+    '__pycache__/', '.pytest_cache/', 'coverage/', 'venv/',
+    'env/', '.env/', 'target/', 'bin/', 'obj/'
+]
+
+RELEVANT_EXTENSIONS = [
+    '.js', '.jsx', '.ts', '.tsx', '.py', '.java', '.cpp', '.c', '.cs',
+    '.go', '.rs', '.php', '.rb', '.swift', '.kt', '.dart', '.vue',
+    '.html', '.css', '.scss', '.less', '.sql', '.json', '.yml', '.yaml',
+    '.md', '.txt', '.toml', '.ini', '.cfg', '.xml',
+    # Further languages tech stack detection counts
+    '.kts', '.mjs', '.cjs', '.cc', '.h', '.hpp', '.scala', '.sh'
+]
+
+# Always included, whatever their extension
+IMPORTANT_FILES = [
+    'README.md', 'package.json', 'requirements.txt', 'Cargo.toml',
+    'pom.xml', 'build.gradle', 'composer.json', 'Gemfile',
+    'setup.py', 'pyproject.toml', 'Dockerfile', 'docker-compose.yml',
+    # Manifests and tool markers tech stack detection parses
+    'go.mod', 'build.gradle.kts', 'Makefile'
+]
+
+# Keys a per-project filter config may set
+CONFIG_KEYS = (
+    'skip_dirs', 'extensions', 'important_files',
+    'extra_skip_dirs', 'extra_extensions', 'extra_files'
+)
+
+# Bound on remembered per-directory skip verdicts
+MAX_MEMOIZED_DIRS = 65536
+
+
+def _alternation(values):
+    # Longest first so overlapping alternatives never shadow each other
+    return '|'.join(re.escape(value) for value in sorted(set(values), key=len, reverse=True))
+
+
+class PathFilter:
+    """
+    Precompiled relevance test for tree paths
+
+    A path is relevant when it contains none of the skip directories and
+    either its file name is an important file or it ends with a relevant
+    extension - the same rules is_relevant_file has always applied.
+    """
+
+    def __init__(self, skip_dirs=None, extensions=None, important_files=None):
+        self.skip_dirs = tuple(SKIP_DIRS if skip_dirs is None else skip_dirs)
+        self.extensions = tuple(RELEVANT_EXTENSIONS if extensions is None else extensions)
+        self.important_files = tuple(IMPORTANT_FILES if important_files is None else important_files)
+
+        self._important = frozenset(self.important_files)
+        self._skip = re.compile(_alternation(self.skip_dirs) if self.skip_dirs else r'(?!)')
+
+        # Skip patterns ending in '/' can only match the directory part of a path,
+        # so their verdict is shared by every file in that directory. The directory
+        # regex is most of the cost of a path, so remembering it pays off (bounded
+        # by MAX_MEMOIZED_DIRS; see benchmark_path_filter.py)
+        self._memoize_dirs = all(skip_dir.endswith('/') for skip_dir in self.skip_dirs)
+        self._dir_verdicts = {}
+
+        # Short stable id of the rules, used to keep cached analyses per filter apart
+        rules = '\0'.join('|'.join(sorted(set(v))) for v in (self.skip_dirs, self.extensions, self.important_files))
+        self.fingerprint = hashlib.sha1(rules.encode()).hexdigest()[:12]
+
+    @staticmethod
+    def validate_config(config):
+        """
+        Check a per-project configuration before it is stored
+
+        Raises:
+            ValueError: on unknown keys or values that are not lists of strings
+        """
+        if not isinstance(config, dict):
+            raise ValueError("path filter must be an object")
+        unknown = set(config) - set(CONFIG_KEYS)
+        if unknown:
+            raise ValueError(f"unknown path filter keys: {', '.join(sorted(unknown))}")
+        for key, values in config.items():
+            if not isinstance(values, list) or not all(isinstance(value, str) and value for value in values):
+                raise ValueError(f"path filter '{key}' must be a list of non-empty strings")
+
+    @classmethod
+    def from_config(cls, config=None):
+        """
+        Build a filter from a per-project configuration
+
+        Args:
+            config: None for the defaults, or a dict (or its JSON text, as stored
+                in projects.path_filter) with any of
+                skip_dirs / extensions / important_files (replace the defaults)
+                extra_skip_dirs / extra_extensions / extra_files (extend them)
+
+        Returns:
+            PathFilter
+        """
+        if isinstance(config, PathFilter):
+            return config
+        if isinstance(config, str):
+            config = json.loads(config) if config.strip() else None
+        if not config:
+            return DEFAULT_PATH_FILTER
+        return cls(
+            skip_dirs=list(config.get('skip_dirs', SKIP_DIRS)) + list(config.get('extra_skip_dirs', [])),
+            extensions=list(config.get('extensions', RELEVANT_EXTENSIONS)) + list(config.get('extra_extensions', [])),
+            important_files=list(config.get('important_files', IMPORTANT_FILES)) + list(config.get('extra_files', []))
+        )
+
+    @property
+    def is_default(self):
+        return self.fingerprint == DEFAULT_FINGERPRINT
+
+    def _directory_skipped(self, dir_path):
+        skipped = self._dir_verdicts.get(dir_path)
+        if skipped is None:
+            if len(self._dir_verdicts) >= MAX_MEMOIZED_DIRS:
+                self._dir_verdicts.clear()
+            skipped = self._dir_verdicts[dir_path] = self._skip.search(dir_path) is not None
+        return skipped
+
+    def is_relevant(self, file_path):
+        """Check if a file is relevant for analysis"""
+        cut = file_path.rfind('/') + 1
+        if self._memoize_dirs:
+            if self._directory_skipped(file_path[:cut]):
+                return False
+        elif self._skip.search(file_path):
+            return False
+        return file_path.endswith(self.extensions) or file_path[cut:] in self._important
+
+    def is_skipped_directory(self, dir_path):
+        """Check if every file under a directory would be rejected by is_relevant"""
+        return self._skip.search(dir_path + '/') is not None
+
+    def filter_paths(self, paths):
+        """Return the relevant paths from an iterable, in order"""
+        is_relevant = self.is_relevant
+        return [path for path in paths if is_relevant(path)]
+
+
+DEFAULT_PATH_FILTER = PathFilter()
+DEFAULT_FINGERPRINT = DEFAULT_PATH_FILTER.fingerprint
@@ -1,20 +1,80 @@
-import requests
+import asyncio
+import os
+import io
+import aiohttp
 import base64
+import hashlib
+import itertools
 import json
+import re
+import tarfile
+from collections import ChainMap, deque
 from urllib.parse import urlparse
 
-async def analyze_repository(repo_url, github_token):
+from agent.analysis_cache import analysis_cache, FRESH, STALE
+from agent.blob_cache import blob_cache
+from agent.content_store import BlobView, ContentStore
+from agent.file_ranker import select_files_for_context
+from agent.path_filter import DEFAULT_PATH_FILTER, PathFilter
+from agent.git_mirror import (
+    ALLOW_LOCAL_REPO_SOURCES, GitMirrorError, default_branch, is_local_source, list_tree, local_source_name,
+    local_source_path, mirror_store, read_blobs, resolve_commit, run_git
+)
+from agent.tech_stack_detector import detect_tech_stack
+from agent.symbol_index import build_symbol_index
+from agent.github_client import github_client, github_get, github_headers, GITHUB_REQUEST_TIMEOUT
+
+# Number of GitHub requests one analysis may have in flight on the shared client
+MAX_CONCURRENT_FETCHES = int(os.getenv('GITHUB_MAX_CONCURRENT_FETCHES', '16'))
+
+# 'contents' reads files one API call each, 'tarball' streams the repository archive once,
+# 'mirror' reads a local bare clone kept up to date with incremental fetches
+REPO_INGESTION_MODE = os.getenv('REPO_INGESTION_MODE', 'contents')
+
+MAX_TOTAL_CONTENT_SIZE = 400000  # ~400KB limit for LLM context
+MAX_FILE_CONTENT_SIZE = 50000  # Skip very large files
+# GitHub lists at most this many files in a comparison
+MAX_COMPARE_FILES = 300
+# Owner recorded for repositories analysed from a local path
+LOCAL_OWNER = 'local'
+# The only repository URL form accepted from users: https://github.com/<owner>/<repo>
+COMMIT_SHA = re.compile(r'^[0-9a-f]{40}$')
+GITHUB_REPO_URL = re.compile(r'^https://github\.com/([A-Za-z0-9](?:[A-Za-z0-9-]*[A-Za-z0-9])?)/([A-Za-z0-9._-]+?)(?:\.git)?/?$')
+
+async def analyze_repository(repo_url, github_token, ingestion_mode=None, use_cache=True, path_filter=None,
+                             base_commit_sha=None, allow_local_sources=ALLOW_LOCAL_REPO_SOURCES):
     """
     Analyze a GitHub repository by reading its structure and key files
     
+    Results are cached per HEAD commit: a recently confirmed snapshot is
+    returned without touching GitHub, and an older one is returned at once
+    while a newer commit is looked for in the background.
+    
     Args:
-        repo_url: GitHub repository URL
+        repo_url: GitHub repository URL, or a local repository path / file:// URL
+            when allow_local_sources is set (local sources are always read in 'mirror' mode)
         github_token: GitHub access token
+        ingestion_mode: 'contents', 'tarball' or 'mirror' (defaults to REPO_INGESTION_MODE)
+        use_cache: Read and write the analysis snapshot cache
+        path_filter: Per-project PathFilter or its config dict (defaults to the standard rules)
+        base_commit_sha: Commit the project was last analysed at; when the repository
+            has moved on, only the files changed since then are fetched again
+        allow_local_sources: Accept local paths (defaults to ALLOW_LOCAL_REPO_SOURCES;
+            never enable it for URLs that come from users)
         
     Returns:
         dict: Analysis result with files, structure, and metadata
     """
     try:
+        path_filter = PathFilter.from_config(path_filter)
+        
+        if allow_local_sources and is_local_source(repo_url):
+            # Resolving a local HEAD is cheap, so skip straight to the per-commit snapshot lookup
+            local_path = local_source_path(repo_url)
+            return await analyze_commit(
+                LOCAL_OWNER, local_source_name(local_path), github_token, 'mirror', use_cache, path_filter, local_path
+            )
+        
         # Extract owner and repo name from URL
         owner, repo_name = extract_repo_info(repo_url)
         if not owner or not repo_name:
@@ -23,69 +83,295 @@ async def analyze_repository(repo_url, github_token):
                 'error': f"Invalid GitHub URL: {repo_url}"
             }
         
-        # Get repository information
-        repo_info = await get_repository_info(owner, repo_name, github_token)
-        if not repo_info['success']:
-            return repo_info
-        
-        # Get repository file structure
-        file_tree = await get_repository_tree(owner, repo_name, github_token)
-        if not file_tree['success']:
-            return file_tree
+        snapshot = None
+        if use_cache:
+            snapshot, state = await analysis_cache.alookup(owner, _cache_name(repo_name, path_filter))
+            if state == FRESH:
+                print(f"📦 Using cached analysis for {owner}/{repo_name}@{snapshot['commit_sha'][:8]}")
+                return snapshot
+            if state == STALE:
+                print(f"📦 Serving stale analysis for {owner}/{repo_name}, revalidating in background")
+                analysis_cache.revalidate_in_background(
+                    owner, _cache_name(repo_name, path_filter),
+                    lambda: analyze_commit(owner, repo_name, github_token, ingestion_mode, True, path_filter,
+                                           base_commit_sha=base_commit_sha)
+                )
+                return snapshot
         
-        # Read important files
-        file_contents = await read_important_files(
-            owner, repo_name, file_tree['files'], github_token
+        result = await analyze_commit(
+            owner, repo_name, github_token, ingestion_mode, use_cache, path_filter, base_commit_sha=base_commit_sha
         )
+        if not result['success'] and snapshot is not None:
+            # GitHub is unavailable; an expired snapshot is better than no context
+            print(f"⚠️ Analysis failed ({result['error']}), falling back to expired snapshot")
+            return snapshot
+        return result
+        
+    except Exception as e:
+        return {
+            'success': False,
+            'error': f"Repository analysis failed: {str(e)}"
+        }
+
+async def analyze_commit(owner, repo_name, github_token, ingestion_mode=None, use_cache=True, path_filter=None,
+                         local_path=None, base_commit_sha=None):
+    """
+    Resolve the HEAD commit and reuse its snapshot, or crawl the repository and store one
+    
+    In 'contents' mode a snapshot of an earlier commit (base_commit_sha, or the
+    last HEAD this cache analysed) is brought forward with the compare API
+    instead of listing the whole tree again.
+    """
+    try:
+        path_filter = path_filter or DEFAULT_PATH_FILTER
+        cache_name = _cache_name(repo_name, path_filter)
+        ingestion_mode = ingestion_mode or REPO_INGESTION_MODE
+        
+        if ingestion_mode == 'mirror':
+            # Repository info, HEAD and everything below come from a local bare mirror
+            mirror = await open_mirror(owner, repo_name, github_token, local_path)
+            if not mirror['success']:
+                return mirror
+            repo_info = {'success': True, 'data': mirror['repo_info']}
+            commit_sha = mirror['commit_sha']
+        else:
+            # Get repository information
+            repo_info = await get_repository_info(owner, repo_name, github_token)
+            if not repo_info['success']:
+                return repo_info
+            
+            # Pin the whole analysis to the commit at the tip of the default branch
+            commit_sha = await get_head_commit_sha(owner, repo_name, github_token, repo_info['data']['default_branch'])
+        
+        if use_cache and commit_sha:
+            snapshot = await analysis_cache.aget_snapshot(owner, cache_name, commit_sha)
+            if snapshot is not None:
+                await analysis_cache.amark_checked(owner, cache_name, commit_sha)
+                return snapshot
+        
+        if ingestion_mode == 'mirror':
+            # Tree listing and blob reads are local disk I/O
+            files = [file for file in await list_tree(mirror['git_dir'], commit_sha) if path_filter.is_relevant(file['path'])]
+            file_tree = {'success': True, 'files': files}
+            file_contents = await read_mirror_files(mirror['git_dir'], files)
+        elif ingestion_mode == 'tarball':
+            # Structure and contents both come from a single archive download
+            file_tree = await read_repository_archive(owner, repo_name, github_token, commit_sha, path_filter)
+            if not file_tree['success']:
+                return file_tree
+            file_contents = file_tree['contents']
+        else:
+            base_snapshot = None
+            if use_cache and commit_sha:
+                base_sha = base_commit_sha or await analysis_cache.ahead_sha(owner, cache_name)
+                if base_sha and base_sha != commit_sha:
+                    base_snapshot = await analysis_cache.aget_snapshot(owner, cache_name, base_sha)
+            
+            # Contents already read at the base commit, by blob SHA, are never fetched again
+            # (a lazy view: nothing is loaded until a file is actually reused)
+            known_contents = ChainMap({})
+            if base_snapshot:
+                known_contents.maps.append(BlobView(base_snapshot['files'], base_snapshot['file_structure']))
+            
+            changes = None
+            if base_snapshot:
+                changes = await apply_commit_comparison(
+                    owner, repo_name, github_token, base_snapshot, commit_sha, path_filter
+                )
+            
+            if changes:
+                file_tree = {'success': True, 'files': changes['files']}
+                known_contents.maps.insert(0, changes['contents'])
+            else:
+                # Get repository file structure
+                file_tree = await get_repository_tree(
+                    owner, repo_name, github_token, commit_sha or repo_info['data']['default_branch'], path_filter
+                )
+                if not file_tree['success']:
+                    return file_tree
+            
+            # Read important files
+            file_contents = await read_important_files(
+                owner, repo_name, file_tree['files'], github_token, known_contents
+            )
         
         # Analyze tech stack
-        tech_stack = analyze_tech_stack(file_contents, file_tree['files'])
+        tech_stack = await asyncio.to_thread(analyze_tech_stack, file_contents, file_tree['files'])
         
-        return {
+        # Symbol table for prompt retrieval, cached with the rest of this commit's snapshot
+        symbol_index = await asyncio.to_thread(build_symbol_index, file_contents)
+        
+        result = {
             'success': True,
             'repo_info': repo_info['data'],
+            'commit_sha': commit_sha,
             'files': file_contents,
             'file_structure': file_tree['files'],
             'tech_stack': tech_stack,
+            'symbol_index': symbol_index,
             'total_files': len(file_tree['files'])
         }
         
+        if use_cache and commit_sha:
+            await analysis_cache.astore(owner, cache_name, commit_sha, result)
+        
+        return result
+        
     except Exception as e:
         return {
             'success': False,
             'error': f"Repository analysis failed: {str(e)}"
         }
 
+async def open_mirror(owner, repo_name, github_token, local_path=None):
+    """
+    Prepare the git repository a 'mirror' analysis reads from
+    
+    GitHub repositories are synced into the local mirror store (cloned once,
+    then fetched incrementally); local paths are read in place.
+    
+    Returns:
+        dict: {'success', 'git_dir', 'repo_info', 'commit_sha'}
+    """
+    try:
+        if local_path:
+            git_dir = (await run_git('-C', local_path, 'rev-parse', '--absolute-git-dir')).decode().strip()
+            branch = await default_branch(git_dir)
+            repo_info = {
+                'name': os.path.basename(local_path.rstrip('/')),
+                'full_name': local_path,
+                'description': '',
+                'language': '',
+                'size': 0,
+                'stargazers_count': 0,
+                'topics': [],
+                'default_branch': branch or 'HEAD'
+            }
+            commit_sha = await resolve_commit(git_dir)
+        else:
+            # Metadata still comes from the API (one conditional call); content never does
+            info = await get_repository_info(owner, repo_name, github_token)
+            if not info['success']:
+                return info
+            repo_info = info['data']
+            git_dir = await mirror_store.sync(owner, repo_name, github_token)
+            commit_sha = await resolve_commit(git_dir, f"refs/heads/{repo_info['default_branch']}")
+        
+        return {'success': True, 'git_dir': git_dir, 'repo_info': repo_info, 'commit_sha': commit_sha}
+    
+    except GitMirrorError as e:
+        return {'success': False, 'error': f'Failed to open git mirror: {str(e)}'}
+
+async def read_mirror_files(git_dir, files):
+    """Read the ranked selection of files from a git repository with one batched cat-file"""
+    max_total_size = MAX_TOTAL_CONTENT_SIZE
+    max_file_size = MAX_FILE_CONTENT_SIZE
+    selected_files, remaining_files = await asyncio.to_thread(
+        select_files_for_context, files, max_total_size, max_file_size
+    )
+    
+    blobs = await read_blobs(git_dir, [file['sha'] for file in selected_files])
+    file_contents = ContentStore()
+    total_size = 0
+    for file in selected_files:
+        content = blobs.get(file['sha'])
+        if content is not None:
+            file_contents[file['path']] = content
+            total_size += len(content)
+    
+    # Binary files in the selection leave room for the next best candidates that fit
+    top_up = []
+    planned_size = total_size
+    for file in remaining_files:
+        if planned_size + file.get('size', 0) <= max_total_size:
+            top_up.append(file)
+            planned_size += file.get('size', 0)
+    if top_up:
+        blobs = await read_blobs(git_dir, [file['sha'] for file in top_up])
+        for file in top_up:
+            if file['sha'] in blobs:
+                file_contents[file['path']] = blobs[file['sha']]
+    
+    return file_contents
+
 def extract_repo_info(repo_url):
-    """Extract owner and repository name from GitHub URL"""
+    """Extract owner and repository name from a https://github.com/<owner>/<repo> URL"""
+    match = GITHUB_REPO_URL.match((repo_url or '').strip())
+    if not match or match.group(2) in ('.', '..'):
+        return None, None
+    return match.group(1), match.group(2)
+
+def is_github_repo_url(repo_url):
+    """True for the https://github.com/<owner>/<repo> URLs projects may be created from"""
+    return extract_repo_info(repo_url) != (None, None)
+
+async def apply_commit_comparison(owner, repo_name, github_token, base_snapshot, head_sha, path_filter):
+    """
+    Bring an earlier analysis forward to head_sha using the compare API
+    
+    Removed files are dropped from the stored structure and only changed or
+    added blobs are fetched, so a refresh costs O(changed files).
+    
+    Returns:
+        dict: {'files', 'contents' (sha -> content)} for head_sha, or None when
+        a full analysis is needed (diverged history or too many changes)
+    """
     try:
-        if 'github.com' not in repo_url:
-            return None, None
-            
-        # Handle different URL formats
-        if repo_url.endswith('.git'):
-            repo_url = repo_url[:-4]
-            
-        parsed = urlparse(repo_url)
-        path_parts = parsed.path.strip('/').split('/')
+        base_sha = base_snapshot['commit_sha']
+        url = f"https://api.github.com/repos/{owner}/{repo_name}/compare/{base_sha}...{head_sha}"
+        # A comparison between two commits never changes; don't keep it as a conditional entry
+        status, comparison = await fetch_github_json(url, github_token, conditional=False)
+        if status != 200 or comparison.get('status') not in ('ahead', 'identical'):
+            # 'diverged' and 'behind' (force pushes) diff against a merge base, not our snapshot
+            return None
+        changed = comparison.get('files', [])
+        if len(changed) >= MAX_COMPARE_FILES:
+            return None  # The file list is capped; it may be incomplete
         
-        if len(path_parts) >= 2:
-            return path_parts[0], path_parts[1]
+        structure = {file['path']: file for file in base_snapshot['file_structure']}
+        updated = []
+        for change in changed:
+            if change['status'] == 'renamed' and change.get('previous_filename'):
+                structure.pop(change['previous_filename'], None)
+            structure.pop(change['filename'], None)
+            if change['status'] != 'removed' and path_filter.is_relevant(change['filename']):
+                updated.append({
+                    'path': change['filename'],
+                    'sha': change['sha'],
+                    'url': f"https://api.github.com/repos/{owner}/{repo_name}/git/blobs/{change['sha']}"
+                })
         
-        return None, None
-    except:
-        return None, None
+        # Changed blobs are fetched now for their sizes, which the file ranking needs; the
+        # contents are handed to read_important_files, so selected files are not fetched twice
+        contents = ContentStore()
+        async for file, content in iter_file_contents(owner, repo_name, updated, github_token):
+            if content is None:
+                # Binary or unreadable: with no size it would look free to the selection
+                print(f"⚠️ Leaving {file['path']} out of the refreshed snapshot (content unavailable)")
+                continue
+            file['size'] = len(content.encode('utf-8'))
+            contents[file['sha']] = content
+            structure[file['path']] = file
+        
+        print(f"🔁 {owner}/{repo_name}: {len(changed)} files changed since {base_sha[:8]}, refreshed incrementally")
+        return {'files': list(structure.values()), 'contents': contents}
+    
+    except Exception as e:
+        print(f"⚠️ Incremental refresh failed, running a full analysis: {str(e)}")
+        return None
+
+def _cache_name(repo_name, path_filter):
+    """Snapshots depend on the filter, so non-default filters get their own cache namespace"""
+    return repo_name if path_filter.is_default else f"{repo_name}~{path_filter.fingerprint}"
 
 async def get_repository_info(owner, repo_name, github_token):
     """Get basic repository information"""
     try:
         url = f"https://api.github.com/repos/{owner}/{repo_name}"
-        headers = {"Authorization": f"token {github_token}"}
         
-        response = requests.get(url, headers=headers)
+        status, data = await fetch_github_json(url, github_token)
         
-        if response.status_code == 200:
-            data = response.json()
+        if status == 200:
             return {
                 'success': True,
                 'data': {
@@ -95,39 +381,71 @@ async def get_repository_info(owner, repo_name, github_token):
                     'language': data.get('language', ''),
                     'size': data['size'],
                     'stargazers_count': data['stargazers_count'],
-                    'topics': data.get('topics', [])
+                    'topics': data.get('topics', []),
+                    'default_branch': data.get('default_branch', 'main')
                 }
             }
-        elif response.status_code == 404:
+        elif status == 404:
             return {'success': False, 'error': 'Repository not found'}
         else:
-            return {'success': False, 'error': f'GitHub API error: {response.status_code}'}
+            return {'success': False, 'error': f'GitHub API error: {status}'}
             
     except Exception as e:
         return {'success': False, 'error': f'Failed to get repository info: {str(e)}'}
 
-async def get_repository_tree(owner, repo_name, github_token):
-    """Get the file tree of the repository"""
+async def get_head_commit_sha(owner, repo_name, github_token, branch=None):
+    """Resolve the commit SHA at the tip of a branch (default branch when omitted), or None"""
     try:
-        url = f"https://api.github.com/repos/{owner}/{repo_name}/git/trees/main?recursive=1"
-        headers = {"Authorization": f"token {github_token}"}
-        
-        response = requests.get(url, headers=headers)
+        url = f"https://api.github.com/repos/{owner}/{repo_name}/commits/{branch or 'HEAD'}"
+        # The sha media type returns just the 40-character id instead of the full commit
+        response = await github_get(
+            url, github_token, accept='application/vnd.github.sha', response_type='text'
+        )
+        if response.status_code == 200:
+            return response.text.strip()
+        return None
+    except:
+        return None
+
+def is_commit_sha(ref):
+    """True for a full commit SHA, whose tree and contents can never change"""
+    return bool(ref) and COMMIT_SHA.match(ref) is not None
+
+async def get_repository_tree(owner, repo_name, github_token, ref=None, path_filter=None):
+    """
+    Get the file tree of the repository
+    
+    Args:
+        ref: Commit SHA or branch to read; pinning to the analysed commit keeps
+            the tree consistent with the rest of the snapshot
+        path_filter: PathFilter deciding which entries are kept
+    """
+    path_filter = path_filter or DEFAULT_PATH_FILTER
+    try:
+        url = f"https://api.github.com/repos/{owner}/{repo_name}/git/trees/{ref or 'HEAD'}?recursive=1"
         
-        # Try 'main' branch first, then 'master'
-        if response.status_code == 404:
-            url = f"https://api.github.com/repos/{owner}/{repo_name}/git/trees/master?recursive=1"
-            response = requests.get(url, headers=headers)
+        # A tree pinned to a commit never changes and can run to megabytes; only branch trees are revalidated
+        status, tree_data = await fetch_github_json(url, github_token, conditional=not is_commit_sha(ref))
         
-        if response.status_code == 200:
-            tree_data = response.json()
+        if status == 200:
+            if tree_data.get('truncated'):
+                # GitHub caps recursive listings; walk the subtrees separately instead
+                print(f"🌳 Tree for {owner}/{repo_name} is truncated, walking subtrees in parallel")
+                entries = await walk_truncated_tree(
+                    owner, repo_name, tree_data['sha'], github_token, path_filter=path_filter
+                )
+            else:
+                entries = tree_data.get('tree', [])
+            
             files = []
+            is_relevant = path_filter.is_relevant
             
-            for item in tree_data.get('tree', []):
-                if item['type'] == 'blob' and is_relevant_file(item['path']):
+            for item in entries:
+                if item['type'] == 'blob' and is_relevant(item['path']):
                     files.append({
                         'path': item['path'],
                         'size': item.get('size', 0),
+                        'sha': item.get('sha'),
                         'url': item['url']
                     })
             
@@ -136,154 +454,283 @@ async def get_repository_tree(owner, repo_name, github_token):
                 'files': files
             }
         else:
-            return {'success': False, 'error': f'Failed to get repository tree: {response.status_code}'}
+            return {'success': False, 'error': f'Failed to get repository tree: {status}'}
             
     except Exception as e:
         return {'success': False, 'error': f'Failed to get repository tree: {str(e)}'}
 
-def is_relevant_file(file_path):
-    """Check if a file is relevant for analysis"""
-    # Skip common directories
-    skip_dirs = [
-        'node_modules/', '.git/', 'dist/', 'build/', '.next/', 
-        '__pycache__/', '.pytest_cache/', 'coverage/', 'venv/', 
-        'env/', '.env/', 'target/', 'bin/', 'obj/'
-    ]
-    
-    for skip_dir in skip_dirs:
-        if skip_dir in file_path:
-            return False
-    
-    # Include relevant file extensions
-    relevant_extensions = [
-        '.js', '.jsx', '.ts', '.tsx', '.py', '.java', '.cpp', '.c', '.cs',
-        '.go', '.rs', '.php', '.rb', '.swift', '.kt', '.dart', '.vue',
-        '.html', '.css', '.scss', '.less', '.sql', '.json', '.yml', '.yaml',
-        '.md', '.txt', '.toml', '.ini', '.cfg', '.xml'
-    ]
-    
-    # Always include important config files
-    important_files = [
-        'README.md', 'package.json', 'requirements.txt', 'Cargo.toml',
-        'pom.xml', 'build.gradle', 'composer.json', 'Gemfile',
-        'setup.py', 'pyproject.toml', 'Dockerfile', 'docker-compose.yml'
-    ]
-    
-    file_name = file_path.split('/')[-1]
-    if file_name in important_files:
-        return True
+async def walk_truncated_tree(owner, repo_name, tree_sha, github_token, prefix='', semaphore=None, path_filter=None):
+    """
+    List every entry under a tree whose recursive listing was truncated
     
-    return any(file_path.endswith(ext) for ext in relevant_extensions)
-
-async def read_important_files(owner, repo_name, files, github_token):
-    """Read content of important files"""
-    file_contents = {}
-    total_size = 0
-    max_total_size = 400000  # ~400KB limit for LLM context
+    The tree's direct children are listed, then each subtree is fetched
+    recursively in parallel; any subtree that is itself truncated is walked
+    the same way. Directories the analysis always skips are not fetched.
+    """
+    semaphore = semaphore or asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
     
-    # Prioritize files by importance
-    priority_files = []
-    regular_files = []
+    async with semaphore:
+        url = f"https://api.github.com/repos/{owner}/{repo_name}/git/trees/{tree_sha}"
+        status, tree_data = await fetch_github_json(url, github_token, conditional=False)
+    if status != 200:
+        raise Exception(f'Failed to list subtree {prefix or "/"}: {status}')
     
-    for file in files:
-        file_name = file['path'].split('/')[-1]
-        if file_name in ['README.md', 'package.json', 'requirements.txt', 'setup.py']:
-            priority_files.append(file)
+    entries = []
+    subtrees = []
+    for item in tree_data.get('tree', []):
+        path = prefix + item['path']
+        if item['type'] == 'tree':
+            if not is_skipped_directory(path, path_filter):
+                subtrees.append((path, item['sha']))
         else:
-            regular_files.append(file)
+            entries.append({**item, 'path': path})
     
-    # Read priority files first
-    for file in priority_files + regular_files:
-        if total_size > max_total_size:
-            break
-            
-        try:
-            content = await read_file_content(owner, repo_name, file['path'], github_token)
-            if content and len(content) < 50000:  # Skip very large files
+    async def list_subtree(path, sha):
+        async with semaphore:
+            url = f"https://api.github.com/repos/{owner}/{repo_name}/git/trees/{sha}?recursive=1"
+            status, subtree_data = await fetch_github_json(url, github_token, conditional=False)
+        if status != 200:
+            raise Exception(f'Failed to list subtree {path}: {status}')
+        if subtree_data.get('truncated'):
+            return await walk_truncated_tree(owner, repo_name, sha, github_token, path + '/', semaphore, path_filter)
+        return [{**item, 'path': f"{path}/{item['path']}"} for item in subtree_data.get('tree', [])]
+    
+    for subtree_entries in await asyncio.gather(*(list_subtree(path, sha) for path, sha in subtrees)):
+        entries.extend(subtree_entries)
+    
+    return entries
+
+async def fetch_github_json(url, github_token, conditional=True):
+    """
+    GET a GitHub API URL through the shared conditional-request layer
+    
+    Returns:
+        tuple: (status code, decoded JSON body or None)
+    """
+    response = await github_get(url, github_token, conditional=conditional)
+    return response.status_code, response.json()
+
+def is_skipped_directory(dir_path, path_filter=None):
+    """Check if every file under a directory would be rejected by is_relevant_file"""
+    return (path_filter or DEFAULT_PATH_FILTER).is_skipped_directory(dir_path)
+
+def is_relevant_file(file_path, path_filter=None):
+    """Check if a file is relevant for analysis (see agent.path_filter for the rules)"""
+    return (path_filter or DEFAULT_PATH_FILTER).is_relevant(file_path)
+
+async def read_important_files(owner, repo_name, files, github_token, known_contents=None):
+    """
+    Read content of important files
+    
+    Args:
+        known_contents: Optional blob SHA -> content already in hand (e.g. from
+            the previous analysis), used before the blob cache and the network
+    
+    Returns:
+        ContentStore: path -> content in ranked order, within the shared memory budget
+    """
+    file_contents = ContentStore()
+    total_size = 0
+    max_total_size = MAX_TOTAL_CONTENT_SIZE
+    max_file_size = MAX_FILE_CONTENT_SIZE
+    
+    # Rank every candidate from tree metadata and pick the best set that fits the budget
+    # (off the event loop, since fan-in reads whatever the blob cache already holds)
+    selected_files, remaining_files = await asyncio.to_thread(
+        select_files_for_context, files, max_total_size, max_file_size
+    )
+    
+    # The first batch is exactly the ranked selection. Another batch only runs
+    # when failed reads left room under the limit, taking the next best
+    # remaining candidates that still fit.
+    batch = selected_files
+    pending = iter(remaining_files)
+    while batch:
+        # Contents arrive in ranked order regardless of completion order
+        async for file, content in iter_file_contents(owner, repo_name, batch, github_token, known_contents):
+            if content and len(content) < max_file_size:
                 file_contents[file['path']] = content
                 total_size += len(content)
-        except:
-            continue  # Skip files that can't be read
+        
+        batch = []
+        planned_size = total_size
+        for file in pending:
+            if planned_size + file.get('size', 0) > max_total_size:
+                continue
+            batch.append(file)
+            planned_size += file.get('size', 0)
     
     return file_contents
 
-async def read_file_content(owner, repo_name, file_path, github_token):
-    """Read the content of a specific file"""
+async def iter_file_contents(owner, repo_name, files, github_token, known_contents=None):
+    """
+    Fetch and decode files, yielding (file, content or None) in the order given
+    
+    At most MAX_CONCURRENT_FETCHES reads are in flight, so only that many
+    responses are held undecoded at once however long the list is.
+    """
+    known_contents = known_contents or {}
+    
+    async def fetch(file):
+        if file.get('sha') in known_contents:
+            return known_contents[file['sha']]
+        try:
+            return await read_file_content(
+                owner, repo_name, file['path'], github_token, sha=file.get('sha')
+            )
+        except:
+            return None  # Skip files that can't be read
+    
+    files = iter(files)
+    in_flight = deque(
+        (file, asyncio.ensure_future(fetch(file))) for file in itertools.islice(files, MAX_CONCURRENT_FETCHES)
+    )
+    try:
+        while in_flight:
+            file, task = in_flight.popleft()
+            content = await task
+            next_file = next(files, None)
+            if next_file is not None:
+                in_flight.append((next_file, asyncio.ensure_future(fetch(next_file))))
+            yield file, content
+    finally:
+        for _, task in in_flight:
+            task.cancel()
+
+async def read_file_content(owner, repo_name, file_path, github_token, sha=None):
+    """
+    Read the content of a specific file
+    
+    When the blob SHA from the tree is known the content is served from the
+    blob cache, and misses are fetched through the content-addressed blobs API
+    and cached for every later analysis.
+    """
     try:
-        url = f"https://api.github.com/repos/{owner}/{repo_name}/contents/{file_path}"
-        headers = {"Authorization": f"token {github_token}"}
+        if sha:
+            cached = await blob_cache.aget(sha)
+            if cached is not None:
+                return cached
+            url = f"https://api.github.com/repos/{owner}/{repo_name}/git/blobs/{sha}"
+        else:
+            url = f"https://api.github.com/repos/{owner}/{repo_name}/contents/{file_path}"
         
-        response = requests.get(url, headers=headers)
+        # Blob bodies are immutable and already kept by the blob cache
+        status, file_data = await fetch_github_json(url, github_token, conditional=not sha)
         
-        if response.status_code == 200:
-            file_data = response.json()
+        if status == 200:
             if file_data.get('encoding') == 'base64':
                 content = base64.b64decode(file_data['content']).decode('utf-8')
+                if sha:
+                    await blob_cache.aput(sha, content)
                 return content
         
         return None
     except:
         return None
 
-def analyze_tech_stack(file_contents, file_list):
-    """Analyze the technology stack based on files"""
-    tech_stack = {
-        'languages': set(),
-        'frameworks': set(),
-        'tools': set(),
-        'databases': set()
-    }
-    
-    # Analyze by file extensions
-    for file_info in file_list:
-        file_path = file_info['path']
-        if file_path.endswith('.js') or file_path.endswith('.jsx'):
-            tech_stack['languages'].add('JavaScript')
-        elif file_path.endswith('.ts') or file_path.endswith('.tsx'):
-            tech_stack['languages'].add('TypeScript')
-        elif file_path.endswith('.py'):
-            tech_stack['languages'].add('Python')
-        elif file_path.endswith('.java'):
-            tech_stack['languages'].add('Java')
-        elif file_path.endswith('.go'):
-            tech_stack['languages'].add('Go')
-        elif file_path.endswith('.rs'):
-            tech_stack['languages'].add('Rust')
-    
-    # Analyze package.json for JavaScript frameworks
-    if 'package.json' in file_contents:
+class _StreamBridge(io.RawIOBase):
+    """Blocking file object over an aiohttp response stream, read from a worker thread"""
+    
+    def __init__(self, stream, loop):
+        self._stream = stream
+        self._loop = loop
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, buffer):
+        chunk = asyncio.run_coroutine_threadsafe(self._stream.read(len(buffer)), self._loop).result()
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
+async def read_repository_archive(owner, repo_name, github_token, ref=None, path_filter=None):
+    """
+    Build the file structure and read file contents from one tarball download
+    
+    The archive is decompressed as it streams in. Every readable candidate is
+    buffered in a ContentStore (spilling past the shared memory budget), then
+    ranked with select_files_for_context like the other modes, and only the
+    selection is kept. Pass the analysed commit SHA as ref to keep the archive
+    consistent with the rest of the snapshot.
+    
+    Returns:
+        dict: {'success', 'files', 'contents'} shaped like get_repository_tree
+        plus read_important_files
+    """
+    try:
+        url = f"https://api.github.com/repos/{owner}/{repo_name}/tarball/{ref or ''}".rstrip('/')
+        # Archives can take longer than a JSON call; only bound the idle time
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=GITHUB_REQUEST_TIMEOUT)
+        
+        async with github_client.get(url, github_token, headers=github_headers(github_token), timeout=timeout) as response:
+            if response.status != 200:
+                return {'success': False, 'error': f'Failed to download repository archive: {response.status}'}
+            
+            stream = io.BufferedReader(_StreamBridge(response.content, asyncio.get_running_loop()))
+            files, candidates = await asyncio.to_thread(_read_tar_stream, stream, path_filter)
+        
+        # The archive arrives in tree order; keep the ranked selection, best-first like read_important_files
         try:
-            package_data = json.loads(file_contents['package.json'])
-            dependencies = {**package_data.get('dependencies', {}), 
-                          **package_data.get('devDependencies', {})}
+            readable = [file for file in files if file['path'] in candidates]
+            selected_files, _ = await asyncio.to_thread(
+                select_files_for_context, readable, MAX_TOTAL_CONTENT_SIZE, MAX_FILE_CONTENT_SIZE
+            )
+            contents = ContentStore((file['path'], candidates[file['path']]) for file in selected_files)
+        finally:
+            candidates.close()
+        
+        # Files read from the archive warm the blob cache for later analyses
+        for file in files:
+            if file['path'] in contents:
+                await blob_cache.aput(file['sha'], contents[file['path']])
+        
+        return {
+            'success': True,
+            'files': files,
+            'contents': contents
+        }
+    
+    except Exception as e:
+        return {'success': False, 'error': f'Failed to read repository archive: {str(e)}'}
+
+def _read_tar_stream(stream, path_filter=None):
+    """Walk a streamed tarball once, returning relevant files and the text of those small enough to select"""
+    files = []
+    contents = ContentStore()
+    
+    with tarfile.open(fileobj=stream, mode='r|gz') as archive:
+        for member in archive:
+            if not member.isfile():
+                continue
             
-            if 'react' in dependencies:
-                tech_stack['frameworks'].add('React')
-            if 'next' in dependencies:
-                tech_stack['frameworks'].add('Next.js')
-            if 'vue' in dependencies:
-                tech_stack['frameworks'].add('Vue.js')
-            if 'express' in dependencies:
-                tech_stack['frameworks'].add('Express.js')
-            if 'fastapi' in str(dependencies).lower():
-                tech_stack['frameworks'].add('FastAPI')
-        except:
-            pass
-    
-    # Analyze requirements.txt for Python frameworks
-    if 'requirements.txt' in file_contents:
-        requirements = file_contents['requirements.txt'].lower()
-        if 'django' in requirements:
-            tech_stack['frameworks'].add('Django')
-        if 'flask' in requirements:
-            tech_stack['frameworks'].add('Flask')
-        if 'fastapi' in requirements:
-            tech_stack['frameworks'].add('FastAPI')
-    
-    # Convert sets to lists for JSON serialization
-    return {
-        'languages': list(tech_stack['languages']),
-        'frameworks': list(tech_stack['frameworks']),
-        'tools': list(tech_stack['tools']),
-        'databases': list(tech_stack['databases'])
-    } 
\ No newline at end of file
+            # GitHub prefixes every entry with an '<owner>-<repo>-<sha>/' directory
+            path = member.name.split('/', 1)[-1]
+            if not is_relevant_file(path, path_filter):
+                continue
+            
+            file = {'path': path, 'size': member.size, 'sha': None, 'url': None}
+            files.append(file)
+            
+            if member.size >= MAX_FILE_CONTENT_SIZE:
+                continue
+            
+            data = archive.extractfile(member).read()
+            try:
+                content = data.decode('utf-8')
+            except UnicodeDecodeError:
+                continue  # Skip binary files
+            
+            # Same object id GitHub reports in the tree, so the blob cache stays content-addressed
+            file['sha'] = hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+            contents[path] = content
+    
+    return files, contents
+
+def analyze_tech_stack(file_contents, file_list):
+    """
+    Analyze the technology stack based on files
+    
+    Manifests that were not read for the analysis are taken from the blob
+    cache, so this never touches the network (but does read the disk).
+    """
+    return detect_tech_stack(file_contents, file_list, read_blob=blob_cache.get)
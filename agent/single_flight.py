@@ -0,0 +1,175 @@
+"""
+Single-flight day generation
+Completing a task, forcing a regeneration and project setup can all start
+generation of the same (project_id, day_number). Concurrent callers in one
+process attach to the generation already running; across workers a Postgres
+advisory lock makes the second worker wait for the first and reuse its result
+instead of asking the model again and inserting duplicate concepts
+"""
+
+import asyncio
+import os
+
+from sqlalchemy import text
+
+from app.database_config import engine
+from agent.llm_scheduler import SharedPriority, current_priority, llm_priority
+
+DAY_GENERATION_LOCK_TIMEOUT = float(os.getenv('DAY_GENERATION_LOCK_TIMEOUT', '900'))  # Seconds to wait on another worker
+DAY_GENERATION_LOCK_POLL = float(os.getenv('DAY_GENERATION_LOCK_POLL', '2'))
+
+# First key of the two-key advisory lock form, so these locks can't collide with other users of advisory locks
+_DAY_LOCK_NAMESPACE = 0x6767  # "gg"
+
+
+class AdvisoryLock:
+    """
+    Session-level pg advisory lock on a dedicated AUTOCOMMIT connection
+
+    The lock lives as long as the connection, so a worker that dies mid
+    generation releases it automatically. Locking is skipped (and every caller
+    proceeds) when the database is not Postgres or can't be reached.
+    """
+
+    def __init__(self, lock_id):
+        self.lock_id = lock_id
+        self.waited = False  # True when another worker held the lock first
+        self._connection = None
+
+    async def acquire(self, timeout=DAY_GENERATION_LOCK_TIMEOUT, poll=DAY_GENERATION_LOCK_POLL):
+        """Wait until the lock is ours; returns False if it could not be taken in time"""
+        if engine.dialect.name != 'postgresql':
+            return True
+        try:
+            self._connection = await engine.connect()
+            self._connection = await self._connection.execution_options(isolation_level="AUTOCOMMIT")
+        except Exception as e:
+            print(f"⚠️ Advisory lock unavailable, continuing without cross-worker coordination: {str(e)}")
+            self._connection = None
+            return True
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            result = await self._connection.execute(
+                text("SELECT pg_try_advisory_lock(:namespace, :lock_id)"),
+                {"namespace": _DAY_LOCK_NAMESPACE, "lock_id": self.lock_id}
+            )
+            if result.scalar():
+                return True
+            self.waited = True
+            if loop.time() >= deadline:
+                await self._close()
+                return False
+            await asyncio.sleep(poll)
+
+    async def release(self):
+        if self._connection is None:
+            return
+        try:
+            await self._connection.execute(
+                text("SELECT pg_advisory_unlock(:namespace, :lock_id)"),
+                {"namespace": _DAY_LOCK_NAMESPACE, "lock_id": self.lock_id}
+            )
+        except Exception as e:
+            # Closing the connection below drops the lock anyway
+            print(f"⚠️ Failed to release advisory lock {self.lock_id}: {str(e)}")
+        await self._close()
+
+    async def _close(self):
+        try:
+            await self._connection.close()
+        except Exception:
+            pass
+        self._connection = None
+
+
+def day_lock_id(project_id, day_number):
+    """Pack (project_id, day_number) into the int4 second key of an advisory lock"""
+    return ((int(project_id) * 16) + int(day_number)) & 0x7FFFFFFF
+
+
+class DayGenerationFlights:
+    """In-process registry of running day generations, one shared future per (project_id, day_number)"""
+
+    def __init__(self):
+        self._flights = {}
+        self._priorities = {}  # (project_id, day_number) -> SharedPriority the flight's LLM calls run at
+        self.started = 0
+        self.coalesced = 0
+
+    def in_flight(self, project_id, day_number):
+        flight = self._flights.get((project_id, day_number))
+        return flight is not None and not flight.done()
+
+    def raise_priority(self, project_id, day_number, priority):
+        """Let a more urgent caller speed up a running generation (e.g. on-demand attaching to a prefetch)"""
+        shared = self._priorities.get((project_id, day_number))
+        if shared is not None and self.in_flight(project_id, day_number):
+            shared.raise_to(priority)
+
+    async def run(self, project_id, day_number, coroutine_factory, already_done=None):
+        """
+        Run coroutine_factory() once for a project day, or attach to the run already in progress
+
+        Args:
+            project_id: Database project ID
+            day_number: Day being generated
+            coroutine_factory: Zero-argument callable returning the generation coroutine
+            already_done: Optional async callable returning a result when, after
+                waiting on another worker's lock, the day turns out to be generated
+
+        Returns:
+            dict: The generation result, shared by every attached caller
+        """
+        key = (project_id, day_number)
+        flight = self._flights.get(key)
+        if flight is not None and not flight.done():
+            self.coalesced += 1
+            print(f"🔗 Day {day_number} of project {project_id} is already being generated; waiting for it")
+            self.raise_priority(project_id, day_number, current_priority())
+        else:
+            self.started += 1
+            # The flight's LLM calls follow a priority that later, more urgent callers can raise
+            shared = SharedPriority(current_priority())
+            with llm_priority(shared):
+                flight = asyncio.ensure_future(self._lead(project_id, day_number, coroutine_factory, already_done))
+            self._flights[key] = flight
+            self._priorities[key] = shared
+            flight.add_done_callback(lambda done: self._forget(key, done))
+        # A caller that is cancelled must not cancel the generation the others are waiting on
+        return await asyncio.shield(flight)
+
+    def _forget(self, key, flight):
+        if self._flights.get(key) is flight:
+            self._flights.pop(key, None)
+            self._priorities.pop(key, None)
+
+    async def _lead(self, project_id, day_number, coroutine_factory, already_done):
+        lock = AdvisoryLock(day_lock_id(project_id, day_number))
+        if not await lock.acquire():
+            return {
+                'success': False,
+                'error': f"Timed out waiting for another worker to finish generating Day {day_number}"
+            }
+        try:
+            if lock.waited and already_done is not None:
+                result = await already_done()
+                if result is not None:
+                    self.coalesced += 1
+                    print(f"🔗 Day {day_number} of project {project_id} was generated by another worker")
+                    return result
+            return await coroutine_factory()
+        finally:
+            await lock.release()
+
+    def stats(self):
+        return {
+            'in_flight': sum(1 for flight in self._flights.values() if not flight.done()),
+            'started': self.started,
+            'coalesced': self.coalesced
+        }
+
+
+# Process-wide registry shared by every path that generates day content
+day_generation_flights = DayGenerationFlights()
@@ -0,0 +1,329 @@
+"""
+Per-repository symbol index
+Parses the fetched source files into a compact table of modules, classes,
+functions and methods with their line spans, plus each module's imports.
+Python is parsed with `ast`; JavaScript/TypeScript and Go use a lightweight
+lexer that masks strings and comments and matches braces. The index is stored
+in the analysis snapshot, so it is built once per commit SHA, and prompts use
+it to quote just the definitions relevant to a question
+"""
+
+import ast
+import posixpath
+import re
+
+SYMBOL_INDEX_VERSION = 1
+
+LANGUAGES = {
+    '.py': 'python', '.js': 'javascript', '.jsx': 'javascript', '.mjs': 'javascript', '.cjs': 'javascript',
+    '.ts': 'typescript', '.tsx': 'typescript', '.go': 'go'
+}
+
+# Longest definition quoted in a prompt; longer ones are cut with a marker
+MAX_SNIPPET_LINES = 40
+
+_STOPWORDS = {
+    'the', 'and', 'for', 'this', 'that', 'with', 'from', 'what', 'how', 'why', 'does', 'are', 'can',
+    'you', 'your', 'into', 'use', 'used', 'using', 'about', 'explain', 'code', 'file', 'function',
+    'class', 'method', 'work', 'works', 'where', 'when', 'which', 'should', 'would', 'there', 'day'
+}
+
+
+# ---------- Python ----------
+
+def _python_signature(node):
+    try:
+        arguments = ast.unparse(node.args)
+    except Exception:
+        arguments = '...'
+    prefix = 'async def' if isinstance(node, ast.AsyncFunctionDef) else 'def'
+    return f"{prefix} {node.name}({arguments})"
+
+
+def index_python(source):
+    tree = ast.parse(source)
+    imports = []
+    symbols = []
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            imports.append('.' * node.level + (node.module or ''))
+
+    def visit(body, parent=None):
+        for node in body:
+            if isinstance(node, ast.ClassDef):
+                bases = ', '.join(ast.unparse(base) for base in node.bases)
+                symbols.append({
+                    'name': node.name, 'kind': 'class', 'start': node.lineno, 'end': node.end_lineno,
+                    'sig': f"class {node.name}({bases})" if bases else f"class {node.name}",
+                    'doc': (ast.get_docstring(node) or '').split('\n', 1)[0]
+                })
+                visit(node.body, node.name)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                symbols.append({
+                    'name': f"{parent}.{node.name}" if parent else node.name,
+                    'kind': 'method' if parent else 'function',
+                    'start': node.decorator_list[0].lineno if node.decorator_list else node.lineno,
+                    'end': node.end_lineno,
+                    'sig': _python_signature(node),
+                    'doc': (ast.get_docstring(node) or '').split('\n', 1)[0]
+                })
+
+    visit(tree.body)
+    return {'doc': (ast.get_docstring(tree) or '').split('\n', 1)[0], 'imports': imports, 'symbols': symbols}
+
+
+# ---------- brace languages ----------
+
+def _mask(source, quotes):
+    """Blank out comments and string bodies (keeping newlines) so braces can be counted"""
+    out = list(source)
+    i, n = 0, len(source)
+    while i < n:
+        ch = source[i]
+        if source.startswith('//', i):
+            end = source.find('\n', i)
+            end = n if end == -1 else end
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            end = n if end == -1 else end + 2
+        elif ch in quotes:
+            end = i + 1
+            while end < n and source[end] != ch:
+                if source[end] == '\\' and ch != '`':
+                    end += 1
+                elif source[end] == '\n' and ch != '`':
+                    break  # Unterminated string: stop at the line end
+                end += 1
+            end = min(end + 1, n)
+            # Keep the quotes themselves so declarations stay recognisable
+            for j in range(i + 1, end - 1):
+                if out[j] != '\n':
+                    out[j] = ' '
+            i = end
+            continue
+        else:
+            i += 1
+            continue
+        for j in range(i, end):
+            if out[j] != '\n':
+                out[j] = ' '
+        i = end
+    return ''.join(out)
+
+
+def _line_depths(masked_lines):
+    """Brace depth at the start of every line, plus the depth after the last one"""
+    depths = []
+    depth = 0
+    for line in masked_lines:
+        depths.append(depth)
+        depth += line.count('{') - line.count('}')
+        depth = max(depth, 0)
+    depths.append(depth)
+    return depths
+
+
+def _block_end(depths, start_index):
+    """Line number (1-based) closing the block opened on start_index, or the line itself without one"""
+    base = depths[start_index]
+    end_index = start_index
+    while depths[end_index + 1] > base:
+        end_index += 1
+        if end_index + 1 >= len(depths):
+            break
+    return end_index + 1
+
+
+_JS_DECLARATIONS = [
+    (re.compile(r'^\s*(?:export\s+(?:default\s+)?)?(?:async\s+)?function\s*\*?\s*(\w+)'), 'function'),
+    (re.compile(r'^\s*(?:export\s+(?:default\s+)?)?(?:abstract\s+)?class\s+(\w+)'), 'class'),
+    (re.compile(r'^\s*(?:export\s+)?(?:const|let|var)\s+(\w+)\s*(?::[^=]+)?=\s*(?:async\s*)?(?:\([^)]*\)|\w+)\s*(?::[^=]+)?=>'), 'function'),
+    (re.compile(r'^\s*(?:export\s+)?(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s+)?function'), 'function'),
+    (re.compile(r'^\s*(?:export\s+)?interface\s+(\w+)'), 'interface'),
+    (re.compile(r'^\s*(?:export\s+)?type\s+(\w+)\s*(?:<[^>]*>)?\s*='), 'type'),
+    (re.compile(r'^\s*(?:export\s+)?enum\s+(\w+)'), 'type')
+]
+_JS_METHOD = re.compile(r'^\s*(?:(?:public|private|protected|static|async|readonly|get|set)\s+)*(\w+)\s*(?:<[^>]*>)?\([^)]*\)?\s*(?::[^{;]+)?(?:\{.*)?$')
+_JS_KEYWORDS = {'if', 'for', 'while', 'switch', 'catch', 'return', 'function', 'else', 'with'}
+_JS_IMPORT = re.compile(r'''(?:^|\n)\s*(?:import\s[^'"]*?from\s*|import\s*|export\s[^'"]*?from\s*)['"]([^'"]+)['"]|require\(\s*['"]([^'"]+)['"]\s*\)''')
+
+
+def index_javascript(source):
+    raw_lines = source.split('\n')
+    masked_lines = _mask(source, '"\'`').split('\n')
+    depths = _line_depths(masked_lines)
+    symbols = []
+    current_class = None
+    class_end = 0
+
+    for index, line in enumerate(masked_lines):
+        if current_class and index + 1 > class_end:
+            current_class = None
+        if depths[index] == 0:
+            for pattern, kind in _JS_DECLARATIONS:
+                match = pattern.match(line)
+                if match:
+                    end = _block_end(depths, index)
+                    symbols.append({
+                        'name': match.group(1), 'kind': kind, 'start': index + 1, 'end': end,
+                        'sig': raw_lines[index].strip()[:160], 'doc': ''
+                    })
+                    if kind == 'class':
+                        current_class, class_end = match.group(1), end
+                    break
+        elif current_class and depths[index] == 1:
+            match = _JS_METHOD.match(line)
+            if match and match.group(1) not in _JS_KEYWORDS:
+                symbols.append({
+                    'name': f"{current_class}.{match.group(1)}", 'kind': 'method', 'start': index + 1,
+                    'end': _block_end(depths, index), 'sig': raw_lines[index].strip()[:160], 'doc': ''
+                })
+
+    imports = [a or b for a, b in _JS_IMPORT.findall(source)]
+    return {'doc': '', 'imports': imports, 'symbols': symbols}
+
+
+_GO_FUNC = re.compile(r'^func\s+(?:\(\s*\w*\s*\*?\s*(\w+)(?:\[[^\]]*\])?\s*\)\s*)?(\w+)')
+_GO_TYPE = re.compile(r'^type\s+(\w+)\s+(struct|interface)?')
+_GO_IMPORT_LINE = re.compile(r'^\s*import\s+(?:\w+\s+)?"([^"]+)"', re.MULTILINE)
+_GO_IMPORT_BLOCK = re.compile(r'^\s*import\s*\((.*?)\)', re.MULTILINE | re.DOTALL)
+
+
+def index_go(source):
+    raw_lines = source.split('\n')
+    masked_lines = _mask(source, '"\'`').split('\n')
+    depths = _line_depths(masked_lines)
+    symbols = []
+
+    for index, line in enumerate(masked_lines):
+        if depths[index] != 0:
+            continue
+        match = _GO_FUNC.match(line)
+        if match:
+            receiver, name = match.groups()
+            symbols.append({
+                'name': f"{receiver}.{name}" if receiver else name,
+                'kind': 'method' if receiver else 'function',
+                'start': index + 1, 'end': _block_end(depths, index),
+                'sig': raw_lines[index].strip().rstrip('{').strip()[:160], 'doc': ''
+            })
+            continue
+        match = _GO_TYPE.match(line)
+        if match:
+            symbols.append({
+                'name': match.group(1), 'kind': match.group(2) or 'type',
+                'start': index + 1, 'end': _block_end(depths, index) if match.group(2) else index + 1,
+                'sig': raw_lines[index].strip().rstrip('{').strip()[:160], 'doc': ''
+            })
+
+    imports = _GO_IMPORT_LINE.findall(source)
+    for block in _GO_IMPORT_BLOCK.findall(source):
+        imports.extend(re.findall(r'"([^"]+)"', block))
+    return {'doc': '', 'imports': imports, 'symbols': symbols}
+
+
+_INDEXERS = {'python': index_python, 'javascript': index_javascript, 'typescript': index_javascript, 'go': index_go}
+
+
+def build_symbol_index(file_contents):
+    """
+    Build the symbol index for the analysed source files
+
+    Args:
+        file_contents: path -> source (the analysis 'files')
+
+    Returns:
+        dict: {'version', 'modules': {path: {'language', 'doc', 'imports', 'symbols'}}}
+    """
+    modules = {}
+    for path, source in file_contents.items():
+        language = LANGUAGES.get(posixpath.splitext(path)[1].lower())
+        if not language:
+            continue
+        try:
+            module = _INDEXERS[language](source)
+        except (SyntaxError, ValueError, RecursionError):
+            continue  # Unparseable files simply contribute no symbols
+        modules[path] = {'language': language, **module}
+    return {'version': SYMBOL_INDEX_VERSION, 'modules': modules}
+
+
+# ---------- retrieval ----------
+
+def _tokens(text):
+    """Lower-case word tokens, splitting camelCase and snake_case"""
+    words = re.findall(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+', text or '')
+    return [w.lower() for w in words if len(w) >= 3 and w.lower() not in _STOPWORDS]
+
+
+def find_relevant_definitions(symbol_index, file_contents, query, preferred_paths=None, max_chars=4000):
+    """
+    Pick the definitions that best match a query and quote their source
+
+    Symbols score on query words found in their name (strongest), docstring
+    and file path; files listed in preferred_paths get a boost. Without any
+    match the outline falls back to top-level definitions of the first
+    (highest-ranked) files.
+
+    Returns:
+        list: [{'path', 'name', 'kind', 'start', 'end', 'code'}] within max_chars
+    """
+    modules = (symbol_index or {}).get('modules', {})
+    query_tokens = set(_tokens(query))
+    preferred_paths = set(preferred_paths or [])
+
+    candidates = []
+    for rank, (path, module) in enumerate(modules.items()):
+        if path not in file_contents:
+            continue
+        path_tokens = set(_tokens(path))
+        for symbol in module['symbols']:
+            name_tokens = set(_tokens(symbol['name']))
+            score = 3 * len(query_tokens & name_tokens)
+            score += len(query_tokens & set(_tokens(symbol.get('doc', ''))))
+            score += len(query_tokens & path_tokens)
+            if path in preferred_paths:
+                score += 4
+            # Earlier files are ranked higher by the analyzer; top-level definitions first on ties
+            candidates.append((score, -rank, symbol['kind'] != 'method', -symbol['start'], path, symbol))
+
+    if not candidates:
+        return []
+    candidates.sort(key=lambda c: c[:4], reverse=True)
+    if candidates[0][0] == 0:
+        candidates = [c for c in candidates if c[5]['kind'] != 'method']
+
+    snippets = []
+    covered = {}
+    used_chars = 0
+    for score, _, _, _, path, symbol in candidates:
+        if any(start <= symbol['start'] <= end for start, end in covered.get(path, [])):
+            continue  # Already quoted inside an enclosing definition
+        lines = file_contents[path].split('\n')[symbol['start'] - 1:symbol['end']]
+        if len(lines) > MAX_SNIPPET_LINES:
+            lines = lines[:MAX_SNIPPET_LINES] + ['    ...']
+        code = '\n'.join(lines)
+        if used_chars + len(code) > max_chars:
+            if snippets:
+                continue
+            code = code[:max_chars]
+        snippets.append({
+            'path': path, 'name': symbol['name'], 'kind': symbol['kind'],
+            'start': symbol['start'], 'end': symbol['end'], 'code': code
+        })
+        covered.setdefault(path, []).append((symbol['start'], symbol['start'] + min(len(lines), MAX_SNIPPET_LINES) - 1))
+        used_chars += len(code)
+        if used_chars >= max_chars:
+            break
+    return snippets
+
+
+def format_definitions(snippets):
+    """Render snippets for a prompt, each headed by its file and line span"""
+    return ''.join(
+        f"\n\n--- {s['path']}:{s['start']}-{s['end']} ({s['kind']} {s['name']}) ---\n{s['code']}"
+        for s in snippets
+    )
@@ -0,0 +1,312 @@
+"""
+Technology stack detection
+One pass over the repository tree weighs languages by bytes and collects the
+dependency manifests, which are then parsed properly (TOML, XML, JSON, go.mod,
+Gemfile) rather than substring-matched. Manifest contents come from the files
+already read for the analysis or from the blob cache, so detection never makes
+a network call
+"""
+
+import json
+import posixpath
+import re
+import tomllib
+import xml.etree.ElementTree as ElementTree
+
+# Extension -> language, for the byte share
+LANGUAGE_EXTENSIONS = {
+    '.py': 'Python', '.js': 'JavaScript', '.jsx': 'JavaScript', '.mjs': 'JavaScript', '.cjs': 'JavaScript',
+    '.ts': 'TypeScript', '.tsx': 'TypeScript', '.java': 'Java', '.kt': 'Kotlin', '.kts': 'Kotlin',
+    '.go': 'Go', '.rs': 'Rust', '.rb': 'Ruby', '.php': 'PHP', '.cs': 'C#', '.cpp': 'C++', '.cc': 'C++',
+    '.hpp': 'C++', '.c': 'C', '.h': 'C', '.swift': 'Swift', '.dart': 'Dart', '.vue': 'Vue',
+    '.scala': 'Scala', '.html': 'HTML', '.css': 'CSS', '.scss': 'SCSS', '.less': 'Less', '.sql': 'SQL',
+    '.sh': 'Shell'
+}
+# Languages below this share of code bytes are left out of the summary
+MIN_LANGUAGE_SHARE = 1.0
+
+# Dependency name -> (category, display name), shared by every ecosystem's parser
+DEPENDENCY_SIGNALS = {
+    # JavaScript / TypeScript
+    'react': ('frameworks', 'React'), 'next': ('frameworks', 'Next.js'), 'vue': ('frameworks', 'Vue.js'),
+    'nuxt': ('frameworks', 'Nuxt'), '@angular/core': ('frameworks', 'Angular'), 'svelte': ('frameworks', 'Svelte'),
+    'express': ('frameworks', 'Express.js'), 'fastify': ('frameworks', 'Fastify'), 'koa': ('frameworks', 'Koa'),
+    '@nestjs/core': ('frameworks', 'NestJS'), 'electron': ('frameworks', 'Electron'),
+    'react-native': ('frameworks', 'React Native'), '@remix-run/react': ('frameworks', 'Remix'),
+    'tailwindcss': ('frameworks', 'Tailwind CSS'),
+    'pg': ('databases', 'PostgreSQL'), 'mysql': ('databases', 'MySQL'), 'mysql2': ('databases', 'MySQL'),
+    'mongodb': ('databases', 'MongoDB'), 'mongoose': ('databases', 'MongoDB'), 'ioredis': ('databases', 'Redis'),
+    'sqlite3': ('databases', 'SQLite'), 'better-sqlite3': ('databases', 'SQLite'),
+    'prisma': ('tools', 'Prisma'), '@prisma/client': ('tools', 'Prisma'), 'sequelize': ('tools', 'Sequelize'),
+    'typeorm': ('tools', 'TypeORM'), 'jest': ('tools', 'Jest'), 'vitest': ('tools', 'Vitest'),
+    'mocha': ('tools', 'Mocha'), 'eslint': ('tools', 'ESLint'), 'prettier': ('tools', 'Prettier'),
+    'webpack': ('tools', 'Webpack'), 'vite': ('tools', 'Vite'), '@babel/core': ('tools', 'Babel'),
+    'typescript': ('tools', 'TypeScript compiler'),
+    # Python
+    'django': ('frameworks', 'Django'), 'flask': ('frameworks', 'Flask'), 'fastapi': ('frameworks', 'FastAPI'),
+    'starlette': ('frameworks', 'Starlette'), 'tornado': ('frameworks', 'Tornado'), 'sanic': ('frameworks', 'Sanic'),
+    'streamlit': ('frameworks', 'Streamlit'), 'pyramid': ('frameworks', 'Pyramid'),
+    'psycopg2': ('databases', 'PostgreSQL'), 'psycopg2-binary': ('databases', 'PostgreSQL'),
+    'psycopg': ('databases', 'PostgreSQL'), 'asyncpg': ('databases', 'PostgreSQL'),
+    'pymysql': ('databases', 'MySQL'), 'mysqlclient': ('databases', 'MySQL'), 'aiomysql': ('databases', 'MySQL'),
+    'pymongo': ('databases', 'MongoDB'), 'motor': ('databases', 'MongoDB'), 'redis': ('databases', 'Redis'),
+    'elasticsearch': ('databases', 'Elasticsearch'),
+    'sqlalchemy': ('tools', 'SQLAlchemy'), 'alembic': ('tools', 'Alembic'), 'celery': ('tools', 'Celery'),
+    'pytest': ('tools', 'pytest'), 'poetry-core': ('tools', 'Poetry'), 'uvicorn': ('tools', 'Uvicorn'),
+    'gunicorn': ('tools', 'Gunicorn'), 'openai': ('tools', 'OpenAI API'),
+    # Rust
+    'actix-web': ('frameworks', 'Actix Web'), 'axum': ('frameworks', 'Axum'), 'rocket': ('frameworks', 'Rocket'),
+    'warp': ('frameworks', 'Warp'), 'tauri': ('frameworks', 'Tauri'), 'tokio': ('tools', 'Tokio'),
+    'diesel': ('tools', 'Diesel'), 'sqlx': ('tools', 'SQLx'), 'tokio-postgres': ('databases', 'PostgreSQL'),
+    'postgres': ('databases', 'PostgreSQL'), 'rusqlite': ('databases', 'SQLite'),
+    # Go
+    'github.com/gin-gonic/gin': ('frameworks', 'Gin'), 'github.com/labstack/echo': ('frameworks', 'Echo'),
+    'github.com/gofiber/fiber': ('frameworks', 'Fiber'), 'github.com/gorilla/mux': ('frameworks', 'Gorilla Mux'),
+    'github.com/lib/pq': ('databases', 'PostgreSQL'), 'github.com/jackc/pgx': ('databases', 'PostgreSQL'),
+    'github.com/go-sql-driver/mysql': ('databases', 'MySQL'),
+    'go.mongodb.org/mongo-driver': ('databases', 'MongoDB'), 'github.com/redis/go-redis': ('databases', 'Redis'),
+    'github.com/go-redis/redis': ('databases', 'Redis'), 'github.com/mattn/go-sqlite3': ('databases', 'SQLite'),
+    'gorm.io/gorm': ('tools', 'GORM'),
+    # Java / Kotlin (artifactId)
+    'spring-boot-starter-web': ('frameworks', 'Spring Boot'), 'spring-boot-starter': ('frameworks', 'Spring Boot'),
+    'spring-boot-starter-parent': ('frameworks', 'Spring Boot'), 'quarkus-core': ('frameworks', 'Quarkus'),
+    'micronaut-runtime': ('frameworks', 'Micronaut'), 'postgresql': ('databases', 'PostgreSQL'),
+    'mysql-connector-java': ('databases', 'MySQL'), 'mysql-connector-j': ('databases', 'MySQL'),
+    'h2': ('databases', 'H2'), 'spring-boot-starter-data-mongodb': ('databases', 'MongoDB'),
+    'spring-boot-starter-data-redis': ('databases', 'Redis'), 'jedis': ('databases', 'Redis'),
+    'hibernate-core': ('tools', 'Hibernate'), 'junit-jupiter': ('tools', 'JUnit'), 'junit': ('tools', 'JUnit'),
+    # Ruby
+    'rails': ('frameworks', 'Ruby on Rails'), 'sinatra': ('frameworks', 'Sinatra'),
+    'mongoid': ('databases', 'MongoDB'), 'rspec': ('tools', 'RSpec'), 'sidekiq': ('tools', 'Sidekiq'),
+    # PHP
+    'laravel/framework': ('frameworks', 'Laravel'), 'symfony/framework-bundle': ('frameworks', 'Symfony'),
+    'slim/slim': ('frameworks', 'Slim'), 'doctrine/orm': ('tools', 'Doctrine'),
+    'predis/predis': ('databases', 'Redis'), 'mongodb/mongodb': ('databases', 'MongoDB'),
+    'phpunit/phpunit': ('tools', 'PHPUnit')
+}
+
+# Container images (docker-compose) -> database
+IMAGE_DATABASES = {
+    'postgres': 'PostgreSQL', 'postgis/postgis': 'PostgreSQL', 'mysql': 'MySQL', 'mariadb': 'MariaDB',
+    'mongo': 'MongoDB', 'redis': 'Redis', 'elasticsearch': 'Elasticsearch', 'cassandra': 'Cassandra',
+    'rabbitmq': 'RabbitMQ'
+}
+
+# Files whose presence alone identifies a tool (matched by name, or by path prefix for directories)
+TOOL_FILES = {
+    'Dockerfile': 'Docker', 'docker-compose.yml': 'Docker Compose', 'docker-compose.yaml': 'Docker Compose',
+    'compose.yaml': 'Docker Compose', '.gitlab-ci.yml': 'GitLab CI', 'Makefile': 'Make', 'Chart.yaml': 'Helm',
+    'render.yaml': 'Render', 'vercel.json': 'Vercel', 'netlify.toml': 'Netlify', 'tsconfig.json': 'TypeScript compiler'
+}
+TOOL_DIRECTORIES = {'.github/workflows/': 'GitHub Actions', '.circleci/': 'CircleCI'}
+
+# Manifests deeper than this (or under example/test folders) describe samples, not the project
+MAX_MANIFEST_DEPTH = 3
+_NOISY_MANIFEST_DIRS = re.compile(r'(?:^|/)(?:examples?|samples?|tests?|fixtures|docs?)/')
+
+_REQUIREMENT_NAME = re.compile(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)')
+_SETUP_REQUIRES = re.compile(r'install_requires\s*=\s*\[(.*?)\]', re.DOTALL)
+_QUOTED = re.compile(r'''['"]([^'"]+)['"]''')
+_GEM = re.compile(r'''^\s*gem\s+['"]([^'"]+)['"]''', re.MULTILINE)
+_GRADLE_DEPENDENCY = re.compile(r'''['"]([\w.\-]+):([\w.\-]+)(?::[^'"]*)?['"]''')
+_COMPOSE_IMAGE = re.compile(r'''^\s*image:\s*['"]?([\w./-]+)''', re.MULTILINE)
+
+
+def _requirement_name(requirement):
+    match = _REQUIREMENT_NAME.match(requirement)
+    return match.group(1).lower().replace('_', '-') if match else None
+
+
+# ---------- manifest parsers: content -> iterable of dependency names ----------
+
+def parse_package_json(content):
+    data = json.loads(content)
+    for section in ('dependencies', 'devDependencies', 'peerDependencies'):
+        yield from (data.get(section) or {})
+
+
+def parse_requirements_txt(content):
+    for line in content.splitlines():
+        line = line.split('#', 1)[0].strip()
+        if line and not line.startswith('-'):
+            yield _requirement_name(line)
+
+
+def parse_setup_py(content):
+    for block in _SETUP_REQUIRES.findall(content):
+        for requirement in _QUOTED.findall(block):
+            yield _requirement_name(requirement)
+
+
+def parse_pyproject_toml(content):
+    data = tomllib.loads(content)
+    project = data.get('project', {})
+    requirements = list(project.get('dependencies', []))
+    for group in project.get('optional-dependencies', {}).values():
+        requirements.extend(group)
+    requirements.extend(data.get('build-system', {}).get('requires', []))
+    yield from (_requirement_name(r) for r in requirements)
+
+    poetry = data.get('tool', {}).get('poetry', {})
+    yield from (name.lower() for name in poetry.get('dependencies', {}) if name != 'python')
+    yield from (name.lower() for name in poetry.get('dev-dependencies', {}))
+    for group in poetry.get('group', {}).values():
+        yield from (name.lower() for name in group.get('dependencies', {}))
+
+
+def parse_cargo_toml(content):
+    data = tomllib.loads(content)
+    for section in ('dependencies', 'dev-dependencies', 'build-dependencies'):
+        yield from data.get(section, {})
+    yield from data.get('workspace', {}).get('dependencies', {})
+
+
+def parse_go_mod(content):
+    in_block = False
+    for line in content.splitlines():
+        line = line.split('//', 1)[0].strip()
+        if line.startswith('require ('):
+            in_block = True
+        elif in_block and line == ')':
+            in_block = False
+        elif in_block and line:
+            yield line.split()[0]
+        elif line.startswith('require '):
+            yield line.split()[1]
+
+
+def parse_pom_xml(content):
+    root = ElementTree.fromstring(content)
+    # Maven namespaces vary by version; compare local tag names only
+    for element in root.iter():
+        if element.tag.rsplit('}', 1)[-1] in ('dependency', 'parent', 'plugin'):
+            for child in element:
+                if child.tag.rsplit('}', 1)[-1] == 'artifactId' and child.text:
+                    yield child.text.strip()
+
+
+def parse_build_gradle(content):
+    for _, artifact in _GRADLE_DEPENDENCY.findall(content):
+        yield artifact
+
+
+def parse_gemfile(content):
+    yield from _GEM.findall(content)
+
+
+def parse_composer_json(content):
+    data = json.loads(content)
+    for section in ('require', 'require-dev'):
+        yield from (data.get(section) or {})
+
+
+MANIFEST_PARSERS = {
+    'package.json': ('npm', parse_package_json),
+    'requirements.txt': ('pip', parse_requirements_txt),
+    'setup.py': ('setuptools', parse_setup_py),
+    'pyproject.toml': (None, parse_pyproject_toml),
+    'Cargo.toml': ('Cargo', parse_cargo_toml),
+    'go.mod': ('Go modules', parse_go_mod),
+    'pom.xml': ('Maven', parse_pom_xml),
+    'build.gradle': ('Gradle', parse_build_gradle),
+    'build.gradle.kts': ('Gradle', parse_build_gradle),
+    'Gemfile': ('Bundler', parse_gemfile),
+    'composer.json': ('Composer', parse_composer_json)
+}
+
+
+def _dependency_signal(name):
+    """Look a dependency up, matching Go module paths and scoped packages by prefix"""
+    if name in DEPENDENCY_SIGNALS:
+        return DEPENDENCY_SIGNALS[name]
+    if '/' in name:
+        # Go major-version suffixes (github.com/labstack/echo/v4) and subpackages
+        parts = name.split('/')
+        for end in range(len(parts) - 1, 1, -1):
+            signal = DEPENDENCY_SIGNALS.get('/'.join(parts[:end]))
+            if signal:
+                return signal
+    return None
+
+
+def detect_tech_stack(file_contents, file_list, read_blob=None):
+    """
+    Detect languages, frameworks, tools and databases in one pass over the tree
+
+    Args:
+        file_contents: path -> content for the files read during analysis
+        file_list: Tree entries ({'path', 'size', 'sha', ...})
+        read_blob: Optional callable sha -> content or None, used for manifests
+            that were not read (normally blob_cache.get)
+
+    Returns:
+        dict: languages (by byte share, largest first), frameworks, tools,
+        databases and language_share ({language: percent})
+    """
+    stack = {'frameworks': set(), 'tools': set(), 'databases': set()}
+    language_bytes = {}
+    manifests = []
+
+    for file in file_list:
+        path = file['path']
+        name = posixpath.basename(path)
+        language = LANGUAGE_EXTENSIONS.get(posixpath.splitext(name)[1].lower())
+        if language:
+            language_bytes[language] = language_bytes.get(language, 0) + max(file.get('size') or 0, 1)
+        if name in TOOL_FILES:
+            stack['tools'].add(TOOL_FILES[name])
+        for directory, tool in TOOL_DIRECTORIES.items():
+            if path.startswith(directory):
+                stack['tools'].add(tool)
+        if (name in MANIFEST_PARSERS or name in ('docker-compose.yml', 'docker-compose.yaml', 'compose.yaml')) \
+                and path.count('/') <= MAX_MANIFEST_DEPTH and not _NOISY_MANIFEST_DIRS.search(path):
+            manifests.append(file)
+
+    for file in manifests:
+        content = file_contents.get(file['path'])
+        if content is None and read_blob and file.get('sha'):
+            content = read_blob(file['sha'])
+        if content is None:
+            continue
+
+        name = posixpath.basename(file['path'])
+        if name not in MANIFEST_PARSERS:
+            # Compose files: database services show up as images
+            for image in _COMPOSE_IMAGE.findall(content):
+                database = IMAGE_DATABASES.get(image.split(':')[0].removeprefix('library/').removeprefix('docker.io/'))
+                if database:
+                    stack['databases'].add(database)
+            continue
+
+        tool, parser = MANIFEST_PARSERS[name]
+        try:
+            dependencies = [d for d in parser(content) if d]
+        except (ValueError, ElementTree.ParseError, AttributeError, TypeError) as e:
+            # tomllib.TOMLDecodeError and json.JSONDecodeError are ValueErrors
+            print(f"⚠️ Could not parse {file['path']}: {e}")
+            continue
+        if tool:
+            stack['tools'].add(tool)
+        elif name == 'pyproject.toml':
+            stack['tools'].add('Poetry' if '[tool.poetry]' in content else 'pip')
+        for dependency in dependencies:
+            signal = _dependency_signal(dependency if name == 'go.mod' else dependency.lower())
+            if signal:
+                category, label = signal
+                stack[category].add(label)
+
+    total = sum(language_bytes.values())
+    share = {}
+    if total:
+        ranked = sorted(language_bytes.items(), key=lambda item: item[1], reverse=True)
+        share = {language: round(100.0 * size / total, 1) for language, size in ranked}
+    languages = [language for language, percent in share.items() if percent >= MIN_LANGUAGE_SHARE]
+
+    # Lists keep the summary JSON-serializable and stable between runs
+    return {
+        'languages': languages or list(share)[:1],
+        'frameworks': sorted(stack['frameworks']),
+        'tools': sorted(stack['tools']),
+        'databases': sorted(stack['databases']),
+        'language_share': {language: share[language] for language in languages}
+    }
@@ -64,6 +64,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def open_shared_clients():
+    """Create the pooled LLM client once, before the first request needs it"""
+    from agent.llm_client import start_llm_client
+    await start_llm_client()
+
+@app.on_event("shutdown")
+async def close_shared_clients():
+    """Close pooled outbound HTTP clients so keep-alive connections are released"""
+    from agent.github_client import close_github_client
+    from agent.llm_client import close_llm_client
+    await close_github_client()
+    await close_llm_client()
+
 # Include routers with organized structure
 app.include_router(health_endpoints.router, tags=["🏥 Health"])
 app.include_router(project_endpoints.router, tags=["📂 Projects"])
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey, Enum, UniqueConstraint, Float
+from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey, Enum, UniqueConstraint, Float, DateTime
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from enum import Enum as PyEnum
@@ -24,6 +24,8 @@ class Project(Base):
     repo_name = Column(String, nullable=True)  # Repository name from GitHub
     tech_stack = Column(Text, nullable=True)  # JSON string of detected technologies
     is_processed = Column(Boolean, default=False, nullable=False)  # Whether agent has processed
+    analyzed_commit_sha = Column(String, nullable=True)  # Repository commit the stored analysis reflects
+    path_filter = Column(Text, nullable=True)  # JSON PathFilter config for this repository (None = standard rules)
     
     # Progress tracking
     total_days = Column(Integer, default=14, nullable=False)  # Total days in curriculum
@@ -163,4 +165,13 @@ class Task(Base):
     project = relationship("Project", back_populates="tasks")
     concept = relationship("Concept", back_populates="tasks")  # New: Direct concept relationship
     subtopic = relationship("Subtopic", back_populates="tasks")  # Existing: Subtopic relationship (backward compatibility)
-    subconcept = relationship("Subconcept", back_populates="task")  # New: Subconcept relationship 
\ No newline at end of file
+    subconcept = relationship("Subconcept", back_populates="task")  # New: Subconcept relationship 
+
+class LLMRateWindow(Base):
+    __tablename__ = "llm_rate_windows"
+
+    # One row per deployment and minute; workers add their LLM requests and tokens to it
+    deployment = Column(String, primary_key=True)
+    window_start = Column(DateTime(timezone=True), primary_key=True)
+    requests = Column(Integer, default=0, nullable=False)
+    tokens = Column(Integer, default=0, nullable=False)
@@ -27,9 +27,12 @@ sys.path.append(str(agent_dir))
 
 # Import agent functions
 from repository_analyzer import analyze_repository
-from learning_path_generator import generate_learning_path
+from learning_path_generator import generate_learning_path, json_messages
 from prompts.learning_path_prompts import prepare_repository_context
-from openai import AzureOpenAI
+from prompts.token_budget import completion_budget
+from agent.llm_client import create_chat_completion, forget_chat_completion
+from agent.llm_cache import refresh_llm_responses
+from agent.learning_schema import JSON_RESPONSE_OPTIONS
 
 from app.database_models import Project, Concept, Subtopic, Task
 from app.database_config import SessionLocal
@@ -306,7 +309,8 @@ async def process_project_background(project_id: int, user_id: str):
                 repo_url=project.repo_url,
                 skill_level=project.skill_level,
                 domain=project.domain,
-                user_id=user_id
+                user_id=user_id,
+                path_filter=project.path_filter
             )
             print(f"📊 Agent processing result: {result}")
             
@@ -359,35 +363,32 @@ async def get_project_for_regeneration(project_id: int, user_id: str) -> Any:
 
 async def get_repository_context_for_regeneration(project, agent):
     """Get repository context for regeneration operations"""
-    repo_analysis = await analyze_repository(project.repo_url, agent.github_token)
+    repo_analysis = await analyze_repository(
+        project.repo_url, agent.github_token, path_filter=getattr(project, 'path_filter', None),
+        base_commit_sha=getattr(project, 'analyzed_commit_sha', None)
+    )
+    if repo_analysis.get('success'):
+        from agent.api_client import record_analyzed_commit
+        await record_analyzed_commit(project.project_id, repo_analysis.get('commit_sha'))
     return prepare_repository_context(repo_analysis)
 
 async def call_llm_for_regeneration(agent, prompt: str) -> Dict[str, Any]:
     """Call LLM for regeneration and parse response"""
-    azure_client = AzureOpenAI(
-        api_key=agent.azure_openai_config['api_key'],
-        azure_endpoint=agent.azure_openai_config['endpoint'],
-        api_version=agent.azure_openai_config['api_version']
-    )
-    response = azure_client.chat.completions.create(
-        model=agent.azure_openai_config['deployment_name'],
-        messages=[
-            {
-                "role": "system", 
-                "content": "You are a technical learning expert. You MUST respond with ONLY valid JSON. No explanations, no markdown, no additional text. Your response must start with { and end with }."
-            },
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ],
-        max_tokens=4000,
-        temperature=0.7
-    )
+    options = {'max_tokens': completion_budget(json_messages(prompt), 4000), 'temperature': 0.7, **JSON_RESPONSE_OPTIONS}
+    # The user asked for new content, so a cached answer to the same prompt must not be replayed
+    with refresh_llm_responses():
+        response = await create_chat_completion(
+            json_messages(prompt),
+            agent.azure_openai_config,
+            priority='regeneration',
+            **options
+        )
     
     try:
         return json.loads(response.choices[0].message.content)
     except (json.JSONDecodeError, KeyError) as e:
+        # Don't let the response cache replay an answer that can't be parsed
+        await forget_chat_completion(json_messages(prompt), agent.azure_openai_config, **options)
         raise HTTPException(status_code=500, detail=f"Failed to parse LLM response: {str(e)}")
 
 async def regenerate_concept_content(user_id: str, project_id: int, user_prompt: str, project_dict: Dict, concept_dict: Dict) -> Dict[str, Any]:
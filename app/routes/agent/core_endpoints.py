@@ -126,12 +126,20 @@ async def agent_health_check():
     
     try:
         agent = get_agent_instance()
+        from agent.llm_cache import llm_response_cache
+        from agent.single_flight import day_generation_flights
+        from agent.llm_scheduler import llm_scheduler
+        from agent.llm_deployments import deployment_pool
         return {
             "status": "available",
             "message": "GitGuide Agent is ready",
             "agent_available": True,
             "github_token": bool(agent.github_token),
-            "azure_openai_configured": bool(agent.azure_openai_config['api_key'])
+            "azure_openai_configured": bool(agent.azure_openai_config['api_key']),
+            "llm_cache": llm_response_cache.stats(),
+            "day_generation": day_generation_flights.stats(),
+            "llm_scheduler": llm_scheduler.stats(),
+            "llm_deployments": deployment_pool.stats()
         }
     except HTTPException as e:
         if e.status_code == 503:
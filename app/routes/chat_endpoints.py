@@ -22,12 +22,13 @@ from app.routes.shared.database_utilities import get_db_session, verify_project_
 logger = get_logger(__name__)
 
 try:
-    from openai import AzureOpenAI
+    from agent.llm_client import azure_openai_settings, create_chat_completion, is_llm_configured
     from agent.repository_analyzer import analyze_repository
     from prompts import create_chat_prompt
+    from prompts.token_budget import completion_budget
 except ImportError:
     print("⚠️ Chat dependencies not available")
-    AzureOpenAI = None
+    create_chat_completion = None
 
 router = APIRouter()
 
@@ -126,13 +127,20 @@ async def get_project_full_context(project_id: int, user_id: str):
         
         # Get repository files if available
         repo_files = {}
+        symbol_index = None
         if project.is_processed:
             try:
                 github_token = os.getenv('GITHUB_ACCESS_TOKEN')
                 if github_token:
-                    repo_analysis = await analyze_repository(project.repo_url, github_token)
+                    repo_analysis = await analyze_repository(
+                        project.repo_url, github_token, path_filter=project.path_filter,
+                        base_commit_sha=project.analyzed_commit_sha
+                    )
                     if repo_analysis['success']:
                         repo_files = repo_analysis['files']
+                        symbol_index = repo_analysis.get('symbol_index')
+                        from agent.api_client import record_analyzed_commit
+                        await record_analyzed_commit(project.project_id, repo_analysis.get('commit_sha'))
             except Exception as e:
                 print(f"Failed to get repository files: {e}")
         
@@ -148,7 +156,8 @@ async def get_project_full_context(project_id: int, user_id: str):
             },
             'learning_path': learning_path,
             'current_task': current_task,
-            'repo_files': repo_files
+            'repo_files': repo_files,
+            'symbol_index': symbol_index
         }
 
 # Chat prompt function moved to prompts/chat_prompts.py
@@ -166,7 +175,7 @@ async def chat_with_project_context(
     """Chat with AI assistant that has full project context"""
     logger.info(f"💬 Chat request for project {project_id}: '{message.message[:50]}...'")
     
-    if not AzureOpenAI:
+    if not create_chat_completion:
         logger.error("❌ Azure OpenAI not available")
         raise HTTPException(
             status_code=503,
@@ -187,27 +196,20 @@ async def chat_with_project_context(
         logger.info(f"📝 Prompt created: {len(prompt)} characters")
         
         # Call Azure OpenAI
-        azure_openai_key = os.getenv('AZURE_OPENAI_KEY')
-        azure_openai_endpoint = os.getenv('AZURE_OPENAI_ENDPOINT')
-        azure_openai_version = os.getenv('AZURE_OPENAI_API_VERSION')
-        azure_openai_deployment = os.getenv('AZURE_OPENAI_DEPLOYMENT_GPT_4_1')
+        azure_openai_config = azure_openai_settings()
         
-        if not azure_openai_key or not azure_openai_endpoint:
+        if not is_llm_configured(azure_openai_config):
             logger.error("❌ Azure OpenAI configuration not complete")
             raise HTTPException(status_code=503, detail="Azure OpenAI not configured")
         
         logger.info(f"🤖 Calling Azure OpenAI...")
-        client = AzureOpenAI(
-            api_key=azure_openai_key,
-            azure_endpoint=azure_openai_endpoint,
-            api_version=azure_openai_version
-        )
-        
-        response = client.chat.completions.create(
-            model=azure_openai_deployment,
-            messages=[{"role": "user", "content": prompt}],
+        messages = [{"role": "user", "content": prompt}]
+        response = await create_chat_completion(
+            messages,
+            azure_openai_config,
+            priority='interactive',  # Served ahead of background day generation
             temperature=0.7,
-            max_tokens=1000
+            max_tokens=completion_budget(messages, 1000, minimum_tokens=256)
         )
         
         assistant_response = response.choices[0].message.content
@@ -273,8 +275,8 @@ async def chat_health_check():
     """Check if chat service is available"""
     
     return {
-        "status": "available" if AzureOpenAI else "unavailable",
-        "azure_openai_available": bool(AzureOpenAI),
+        "status": "available" if create_chat_completion else "unavailable",
+        "azure_openai_available": bool(create_chat_completion),
         "azure_openai_key": bool(os.getenv('AZURE_OPENAI_KEY')),
         "azure_openai_endpoint": bool(os.getenv('AZURE_OPENAI_ENDPOINT')),
         "github_token": bool(os.getenv('GITHUB_ACCESS_TOKEN'))
@@ -230,6 +230,19 @@ async def generate_day_content(
                 'was_already_generated': True
             }
         
+        from agent.single_flight import day_generation_flights
+        if day_generation_flights.in_flight(project_id, day_number):
+            # The user is waiting now, so a running prefetch of this day moves up the LLM queue
+            day_generation_flights.raise_priority(
+                project_id, day_number, 'regeneration' if request.force_regenerate else 'on_demand'
+            )
+            return {
+                'success': True,
+                'message': f'Day {day_number} content generation already in progress',
+                'day_number': day_number,
+                'generation_in_progress': True
+            }
+        
         # Mark generation as started
         await db.execute(
             text("UPDATE days SET content_generation_started = TRUE WHERE day_id = :day_id"),
@@ -242,7 +255,8 @@ async def generate_day_content(
             trigger_background_day_generation,
             project_id,
             day_number,
-            request.force_regenerate
+            request.force_regenerate,
+            priority='regeneration' if request.force_regenerate else 'on_demand'
         )
         
         return {
@@ -355,39 +369,57 @@ async def get_day_status(
 
 # Background task functions
 
-async def trigger_background_day_generation(project_id: int, day_number: int, force_regenerate: bool = False):
-    """Background task to generate day content"""
+async def trigger_background_day_generation(project_id: int, day_number: int, force_regenerate: bool = False,
+                                            priority: str = 'prefetch'):
+    """Background task to generate day content (priority is the LLM scheduler class its calls run at)"""
     try:
         print(f"🔄 Background: Starting Day {day_number} generation for project {project_id}")
         
+        # Another trigger for this day is already running; it saves the content for both
+        from agent.single_flight import day_generation_flights
+        if day_generation_flights.in_flight(project_id, day_number):
+            print(f"🔗 Background: Day {day_number} of project {project_id} already in progress")
+            day_generation_flights.raise_priority(project_id, day_number, priority)
+            return
+        
         # Import here to avoid circular imports (correct path for top-level agent package)
         from agent.agent_orchestrator import GitGuideAgent
         
         agent = GitGuideAgent()
         
-        # Get minimal repo context to pass; we can re-run analyze_repository for robustness
+        # Repository context comes from the shared per-commit analysis cache
         from agent.repository_analyzer import analyze_repository
         from sqlalchemy import text
-        res = await get_db()( )
         
         # Fetch repo_url, skill_level, domain for the project
         # We do not have a simple dependency here; use a one-off session
         from app.database_config import SessionLocal
         async with SessionLocal() as db:
-            proj = await db.execute(text("SELECT repo_url, skill_level, domain FROM projects WHERE project_id = :pid"), {"pid": project_id})
+            proj = await db.execute(text("SELECT repo_url, skill_level, domain, analyzed_commit_sha, path_filter FROM projects WHERE project_id = :pid"), {"pid": project_id})
             row = proj.fetchone()
             if not row:
                 print(f"❌ Background: Project {project_id} not found")
                 return
-            repo_url, skill_level, domain = row
+            repo_url, skill_level, domain, analyzed_commit_sha, path_filter = row
         
-        # Analyze repository quickly (cached endpoints make this cheap); could be optimized later
-        repo_analysis = await analyze_repository(repo_url, agent.github_token)
+        # Served from the analysis snapshot cache unless the repository has a new HEAD commit,
+        # in which case only the files changed since the project's last analysis are fetched
+        repo_analysis = await analyze_repository(
+            repo_url, agent.github_token, path_filter=path_filter, base_commit_sha=analyzed_commit_sha
+        )
         if not repo_analysis.get('success'):
             print(f"❌ Background: Repo analysis failed: {repo_analysis.get('error')}")
             return
         
-        await agent.generate_next_day_background(project_id, day_number, repo_analysis, skill_level, domain, '')
+        from agent.api_client import record_analyzed_commit
+        await record_analyzed_commit(project_id, repo_analysis.get('commit_sha'))
+        
+        from agent.llm_scheduler import llm_priority
+        from agent.llm_cache import refresh_llm_responses
+        from contextlib import nullcontext
+        # A forced regeneration must ask the model again rather than replay cached answers
+        with llm_priority(priority), (refresh_llm_responses() if force_regenerate else nullcontext()):
+            await agent.generate_next_day_background(project_id, day_number, repo_analysis, skill_level, domain, '')
         print(f"✅ Background: Day {day_number} generation triggered for project {project_id}")
         
     except Exception as e:
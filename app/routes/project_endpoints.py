@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException, Header
 from pydantic import BaseModel
+from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 import json
@@ -18,6 +19,8 @@ class ProjectCreateRequest(BaseModel):
     repo_url: str
     skill_level: str
     domain: str
+    # Optional PathFilter config, e.g. {"extra_skip_dirs": ["vendor/"], "extra_extensions": [".proto"]}
+    path_filter: Optional[dict] = None
 
 
 @router.post("/projects", 
@@ -38,6 +41,20 @@ async def create_project(
     user_id = extract_user_id_from_token(authorization)
     print(f"👤 User ID: {user_id}")
     
+    # Only GitHub repository URLs; a local path would be read from the server itself
+    from agent.repository_analyzer import is_github_repo_url
+    if not is_github_repo_url(data.repo_url):
+        raise HTTPException(
+            status_code=400,
+            detail="repo_url must be a GitHub repository URL like https://github.com/<owner>/<repo>"
+        )
+    if data.path_filter:
+        from agent.path_filter import PathFilter
+        try:
+            PathFilter.validate_config(data.path_filter)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid path_filter: {str(e)}")
+    
     # Create database session and save project
     async with SessionLocal() as session:
         try:
@@ -64,7 +81,8 @@ async def create_project(
                 user_id=user_id,
                 repo_url=data.repo_url,
                 skill_level=data.skill_level,
-                domain=data.domain
+                domain=data.domain,
+                path_filter=json.dumps(data.path_filter) if data.path_filter else None
             )
             
             # Add to session and commit
@@ -475,7 +475,7 @@ async def verify_day0_repository(session: AsyncSession, project_id: int, repo_ur
     Returns:
         Dictionary with verification result
     """
-    import requests
+    from agent.github_client import github_get, GitHubRequestError
     import os
     
     try:
@@ -505,12 +505,9 @@ async def verify_day0_repository(session: AsyncSession, project_id: int, repo_ur
         
         # Use GitHub API to verify repository exists
         github_token = os.getenv('GITHUB_ACCESS_TOKEN')
-        headers = {}
-        if github_token:
-            headers['Authorization'] = f'token {github_token}'
         
         api_url = f'https://api.github.com/repos/{username}/{repo_name}'
-        response = requests.get(api_url, headers=headers, timeout=10)
+        response = await github_get(api_url, github_token, timeout=10)
         
         if response.status_code == 404:
             return {
@@ -549,7 +546,7 @@ async def verify_day0_repository(session: AsyncSession, project_id: int, repo_ur
             }
         }
         
-    except requests.exceptions.RequestException as e:
+    except GitHubRequestError as e:
         return {
             'success': False,
             'error': f'Failed to connect to GitHub API: {str(e)}'
@@ -911,7 +908,7 @@ async def verify_github_profile(session: AsyncSession, project_id: int, task_id:
     Returns:
         Dictionary with verification result
     """
-    import requests
+    from agent.github_client import github_get, GitHubRequestError
     import os
     import json
     
@@ -935,12 +932,9 @@ async def verify_github_profile(session: AsyncSession, project_id: int, task_id:
         
         # Use GitHub API to verify profile exists
         github_token = os.getenv('GITHUB_ACCESS_TOKEN')
-        headers = {}
-        if github_token:
-            headers['Authorization'] = f'token {github_token}'
         
         api_url = f'https://api.github.com/users/{username}'
-        response = requests.get(api_url, headers=headers, timeout=10)
+        response = await github_get(api_url, github_token, timeout=10)
         
         if response.status_code == 404:
             return {
@@ -990,7 +984,7 @@ async def verify_github_profile(session: AsyncSession, project_id: int, task_id:
             'day_unlocked': day_unlocked
         }
         
-    except requests.exceptions.RequestException as e:
+    except GitHubRequestError as e:
         return {
             'success': False,
             'error': f'Failed to connect to GitHub API: {str(e)}'
@@ -1007,8 +1001,6 @@ async def verify_repository_creation_task(session: AsyncSession, project_id: int
     Verify repository creation for Day 0 Task 2
     Similar to verify_day0_repository but for task-level verification
     """
-    import requests
-    import os
     import json
     
     try:
@@ -1061,7 +1053,7 @@ async def verify_commit_task(session: AsyncSession, project_id: int, task_id: in
     Returns:
         Dictionary with verification result
     """
-    import requests
+    from agent.github_client import github_get, GitHubRequestError
     import os
     import json
     from datetime import datetime, timedelta
@@ -1092,19 +1084,18 @@ async def verify_commit_task(session: AsyncSession, project_id: int, task_id: in
         
         # Use GitHub API to get recent commits
         github_token = os.getenv('GITHUB_ACCESS_TOKEN')
-        headers = {}
-        if github_token:
-            headers['Authorization'] = f'token {github_token}'
         
         # Get commits from the last hour (to check for recent activity)
         since_time = datetime.utcnow() - timedelta(hours=24)  # 24 hours to be more lenient
+        # Round down to the hour so repeated checks send an identical URL and can be answered with 304
+        since_time = since_time.replace(minute=0, second=0, microsecond=0)
         api_url = f'https://api.github.com/repos/{username}/{repo_name}/commits'
         params = {
             'since': since_time.isoformat() + 'Z',
             'per_page': 10
         }
         
-        response = requests.get(api_url, headers=headers, params=params, timeout=10)
+        response = await github_get(api_url, github_token, params=params, timeout=10)
         
         if response.status_code == 404:
             return {
@@ -1166,7 +1157,7 @@ async def verify_commit_task(session: AsyncSession, project_id: int, task_id: in
             'day_unlocked': day_unlocked
         }
         
-    except requests.exceptions.RequestException as e:
+    except GitHubRequestError as e:
         return {
             'success': False,
             'error': f'Failed to connect to GitHub API: {str(e)}'
@@ -1350,7 +1341,7 @@ async def verify_file_creation_task(session: AsyncSession, project_id: int, task
     Returns:
         Dictionary with verification result
     """
-    import requests
+    from agent.github_client import github_get, GitHubRequestError
     import os
     import json
     
@@ -1392,12 +1383,9 @@ async def verify_file_creation_task(session: AsyncSession, project_id: int, task
         
         # Use GitHub API to check repository contents
         github_token = os.getenv('GITHUB_ACCESS_TOKEN')
-        headers = {}
-        if github_token:
-            headers['Authorization'] = f'token {github_token}'
         
         api_url = f'https://api.github.com/repos/{username}/{repo_name}/contents'
-        response = requests.get(api_url, headers=headers, timeout=10)
+        response = await github_get(api_url, github_token, timeout=10)
         
         if response.status_code == 404:
             return {
@@ -1466,7 +1454,7 @@ async def verify_file_creation_task(session: AsyncSession, project_id: int, task
             }
         }
         
-    except requests.exceptions.RequestException as e:
+    except GitHubRequestError as e:
         return {
             'success': False,
             'error': f'Failed to connect to GitHub API: {str(e)}'
@@ -1492,7 +1480,7 @@ async def verify_readme_update_task(session: AsyncSession, project_id: int, task
     Returns:
         Dictionary with verification result
     """
-    import requests
+    from agent.github_client import github_get, GitHubRequestError
     import os
     import json
     import base64
@@ -1500,12 +1488,9 @@ async def verify_readme_update_task(session: AsyncSession, project_id: int, task
     try:
         # Use GitHub API to get README content
         github_token = os.getenv('GITHUB_ACCESS_TOKEN')
-        headers = {}
-        if github_token:
-            headers['Authorization'] = f'token {github_token}'
         
         api_url = f'https://api.github.com/repos/{username}/{repo_name}/contents/README.md'
-        response = requests.get(api_url, headers=headers, timeout=10)
+        response = await github_get(api_url, github_token, timeout=10)
         
         if response.status_code == 404:
             return {
@@ -1574,7 +1559,7 @@ async def verify_readme_update_task(session: AsyncSession, project_id: int, task
             }
         }
         
-    except requests.exceptions.RequestException as e:
+    except GitHubRequestError as e:
         return {
             'success': False,
             'error': f'Failed to connect to GitHub API: {str(e)}'
@@ -1600,7 +1585,7 @@ async def verify_directory_structure_task(session: AsyncSession, project_id: int
     Returns:
         Dictionary with verification result
     """
-    import requests
+    from agent.github_client import github_get, GitHubRequestError
     import os
     import json
     
@@ -1643,16 +1628,13 @@ async def verify_directory_structure_task(session: AsyncSession, project_id: int
         
         # Use GitHub API to check repository structure
         github_token = os.getenv('GITHUB_ACCESS_TOKEN')
-        headers = {}
-        if github_token:
-            headers['Authorization'] = f'token {github_token}'
         
         found_dirs = []
         missing_dirs = []
         
         for expected_dir in expected_dirs:
             api_url = f'https://api.github.com/repos/{username}/{repo_name}/contents/{expected_dir}'
-            response = requests.get(api_url, headers=headers, timeout=10)
+            response = await github_get(api_url, github_token, timeout=10)
             
             if response.status_code == 200:
                 found_dirs.append(expected_dir)
@@ -1694,7 +1676,7 @@ async def verify_directory_structure_task(session: AsyncSession, project_id: int
             }
         }
         
-    except requests.exceptions.RequestException as e:
+    except GitHubRequestError as e:
         return {
             'success': False,
             'error': f'Failed to connect to GitHub API: {str(e)}'
@@ -1720,7 +1702,7 @@ async def verify_code_implementation_task(session: AsyncSession, project_id: int
     Returns:
         Dictionary with verification result
     """
-    import requests
+    from agent.github_client import github_get, GitHubRequestError
     import os
     import json
     import base64
@@ -1769,16 +1751,13 @@ async def verify_code_implementation_task(session: AsyncSession, project_id: int
         
         # Use GitHub API to check file contents
         github_token = os.getenv('GITHUB_ACCESS_TOKEN')
-        headers = {}
-        if github_token:
-            headers['Authorization'] = f'token {github_token}'
         
         verified_files = []
         missing_patterns = []
         
         for file_path in required_files:
             api_url = f'https://api.github.com/repos/{username}/{repo_name}/contents/{file_path}'
-            response = requests.get(api_url, headers=headers, timeout=10)
+            response = await github_get(api_url, github_token, timeout=10)
             
             if response.status_code != 200:
                 return {
@@ -1836,7 +1815,7 @@ async def verify_code_implementation_task(session: AsyncSession, project_id: int
             }
         }
         
-    except requests.exceptions.RequestException as e:
+    except GitHubRequestError as e:
         return {
             'success': False,
             'error': f'Failed to connect to GitHub API: {str(e)}'
@@ -0,0 +1,95 @@
+"""
+Benchmark the compiled path filter against the original linear is_relevant_file
+over a synthetic 500k-entry repository tree
+
+Usage: python benchmark_path_filter.py [--entries 500000] [--seed 42]
+"""
+
+import argparse
+import random
+import time
+
+# Force load correct environment variables from .env file (importing agent needs them)
+from force_env_loader import force_load_env
+force_load_env()
+
+from agent.path_filter import (
+    DEFAULT_PATH_FILTER, IMPORTANT_FILES, MAX_MEMOIZED_DIRS, RELEVANT_EXTENSIONS, SKIP_DIRS, PathFilter
+)
+
+SEGMENTS = [
+    'src', 'lib', 'app', 'components', 'utils', 'core', 'api', 'models', 'services', 'tests',
+    'node_modules', 'dist', 'build', 'docs', 'assets', 'vendor', 'internal', 'pkg', 'venv', 'scripts'
+]
+FILE_NAMES = [
+    'index.js', 'main.py', 'App.tsx', 'styles.css', 'logo.png', 'README.md', 'package.json',
+    'Dockerfile', 'utils.go', 'lib.rs', 'data.bin', 'Makefile', 'schema.sql', 'config.yml', 'font.woff2'
+]
+
+
+def legacy_is_relevant_file(file_path):
+    """The linear per-path scan is_relevant_file used before the compiled filter"""
+    for skip_dir in SKIP_DIRS:
+        if skip_dir in file_path:
+            return False
+    file_name = file_path.split('/')[-1]
+    if file_name in IMPORTANT_FILES:
+        return True
+    return any(file_path.endswith(ext) for ext in RELEVANT_EXTENSIONS)
+
+
+def synthetic_tree(entries, seed):
+    """Build a tree shaped like a large monorepo: many files per directory, varied depth"""
+    rng = random.Random(seed)
+    directories = [
+        '/'.join(rng.choice(SEGMENTS) for _ in range(rng.randint(1, 7)))
+        for _ in range(max(1, entries // 25))
+    ]
+    return [f"{rng.choice(directories)}/{rng.choice(FILE_NAMES)}" for _ in range(entries)]
+
+
+def time_it(label, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"⏱️ {label}: {elapsed:.3f}s")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=500000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    paths = synthetic_tree(args.entries, args.seed)
+    print(f"🌳 Synthetic tree: {len(paths):,} entries")
+
+    legacy, legacy_time = time_it('Linear scan', lambda: [p for p in paths if legacy_is_relevant_file(p)])
+    compiled, compiled_time = time_it('Compiled filter', lambda: DEFAULT_PATH_FILTER.filter_paths(paths))
+
+    if legacy != compiled:
+        print("❌ Results differ between the two implementations")
+        return
+    print(f"✅ Same {len(compiled):,} relevant files, {legacy_time / compiled_time:.1f}x faster")
+
+    # Where the compiled filter's time goes: the directory test (with and without
+    # the per-directory memo) and the file name test, timed on their own
+    print("\n🔍 Breakdown:")
+    cuts = [path.rfind('/') + 1 for path in paths]
+    directories = [path[:cut] for path, cut in zip(paths, cuts)]
+    fresh = PathFilter()
+    skip = fresh._skip.search
+    time_it('Split path at the last /', lambda: [path[:path.rfind('/') + 1] for path in paths])
+    time_it('Directory test, regex per path', lambda: [skip(directory) for directory in directories])
+    time_it('Directory test, memoized', lambda: [fresh._directory_skipped(directory) for directory in directories])
+    extensions, important = fresh.extensions, frozenset(fresh.important_files)
+    time_it('File name test', lambda: [
+        path.endswith(extensions) or path[cut:] in important for path, cut in zip(paths, cuts)
+    ])
+    print(f"📁 {len(set(directories)):,} distinct directories, "
+          f"{len(fresh._dir_verdicts):,} memoized (at most {MAX_MEMOIZED_DIRS:,})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Database migration to track the analysed repository commit per project
+Adds projects.analyzed_commit_sha, used to refresh repository analysis
+incrementally with the GitHub compare API
+"""
+
+import asyncio
+import sys
+import os
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.database_config import engine
+
+async def add_analyzed_commit_sha():
+    """Add analyzed_commit_sha column to projects table"""
+
+    print("🚀 Starting analyzed commit migration...")
+
+    try:
+        async with engine.begin() as conn:
+            print("📂 Adding analyzed_commit_sha to projects table...")
+            await conn.execute(text("""
+                ALTER TABLE projects
+                ADD COLUMN IF NOT EXISTS analyzed_commit_sha VARCHAR
+            """))
+            print("✅ analyzed_commit_sha column added (existing projects get it on their next analysis)")
+
+        print("🎉 Analyzed commit migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        raise e
+
+async def rollback_analyzed_commit_sha():
+    """Rollback the analyzed commit migration"""
+    print("⚠️ Rolling back analyzed commit migration...")
+
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text("""
+                ALTER TABLE projects
+                DROP COLUMN IF EXISTS analyzed_commit_sha
+            """))
+
+        print("✅ Analyzed commit migration rollback completed")
+
+    except Exception as e:
+        print(f"❌ Rollback failed: {str(e)}")
+        raise e
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--rollback":
+        confirm = input("Type 'CONFIRM' to drop projects.analyzed_commit_sha: ")
+        if confirm == "CONFIRM":
+            asyncio.run(rollback_analyzed_commit_sha())
+        else:
+            print("❌ Rollback cancelled")
+    else:
+        asyncio.run(add_analyzed_commit_sha())
@@ -0,0 +1,64 @@
+"""
+Database migration for cross-worker LLM rate limiting
+Adds the llm_rate_windows table the LLM scheduler uses with
+LLM_SCHEDULER_BACKEND=postgres to share one RPM/TPM budget between workers
+"""
+
+import asyncio
+import sys
+import os
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.database_config import engine
+
+async def add_llm_rate_windows():
+    """Create the llm_rate_windows table"""
+
+    print("🚀 Starting LLM rate window migration...")
+
+    try:
+        async with engine.begin() as conn:
+            print("📂 Creating llm_rate_windows table...")
+            await conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS llm_rate_windows (
+                    deployment VARCHAR NOT NULL,
+                    window_start TIMESTAMPTZ NOT NULL,
+                    requests INTEGER NOT NULL DEFAULT 0,
+                    tokens INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (deployment, window_start)
+                )
+            """))
+            print("✅ llm_rate_windows table created")
+
+        print("🎉 LLM rate window migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        raise e
+
+async def rollback_llm_rate_windows():
+    """Rollback the LLM rate window migration"""
+    print("⚠️ Rolling back LLM rate window migration...")
+
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP TABLE IF EXISTS llm_rate_windows"))
+
+        print("✅ LLM rate window migration rollback completed")
+
+    except Exception as e:
+        print(f"❌ Rollback failed: {str(e)}")
+        raise e
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--rollback":
+        confirm = input("Type 'CONFIRM' to drop the llm_rate_windows table: ")
+        if confirm == "CONFIRM":
+            asyncio.run(rollback_llm_rate_windows())
+        else:
+            print("❌ Rollback cancelled")
+    else:
+        asyncio.run(add_llm_rate_windows())
@@ -0,0 +1,62 @@
+"""
+Database migration for per-project repository path filters
+Adds projects.path_filter, a JSON PathFilter config deciding which files of
+the repository are analysed (NULL keeps the standard rules)
+"""
+
+import asyncio
+import sys
+import os
+
+# Add the parent directory to the path so we can import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.database_config import engine
+
+async def add_project_path_filter():
+    """Add path_filter column to projects table"""
+
+    print("🚀 Starting path filter migration...")
+
+    try:
+        async with engine.begin() as conn:
+            print("📂 Adding path_filter to projects table...")
+            await conn.execute(text("""
+                ALTER TABLE projects
+                ADD COLUMN IF NOT EXISTS path_filter TEXT
+            """))
+            print("✅ path_filter column added (existing projects keep the standard rules)")
+
+        print("🎉 Path filter migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        raise e
+
+async def rollback_project_path_filter():
+    """Rollback the path filter migration"""
+    print("⚠️ Rolling back path filter migration...")
+
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text("""
+                ALTER TABLE projects
+                DROP COLUMN IF EXISTS path_filter
+            """))
+
+        print("✅ Path filter migration rollback completed")
+
+    except Exception as e:
+        print(f"❌ Rollback failed: {str(e)}")
+        raise e
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--rollback":
+        confirm = input("Type 'CONFIRM' to drop projects.path_filter: ")
+        if confirm == "CONFIRM":
+            asyncio.run(rollback_project_path_filter())
+        else:
+            print("❌ Rollback cancelled")
+    else:
+        asyncio.run(add_project_path_filter())
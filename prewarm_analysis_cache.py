@@ -0,0 +1,107 @@
+"""
+Pre-analyse a list of repositories so project creation finds the analysis cache warm
+
+Usage:
+    python prewarm_analysis_cache.py repos.txt [--concurrency 4] [--mode contents|tarball|mirror]
+
+ANALYSIS_CACHE_DIR must be set to the persistent directory the API server
+uses, otherwise the snapshots land in a temp directory the server never reads.
+
+The file holds one repository URL (or local path) per line; blank lines and
+lines starting with '#' are ignored. Use '-' to read the list from stdin.
+Local paths are accepted here because the operator runs this script; the API
+only reads them with ALLOW_LOCAL_REPO_SOURCES=true.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Force load correct environment variables from .env file
+from force_env_loader import force_load_env
+force_load_env()
+
+from agent.repository_analyzer import analyze_repository
+from agent.github_client import close_github_client
+from agent.analysis_cache import ANALYSIS_CACHE_DIR
+from prompts.learning_path_prompts import prepare_repository_context
+
+
+def read_repo_list(source):
+    """Return the unique repository URLs in a list file, in order"""
+    handle = sys.stdin if source == '-' else open(source, 'r', encoding='utf-8')
+    try:
+        urls = [line.strip() for line in handle]
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+    return list(dict.fromkeys(url for url in urls if url and not url.startswith('#')))
+
+
+async def prewarm_repository(repo_url, github_token, semaphore, ingestion_mode=None):
+    """Analyse one repository (storing the snapshot) and build its prompt context"""
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            repo_analysis = await analyze_repository(
+                repo_url, github_token, ingestion_mode=ingestion_mode, allow_local_sources=True
+            )
+            if not repo_analysis['success']:
+                print(f"❌ {repo_url}: {repo_analysis['error']}")
+                return False
+            context = prepare_repository_context(repo_analysis)
+            elapsed = time.perf_counter() - started
+            print(f"✅ {repo_url}@{(repo_analysis.get('commit_sha') or '?')[:8]}: "
+                  f"{repo_analysis['total_files']} files, {len(context['file_samples'])} samples ({elapsed:.1f}s)")
+            return True
+        except Exception as e:
+            print(f"❌ {repo_url}: {str(e)}")
+            return False
+
+
+async def prewarm(repo_urls, concurrency, ingestion_mode=None):
+    github_token = os.getenv('GITHUB_ACCESS_TOKEN')
+    if not github_token:
+        print("⚠️ GITHUB_ACCESS_TOKEN not set; unauthenticated GitHub rate limits apply")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    try:
+        results = await asyncio.gather(*(
+            prewarm_repository(url, github_token, semaphore, ingestion_mode) for url in repo_urls
+        ))
+    finally:
+        await close_github_client()
+    return sum(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm the repository analysis cache for a list of repositories")
+    parser.add_argument('repo_list', help="File with one repository URL per line, or '-' for stdin")
+    parser.add_argument('--concurrency', type=int, default=int(os.getenv('PREWARM_CONCURRENCY', '4')),
+                        help="Repositories analysed at the same time (default: 4)")
+    parser.add_argument('--mode', choices=['contents', 'tarball', 'mirror'], default=None,
+                        help="Ingestion mode (default: REPO_INGESTION_MODE)")
+    args = parser.parse_args()
+
+    if not os.getenv('ANALYSIS_CACHE_DIR'):
+        print("❌ ANALYSIS_CACHE_DIR is not set; set it to the directory the API server reads snapshots from")
+        sys.exit(2)
+    if not os.getenv('BLOB_CACHE_DIR'):
+        print("⚠️ BLOB_CACHE_DIR not set; file contents are cached in the temp directory only")
+
+    repo_urls = read_repo_list(args.repo_list)
+    if not repo_urls:
+        print("❌ No repositories to analyse")
+        sys.exit(1)
+
+    print(f"🔥 Pre-analysing {len(repo_urls)} repositories with concurrency {args.concurrency} into {ANALYSIS_CACHE_DIR}")
+    started = time.perf_counter()
+    succeeded = asyncio.run(prewarm(repo_urls, max(1, args.concurrency), args.mode))
+    print(f"\n📊 {succeeded}/{len(repo_urls)} repositories cached in {time.perf_counter() - started:.1f}s")
+    sys.exit(0 if succeeded == len(repo_urls) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,12 @@
 # GitGuide Prompts Package
 # Contains all prompt templates for LLM interactions
 
-from .learning_path_prompts import create_analysis_prompt, prepare_repository_context, create_day_content_generation_prompt
+from .learning_path_prompts import (
+    create_analysis_prompt, prepare_repository_context, create_day_content_generation_prompt,
+    create_day_skeleton_prompt, create_concept_details_prompt, create_day_continuation_prompt
+)
 from .chat_prompts import create_chat_prompt
  
-__all__ = ["create_analysis_prompt", "prepare_repository_context", "create_day_content_generation_prompt", "create_chat_prompt"] 
\ No newline at end of file
+__all__ = ["create_analysis_prompt", "prepare_repository_context", "create_day_content_generation_prompt",
+           "create_day_skeleton_prompt", "create_concept_details_prompt",
+           "create_day_continuation_prompt", "create_chat_prompt"] 
\ No newline at end of file
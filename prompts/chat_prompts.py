@@ -3,20 +3,42 @@ Chat Assistant Prompts
 Prompts for context-aware chat interactions with the AI tutor
 """
 
+from .token_budget import CHARS_PER_TOKEN, fit_sections
+
+# Characters of quoted source per chat prompt (the old 5 files x 800 chars)
+CHAT_DEFINITIONS_BUDGET = 4000
+
 def create_chat_prompt(user_message: str, context: dict) -> str:
     """Create a context-aware prompt for the chat assistant"""
+    # Imported here: the agent package imports these prompts, so a module-level import would be circular
+    from agent.symbol_index import find_relevant_definitions, format_definitions
     
     project = context['project']
     current_task = context['current_task']
     learning_path = context['learning_path']
     repo_files = context['repo_files']
+    symbol_index = context.get('symbol_index')
     
-    # Create repository files summary
+    # Quote the definitions that match the question and the current task
     files_summary = ""
-    if repo_files:
+    definitions = []
+    if repo_files and symbol_index:
+        query = user_message
+        preferred_paths = []
+        if current_task:
+            query += f" {current_task['name']} {current_task['description']}"
+            preferred_paths = current_task['files_to_study'] or []
+        definitions = find_relevant_definitions(
+            symbol_index, repo_files, query, preferred_paths, CHAT_DEFINITIONS_BUDGET
+        )
+    
+    if definitions:
+        files_summary = "\nRELEVANT CODE:" + format_definitions(definitions) + "\n"
+    elif repo_files:
         files_summary = "\nREPOSITORY FILES:\n"
-        for file_path, content in list(repo_files.items())[:5]:  # Limit to 5 files
-            files_summary += f"\n--- {file_path} ---\n{content[:800]}...\n"
+        samples = {path: repo_files[path][:CHAT_DEFINITIONS_BUDGET] for path in list(repo_files)[:5]}  # Limit to 5 files
+        for file_path, content in fit_sections(samples, int(CHAT_DEFINITIONS_BUDGET / CHARS_PER_TOKEN)).items():
+            files_summary += f"\n--- {file_path} ---\n{content}\n"
     
     # Create learning path summary
     learning_summary = ""
@@ -3,6 +3,13 @@ Learning Path Generation Prompts
 Prompts for generating structured learning paths from repository analysis
 """
 
+from .token_budget import CHARS_PER_TOKEN, FILE_SAMPLES_TOKEN_BUDGET, fit_sections
+
+# Characters of quoted definitions in a day-content prompt
+DAY_DEFINITIONS_BUDGET = 6000
+# Per-concept prompts quote fewer, more targeted definitions
+CONCEPT_DEFINITIONS_BUDGET = 3000
+
 def prepare_repository_context(repo_analysis):
     """Prepare repository context for LLM analysis"""
     context = {
@@ -16,17 +23,26 @@ def prepare_repository_context(repo_analysis):
     important_files = ['README.md', 'package.json', 'requirements.txt', 'setup.py', 'pyproject.toml']
     file_sample = {}
     
-    for file_path, content in repo_analysis['files'].items():
+    # Files arrive ranked best-first by the analyzer, so the first code files are the most relevant
+    # Only sampled files are loaded, since contents may be spilled to disk
+    files = repo_analysis['files']
+    sample_chars = int(FILE_SAMPLES_TOKEN_BUDGET * CHARS_PER_TOKEN)  # No one sample can use more than the whole budget
+    for file_path in files:
         file_name = file_path.split('/')[-1]
         
-        # Always include important config files (shorter content for faster processing)
+        # Always include important config files
         if file_name in important_files:
-            file_sample[file_path] = content[:1500]  # Reduced from 2000 to 1500
-        # Add some representative code files (limit to 8 files max)
+            file_sample[file_path] = files[file_path][:sample_chars]
+        # Add the top-ranked code files (limit to 8 files max)
         elif len(file_sample) < 8 and any(file_path.endswith(ext) for ext in ['.js', '.jsx', '.ts', '.tsx', '.py']):
-            file_sample[file_path] = content[:1000]  # Reduced from 1500 to 1000
+            file_sample[file_path] = files[file_path][:sample_chars]
     
-    context['file_samples'] = file_sample
+    # Short files are quoted whole and the rest share what they leave of the budget
+    context['file_samples'] = fit_sections(file_sample, FILE_SAMPLES_TOKEN_BUDGET)
+    
+    # Symbol table and sources for prompts that quote relevant definitions instead of file heads
+    context['symbol_index'] = repo_analysis.get('symbol_index')
+    context['source_files'] = repo_analysis['files']
     
     return context
 
@@ -35,7 +51,7 @@ def create_analysis_prompt(repo_context, skill_level, domain):
     
     file_contents_text = ""
     for file_path, content in repo_context['file_samples'].items():
-        file_contents_text += f"\n\n--- {file_path} ---\n{content[:1000]}"
+        file_contents_text += f"\n\n--- {file_path} ---\n{content}"
     
     prompt = f"""
 You are an expert software engineering instructor analyzing a GitHub repository to create a personalized, step-by-step learning journey for a beginner.
@@ -116,7 +132,7 @@ def create_regenerate_project_overview_prompt(repo_context, current_overview, us
     
     file_contents_text = ""
     for file_path, content in repo_context['file_samples'].items():
-        file_contents_text += f"\n\n--- {file_path} ---\n{content[:1000]}"
+        file_contents_text += f"\n\n--- {file_path} ---\n{content}"
     
     prompt = f"""
 You are an expert software engineering instructor regenerating a project overview based on specific user feedback.
@@ -165,7 +181,7 @@ def create_regenerate_whole_path_prompt(repo_context, current_concepts, user_pro
     
     file_contents_text = ""
     for file_path, content in repo_context['file_samples'].items():
-        file_contents_text += f"\n\n--- {file_path} ---\n{content[:1000]}"
+        file_contents_text += f"\n\n--- {file_path} ---\n{content}"
     
     # Summarize current structure
     current_structure = ""
@@ -247,7 +263,7 @@ def create_regenerate_concept_prompt(repo_context, concept_to_regenerate, user_p
     
     file_contents_text = ""
     for file_path, content in repo_context['file_samples'].items():
-        file_contents_text += f"\n\n--- {file_path} ---\n{content[:1000]}"
+        file_contents_text += f"\n\n--- {file_path} ---\n{content}"
     
     prompt = f"""
 You are an expert software engineering instructor regenerating a specific learning concept based on user feedback.
@@ -322,7 +338,7 @@ def create_regenerate_subtopic_prompt(repo_context, subtopic_to_regenerate, pare
     
     file_contents_text = ""
     for file_path, content in repo_context['file_samples'].items():
-        file_contents_text += f"\n\n--- {file_path} ---\n{content[:1000]}"
+        file_contents_text += f"\n\n--- {file_path} ---\n{content}"
     
     prompt = f"""
 You are an expert software engineering instructor regenerating a specific learning subtopic based on user feedback.
@@ -395,7 +411,7 @@ def create_regenerate_task_prompt(repo_context, task_to_regenerate, parent_subto
     
     file_contents_text = ""
     for file_path, content in repo_context['file_samples'].items():
-        file_contents_text += f"\n\n--- {file_path} ---\n{content[:1000]}"
+        file_contents_text += f"\n\n--- {file_path} ---\n{content}"
     
     prompt = f"""
 You are an expert software engineering instructor regenerating a specific learning task based on user feedback.
@@ -456,14 +472,47 @@ Generate EXACTLY this JSON structure with the regenerated task content.
 
 # ==================== BACKGROUND DAY GENERATION ====================
 
-def create_day_content_generation_prompt(repo_context, day_number, skill_level, domain, project_overview):
-    """Create prompt for generating content for a specific day in the background"""
+DAY_TASK_GUIDELINES = """TASK REQUIREMENTS - EVERY TASK MUST:
+1. Require the user to create, modify, or organize actual files in their repository
+2. Be verifiable via GitHub API (file creation, commits, specific file content)
+3. Have detailed step-by-step instructions (8-15 sentences) with specific outcomes
+4. Reference actual files/folders from the repository 
+5. Include clear acceptance criteria that can be checked programmatically
+6. Build upon previous tasks progressively
+7. Include specific file names, directory structures, or code patterns to implement
+
+VERIFICATION TYPES TO USE:
+- "file_creation": Task requires creating specific files (index.html, main.py, config.json, etc.)
+- "commit_verification": Task requires making commits with specific patterns or messages
+- "readme_update": Task requires updating README.md with specific sections
+- "directory_structure": Task requires organizing files into specific folder structures
+- "code_implementation": Task requires implementing specific functions or features
+
+EXAMPLE TASK STRUCTURE:
+Instead of: "Review the authentication system"
+Create: "Implement User Registration Form Component - Create a new file `components/UserRegistration.js` with form fields for username, email, and password. Include form validation, error handling, and styling. The component should export a default function and include proper prop types. Test the component by importing it into `App.js` and adding it to the main render method. Commit your changes with the message 'Add user registration form component'.\""""
+
+def _day_repository_context(repo_context, day_number, skill_level, domain, project_overview, query, definitions_budget):
+    """Repository, learner and key-file sections shared by the day prompts"""
+    # Imported here: the agent package imports these prompts, so a module-level import would be circular
+    from agent.symbol_index import find_relevant_definitions, format_definitions
+    
+    definitions = []
+    if repo_context.get('symbol_index'):
+        definitions = find_relevant_definitions(
+            repo_context['symbol_index'], repo_context['source_files'],
+            query, max_chars=definitions_budget
+        )
     
     file_contents_text = ""
     for file_path, content in repo_context['file_samples'].items():
-        file_contents_text += f"\n\n--- {file_path} ---\n{content[:1000]}"
+        # With definitions available only manifests and docs are quoted as whole-file heads
+        if definitions and file_path in repo_context['symbol_index']['modules']:
+            continue
+        file_contents_text += f"\n\n--- {file_path} ---\n{content}"
+    file_contents_text += format_definitions(definitions)
     
-    prompt = f"""
+    return f"""
 You are an expert software engineering instructor generating Day {day_number} content for a GitGuide learning journey.
 
 REPOSITORY INFORMATION:
@@ -481,29 +530,21 @@ PROJECT OVERVIEW CONTEXT:
 {project_overview}
 
 KEY FILES CONTENT:{file_contents_text}
+"""
 
+def create_day_content_generation_prompt(repo_context, day_number, skill_level, domain, project_overview):
+    """Create prompt for generating content for a specific day in the background"""
+    
+    repository_context = _day_repository_context(
+        repo_context, day_number, skill_level, domain, project_overview,
+        f"{domain} {project_overview}", DAY_DEFINITIONS_BUDGET
+    )
+    
+    prompt = f"""{repository_context}
 TASK:
 Generate Day {day_number} content that consists of practical, hands-on GitHub-based tasks. Every task MUST be verifiable through GitHub API by checking actual code changes, file creation, or commit activity. Aim for 6-8 concepts for the day, each with 3-6 subconcepts, and each subconcept with 2-4 tasks.
 
-TASK REQUIREMENTS - EVERY TASK MUST:
-1. Require the user to create, modify, or organize actual files in their repository
-2. Be verifiable via GitHub API (file creation, commits, specific file content)
-3. Have detailed step-by-step instructions (8-15 sentences) with specific outcomes
-4. Reference actual files/folders from the repository 
-5. Include clear acceptance criteria that can be checked programmatically
-6. Build upon previous tasks progressively
-7. Include specific file names, directory structures, or code patterns to implement
-
-VERIFICATION TYPES TO USE:
-- "file_creation": Task requires creating specific files (index.html, main.py, config.json, etc.)
-- "commit_verification": Task requires making commits with specific patterns or messages
-- "readme_update": Task requires updating README.md with specific sections
-- "directory_structure": Task requires organizing files into specific folder structures
-- "code_implementation": Task requires implementing specific functions or features
-
-EXAMPLE TASK STRUCTURE:
-Instead of: "Review the authentication system"
-Create: "Implement User Registration Form Component - Create a new file `components/UserRegistration.js` with form fields for username, email, and password. Include form validation, error handling, and styling. The component should export a default function and include proper prop types. Test the component by importing it into `App.js` and adding it to the main render method. Commit your changes with the message 'Add user registration form component'."
+{DAY_TASK_GUIDELINES}
 
 CONTENT DEPTH REQUIREMENTS:
 - Each concept: 6-8 sentences explaining the technical concept with repository context
@@ -547,4 +588,139 @@ RESPONSE FORMAT (JSON ONLY):
 RESPOND WITH ONLY THE JSON STRUCTURE ABOVE. NO OTHER TEXT OR EXPLANATIONS.
 """
     
-    return prompt 
\ No newline at end of file
+    return prompt
+
+def create_day_skeleton_prompt(repo_context, day_number, skill_level, domain, project_overview):
+    """Create a short prompt for the concept outline of a day (details are generated per concept)"""
+    
+    repository_context = _day_repository_context(
+        repo_context, day_number, skill_level, domain, project_overview,
+        f"{domain} {project_overview}", DAY_DEFINITIONS_BUDGET
+    )
+    
+    prompt = f"""{repository_context}
+TASK:
+Outline Day {day_number} of the learning journey: 6-8 concepts that build on each other, each grounded in actual files and folders of this repository. Subconcepts and tasks will be written separately for each concept, so only give the outline here.
+
+CONTENT DEPTH REQUIREMENTS:
+- Each concept: 6-8 sentences explaining the technical concept with repository context
+- Each concept lists the repository files that best demonstrate it
+
+CRITICAL: You MUST respond with ONLY valid JSON. No explanations, no markdown, no additional text. Your response must start with {{ and end with }}. Nothing else.
+
+RESPONSE FORMAT (JSON ONLY):
+{{
+    "day_number": {day_number},
+    "concepts": [
+        {{
+            "id": "day{day_number}-concept-0",
+            "name": "Concept name (e.g., 'Component Architecture and State Management')",
+            "description": "Detailed 6-8 sentence explanation of the concept, how it relates to this specific repository, which files demonstrate this pattern, and why it's important for this project.",
+            "key_files": ["src/components/ExistingComponent.js"]
+        }}
+    ]
+}}
+
+RESPOND WITH ONLY THE JSON STRUCTURE ABOVE. NO OTHER TEXT OR EXPLANATIONS.
+"""
+    
+    return prompt
+
+def create_concept_details_prompt(repo_context, day_number, concept, concept_index, day_outline, skill_level, domain, project_overview):
+    """Create prompt for the subconcepts and tasks of one concept from a day outline"""
+    
+    repository_context = _day_repository_context(
+        repo_context, day_number, skill_level, domain, project_overview,
+        f"{concept.get('name', '')} {concept.get('description', '')} {' '.join(concept.get('key_files', []))}",
+        CONCEPT_DEFINITIONS_BUDGET
+    )
+    outline_text = "\n".join(
+        f"{i + 1}. {c.get('name', '')}" + ("  <-- THIS CONCEPT" if i == concept_index else "")
+        for i, c in enumerate(day_outline)
+    )
+    
+    prompt = f"""{repository_context}
+DAY {day_number} OUTLINE:
+{outline_text}
+
+CONCEPT TO DETAIL:
+- Name: {concept.get('name', '')}
+- Description: {concept.get('description', '')}
+- Key Files: {', '.join(concept.get('key_files', [])) or 'not specified'}
+
+TASK:
+Write the subconcepts and tasks for this one concept only; the other concepts of the day are written separately. Give 3-6 subconcepts, each with one practical, hands-on GitHub-based task that builds on the previous ones. Every task MUST be verifiable through GitHub API by checking actual code changes, file creation, or commit activity.
+
+{DAY_TASK_GUIDELINES}
+
+CONTENT DEPTH REQUIREMENTS:
+- Each subconcept: 3-4 sentences describing the specific implementation aspect
+- Each task: 8-15 sentences with detailed implementation steps, file specifications, and commit requirements
+
+CRITICAL: You MUST respond with ONLY valid JSON. No explanations, no markdown, no additional text. Your response must start with {{ and end with }}. Nothing else.
+
+RESPONSE FORMAT (JSON ONLY):
+{{
+    "subconcepts": [
+        {{
+            "id": "day{day_number}-subconcept-{concept_index}-0",
+            "name": "Subconcept name (e.g., 'Creating Reusable Form Components')",
+            "description": "3-4 sentence description explaining this specific implementation aspect, referencing actual files in the repository where this pattern is used or should be implemented.",
+            "task": {{
+                "id": "day{day_number}-task-{concept_index}-0-0",
+                "name": "Specific implementation task (e.g., 'Create ContactForm Component with Validation')",
+                "description": "Detailed 8-15 sentence implementation guide with exact file names, functionality, imports/exports, error handling, testing and a specific commit message. Include acceptance criteria that can be verified by checking file existence, content patterns, or commit messages.",
+                "files_to_study": ["src/components/ExistingComponent.js"],
+                "difficulty": "easy",
+                "verification_type": "file_creation",
+                "verification_criteria": {{
+                    "required_files": ["src/components/ContactForm.js"],
+                    "file_content_patterns": ["export default", "useState", "onSubmit"],
+                    "commit_message_pattern": "Add ContactForm component"
+                }}
+            }}
+        }}
+    ]
+}}
+
+RESPOND WITH ONLY THE JSON STRUCTURE ABOVE. NO OTHER TEXT OR EXPLANATIONS.
+"""
+    
+    return prompt
+
+def create_day_continuation_prompt(day_number, generated_concepts, partial_concept=None):
+    """Create the follow-up prompt that continues a day response cut off at the token limit"""
+    
+    generated_text = "\n".join(
+        f"- {concept.get('id', '')}: {concept.get('name', '')}" for concept in generated_concepts
+    ) or "- (none)"
+    
+    if partial_concept:
+        last_subconcept = partial_concept['subconcepts'][-1]
+        cut_off_text = f"""The concept "{partial_concept.get('id', '')}" ({partial_concept.get('name', '')}) was cut off after its subconcept "{last_subconcept.get('id', '')}" ({last_subconcept.get('name', '')}). Put the rest of its subconcepts in "continued_concept", continuing the same id numbering."""
+    else:
+        cut_off_text = 'No concept was cut off midway, so leave "continued_concept" out.'
+    
+    prompt = f"""
+Your earlier response to this Day {day_number} request was cut off at the token limit. Its complete part has been kept:
+
+CONCEPTS ALREADY GENERATED:
+{generated_text}
+
+{cut_off_text}
+
+Continue the day from exactly that point, following the same requirements, depth and id format as before. Add further concepts after the last generated one until the day has 6-8 concepts in total; if it already has enough, return an empty "concepts" list. Do NOT repeat anything that was already generated.
+
+CRITICAL: You MUST respond with ONLY valid JSON. Your response must start with {{ and end with }}. Nothing else.
+
+RESPONSE FORMAT (JSON ONLY):
+{{
+    "continued_concept": {{
+        "id": "{partial_concept.get('id', '') if partial_concept else ''}",
+        "subconcepts": [ ...remaining subconcepts, same format as before... ]
+    }},
+    "concepts": [ ...remaining concepts, same format as before... ]
+}}
+"""
+    
+    return prompt
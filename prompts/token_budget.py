@@ -0,0 +1,122 @@
+"""
+Token Budgeting
+Estimates token counts and sizes prompt sections and completion limits for the
+deployment's context window, instead of fixed character slices and hard-coded
+max_tokens. Uses tiktoken when it is installed and a characters-per-token
+estimate otherwise
+"""
+
+import os
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding(os.getenv('LLM_TOKEN_ENCODING', 'o200k_base'))
+except Exception:  # Not installed, or the encoding can't be loaded offline
+    _encoding = None
+
+# Deployment limits. The window default is a conservative 128k that fits GPT-4o-class
+# deployments too; GPT-4.1 accepts about 1M tokens (LLM_CONTEXT_WINDOW=1047576).
+# 32768 is GPT-4.1's output cap
+LLM_CONTEXT_WINDOW = int(os.getenv('LLM_CONTEXT_WINDOW', '128000'))
+LLM_MAX_OUTPUT_TOKENS = int(os.getenv('LLM_MAX_OUTPUT_TOKENS', '32768'))
+
+# Tokens of repository file samples quoted in a learning path prompt
+FILE_SAMPLES_TOKEN_BUDGET = int(os.getenv('PROMPT_FILE_SAMPLES_TOKENS', '4000'))
+
+# Estimate used without tiktoken; code and JSON average a little under 4 characters per token
+CHARS_PER_TOKEN = 3.5
+
+# Per-message framing tokens added by the chat format
+_MESSAGE_OVERHEAD = 4
+_REPLY_PRIMER = 3
+# Headroom for estimation error so prompt + completion never exceeds the window
+_SAFETY_MARGIN = 256
+
+
+def count_tokens(text):
+    """Number of tokens in text (estimated when tiktoken is unavailable)"""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return int(len(text) / CHARS_PER_TOKEN) + 1
+
+
+def count_message_tokens(messages):
+    """Number of prompt tokens a list of chat messages uses"""
+    return sum(count_tokens(m.get('content') or '') + _MESSAGE_OVERHEAD for m in messages) + _REPLY_PRIMER
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Cut text to at most max_tokens, at a line boundary when one is close"""
+    if max_tokens <= 0:
+        return ''
+    if count_tokens(text) <= max_tokens:
+        return text
+    if _encoding is not None:
+        cut = _encoding.decode(_encoding.encode(text, disallowed_special=())[:max_tokens])
+    else:
+        cut = text[:int(max_tokens * CHARS_PER_TOKEN)]
+    newline = cut.rfind('\n')
+    if newline > len(cut) * 0.8:
+        cut = cut[:newline]
+    return cut
+
+
+def fit_sections(sections, budget_tokens):
+    """
+    Share a token budget between named text sections (e.g. file samples)
+
+    Sections smaller than an equal share are kept whole and what they don't
+    use goes to the larger ones, so one long file no longer crowds out the
+    rest and short files are never cut needlessly.
+
+    Args:
+        sections: Dict name -> text, in the order they should appear
+        budget_tokens: Total tokens for all sections
+
+    Returns:
+        dict: Same keys and order, each text truncated to its share
+    """
+    sizes = {name: count_tokens(text) for name, text in sections.items()}
+    shares = {}
+    remaining = budget_tokens
+    pending = sorted(sections, key=lambda name: sizes[name])
+    while pending:
+        share = remaining // len(pending)
+        name = pending[0]
+        if sizes[name] <= share:
+            shares[name] = sizes[name]
+            remaining -= sizes[name]
+            pending.pop(0)
+        else:
+            # Everything left is larger than an equal share: split evenly
+            for name in pending:
+                shares[name] = share
+            break
+    return {name: truncate_to_tokens(text, shares[name]) for name, text in sections.items()}
+
+
+class PromptTooLongError(ValueError):
+    """The prompt leaves too little of the context window for a useful response"""
+
+
+def completion_budget(messages, desired_tokens, minimum_tokens=1024):
+    """
+    max_tokens for a call: the desired size, limited by the output cap and by what the prompt leaves of the window
+
+    Args:
+        messages: Chat messages that will be sent
+        desired_tokens: Completion size the response format needs
+        minimum_tokens: Smallest useful completion
+
+    Raises:
+        PromptTooLongError: The window can't fit the prompt and minimum_tokens
+            (or desired_tokens, if smaller), so the call could only fail or be cut off
+    """
+    available = LLM_CONTEXT_WINDOW - count_message_tokens(messages) - _SAFETY_MARGIN
+    if available < min(minimum_tokens, desired_tokens):
+        raise PromptTooLongError(
+            f"Prompt leaves only {max(available, 0)} tokens of the {LLM_CONTEXT_WINDOW}-token window for the response"
+        )
+    return min(desired_tokens, LLM_MAX_OUTPUT_TOKENS, available)